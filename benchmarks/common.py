@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Synthetic NeuroDriver-like circuits and a comm that records messages.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from ipykernel.comm import Comm
+
+from ipyneugraph import NeuGraphWidget
+from ipyneugraph.cache import set_cache
+from ipyneugraph.store import GraphStore
+
+# edge counts of the benchmarked circuits
+SIZES = [1000, 10000, 100000, 1000000]
+
+# a circuit has this many synapses per neuron
+FAN_OUT = 10
+
+
+class MockComm(Comm):
+    """A comm that keeps sent messages instead of sending them."""
+    comm_id = 'benchmark'
+    kernel = 'Truthy'
+
+    def __init__(self, *args, **kwargs):
+        self.log_send = []
+        super(MockComm, self).__init__(*args, **kwargs)
+
+    def open(self, *args, **kwargs):
+        pass
+
+    def send(self, *args, **kwargs):
+        self.log_send.append((args, kwargs))
+
+    def close(self, *args, **kwargs):
+        pass
+
+    @property
+    def nbytes(self):
+        """Bytes in the buffers of the sent messages."""
+        return sum(memoryview(b).nbytes for _, kwargs in self.log_send
+                   for b in kwargs.get('buffers') or [])
+
+
+def widget():
+    """A widget on a :class:`MockComm`, with the disk cache disabled."""
+    set_cache(None)
+    return NeuGraphWidget(comm=MockComm())
+
+
+def _circuit(n_edges, seed):
+    rng = np.random.RandomState(seed)
+    n = max(n_edges // FAN_OUT, 2)
+    source = rng.randint(0, n, n_edges)
+    target = (source + rng.randint(1, n, n_edges)) % n
+    hh = rng.rand(n) < 0.2
+    synapse = rng.rand(n_edges) < 0.9
+    return n, source, target, hh, synapse, rng
+
+
+@lru_cache()
+def lpu(n_edges, seed=0):
+    """A ``MultiDiGraph`` of LeakyIAF and HodgkinHuxley neurons connected
+    by AlphaSynapse and PowerGPotGPot synapses.
+    """
+    import networkx as nx
+
+    n, source, target, hh, synapse, rng = _circuit(n_edges, seed)
+    G = nx.MultiDiGraph()
+    for i in range(n):
+        if hh[i]:
+            G.add_node('n%d' % i, **{'class': 'HodgkinHuxley', 'name': 'n%d' % i,
+                                     'g_K': 36.0, 'g_Na': 120.0, 'g_L': 0.3})
+        else:
+            G.add_node('n%d' % i, **{'class': 'LeakyIAF', 'name': 'n%d' % i,
+                                     'V_th': -55.0 + rng.rand(), 'resting_potential': -70.0,
+                                     'capacitance': 0.07})
+    for j in range(n_edges):
+        u, v = 'n%d' % source[j], 'n%d' % target[j]
+        if synapse[j]:
+            G.add_edge(u, v, **{'class': 'AlphaSynapse', 'gmax': rng.rand(), 'ar': 0.11,
+                                'ad': 0.19, 'reverse': -80.0})
+        else:
+            G.add_edge(u, v, **{'class': 'PowerGPotGPot', 'slope': 4.0, 'threshold': -55.0})
+    return G
+
+
+def lpu_store(n_edges, seed=0):
+    """The circuit of :func:`lpu` built directly as a new store, with
+    positions.
+    """
+    n, source, target, hh, synapse, rng = _circuit(n_edges, seed)
+    neuron_class = np.where(hh, 'HodgkinHuxley', 'LeakyIAF').astype(object)
+    synapse_class = np.where(synapse, 'AlphaSynapse', 'PowerGPotGPot').astype(object)
+    return GraphStore.from_arrays(
+        np.array(['n%d' % i for i in range(n)], dtype=object), source, target,
+        node_attrs={'class': neuron_class, 'V': np.full(n, -70.0),
+                    'x': rng.randn(n), 'y': rng.randn(n)},
+        edge_attrs={'class': synapse_class, 'gmax': rng.rand(n_edges)})
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Conversion of NetworkX circuits and GraphML / GEXF files into stores.
+"""
+
+import os
+import shutil
+import tempfile
+
+import networkx as nx
+
+from ipyneugraph.convert import networkx_to_store
+from ipyneugraph.formats import read_graph, write_graph
+
+from .common import SIZES, lpu, lpu_store
+
+
+class NetworkXConversion(object):
+    params = SIZES
+    param_names = ['edges']
+    timeout = 600
+
+    def setup(self, n_edges):
+        self.G = lpu(n_edges)
+
+    def time_networkx_to_store(self, n_edges):
+        networkx_to_store(self.G)
+
+    def peakmem_networkx_to_store(self, n_edges):
+        networkx_to_store(self.G)
+
+
+class FileReading(object):
+    params = (SIZES, ['graphml', 'gexf'])
+    param_names = ['edges', 'format']
+    timeout = 1200
+
+    def setup(self, n_edges, fmt):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'lpu.' + fmt)
+        self.store = lpu_store(n_edges)
+        write_graph(self.store, self.path)
+
+    def teardown(self, n_edges, fmt):
+        shutil.rmtree(self.dir)
+
+    def time_read_graph(self, n_edges, fmt):
+        read_graph(self.path)
+
+    def peakmem_read_graph(self, n_edges, fmt):
+        read_graph(self.path)
+
+    def peakmem_networkx_read(self, n_edges, fmt):
+        read = nx.read_graphml if fmt == 'graphml' else nx.read_gexf
+        networkx_to_store(read(self.path))
+
+    def time_write_graph(self, n_edges, fmt):
+        write_graph(self.store, self.path)
@@ -0,0 +1,123 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Timings of deserializing a graph payload, building the graphology graph
+ * and rendering it for the first time, on the synthetic circuits of
+ * benchmarks/common.py.
+ */
+
+import {
+  createTestModel
+} from '../../tests/src/utils.spec';
+
+import {
+  NeuGraphModel, NeuGraphView
+} from '../../src/';
+
+import {
+  deserialize_graph
+} from '../../src/serializers';
+
+const SIZES = [1000, 10000, 100000, 1000000];
+const FAN_OUT = 10;
+const REPEAT = 5;
+
+function asView(array: ArrayBufferView): DataView {
+  return new DataView(array.buffer, array.byteOffset, array.byteLength);
+}
+
+/**
+ * A payload as received from the kernel, before deserialization.
+ */
+function circuit(nEdges: number): any {
+  const n = Math.max(Math.floor(nEdges / FAN_OUT), 2);
+  const ids: string[] = [];
+  const x = new Float32Array(n);
+  const y = new Float32Array(n);
+  const cls = new Uint8Array(n);
+  for (let i = 0; i < n; ++i) {
+    ids.push('n' + i);
+    x[i] = Math.random();
+    y[i] = Math.random();
+    cls[i] = Math.random() < 0.2 ? 1 : 0;
+  }
+  const key = new Uint32Array(nEdges);
+  const source = new Uint32Array(nEdges);
+  const target = new Uint32Array(nEdges);
+  const gmax = new Float32Array(nEdges);
+  for (let j = 0; j < nEdges; ++j) {
+    key[j] = j;
+    source[j] = Math.floor(Math.random() * n);
+    target[j] = (source[j] + 1 + Math.floor(Math.random() * (n - 1))) % n;
+    gmax[j] = Math.random();
+  }
+  const column = (dtype: string, array: ArrayBufferView, length: number) =>
+    ({dtype, shape: [length], buffer: asView(array)});
+  return {
+    nodes: {
+      id: column('str', new TextEncoder().encode(ids.join('\0')), n),
+      attrs: {
+        x: column('float32', x, n),
+        y: column('float32', y, n),
+        class: {...column('uint8', cls, n), categories: ['LeakyIAF', 'HodgkinHuxley']},
+      },
+      tables: {},
+    },
+    edges: {
+      id: column('uint32', key, nEdges),
+      source: column('uint32', source, nEdges),
+      target: column('uint32', target, nEdges),
+      attrs: {gmax: column('float32', gmax, nEdges)},
+      tables: {},
+    },
+  };
+}
+
+function report(name: string, edges: number, times: number[]) {
+  times.sort((a, b) => a - b);
+  console.log('BENCHMARK ' + JSON.stringify({
+    name, edges, median_ms: times[Math.floor(times.length / 2)], min_ms: times[0],
+  }));
+}
+
+function measure(f: () => void): number {
+  const start = performance.now();
+  f();
+  return performance.now() - start;
+}
+
+
+describe('graph benchmarks', () => {
+
+  for (const edges of SIZES) {
+
+    it(`deserialize and build ${edges} edges`, () => {
+      const payload = circuit(edges);
+      const deserialize: number[] = [];
+      const build: number[] = [];
+      for (let i = 0; i < REPEAT; ++i) {
+        let graph: any;
+        deserialize.push(measure(() => { graph = deserialize_graph(payload); }));
+        build.push(measure(() => { createTestModel(NeuGraphModel, {graph}); }));
+      }
+      report('deserialize_graph', edges, deserialize);
+      report('build_graph', edges, build);
+    });
+
+    it(`first render of ${edges} edges`, () => {
+      const model = createTestModel(NeuGraphModel, {graph: deserialize_graph(circuit(edges))});
+      const times: number[] = [];
+      for (let i = 0; i < REPEAT; ++i) {
+        const view = new NeuGraphView({model} as any);
+        document.body.appendChild(view.el);
+        view.render();
+        times.push(measure(() => { view.create_renderer(); }));
+        view.remove();
+      }
+      report('first_render', edges, times);
+    });
+
+  }
+
+});
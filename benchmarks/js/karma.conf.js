@@ -0,0 +1,38 @@
+// Frontend benchmarks: `npm run bench`. Results are printed as one JSON
+// object per line, prefixed with "BENCHMARK".
+module.exports = function (config) {
+  config.set({
+    basePath: '../..',
+    frameworks: ['mocha', 'karma-typescript'],
+    reporters: ['mocha'],
+    client: {
+      captureConsole: true,
+      mocha: {
+        timeout: 600000
+      }
+    },
+    files: [
+      { pattern: "benchmarks/js/**/*.ts" },
+      { pattern: "tests/src/utils.spec.ts" },
+      { pattern: "src/**/*.ts" },
+    ],
+    exclude: [
+      "src/extension.ts",
+    ],
+    preprocessors: {
+      '**/*.ts': ['karma-typescript']
+    },
+    browserNoActivityTimeout: 600000,
+    port: 9877,
+    colors: true,
+    singleRun: true,
+    logLevel: config.LOG_INFO,
+
+    karmaTypescriptConfig: {
+      tsconfig: 'benchmarks/js/tsconfig.json',
+      coverageOptions: {
+        instrumentation: false
+      }
+    }
+  });
+};
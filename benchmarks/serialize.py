@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Size and speed of the graph payload sent to the frontend.
+"""
+
+from ipywidgets.widgets.widget import _remove_buffers
+
+from ipyneugraph.serializers import graph_to_json
+
+from .common import SIZES, lpu_store, widget
+
+
+def _payload_bytes(w):
+    _, _, buffers = _remove_buffers({'graph': graph_to_json(w.graph, w)})
+    return sum(memoryview(b).nbytes for b in buffers)
+
+
+class GraphPayload(object):
+    params = (SIZES, ['never', 'always'])
+    param_names = ['edges', 'compression']
+    timeout = 600
+
+    def setup(self, n_edges, compression):
+        self.w = widget()
+        self.w.compression = compression
+        # as announced by a browser with DecompressionStream
+        self.w._codec.accept(['delta', 'quantize', 'zlib'])
+        self.w.graph = lpu_store(n_edges)
+
+    def time_graph_to_json(self, n_edges, compression):
+        graph_to_json(self.w.graph, self.w)
+
+    def track_payload_bytes(self, n_edges, compression):
+        return _payload_bytes(self.w)
+
+    track_payload_bytes.unit = 'bytes'
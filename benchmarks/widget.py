@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Messages sent through the comm by the widget's update paths.
+"""
+
+import numpy as np
+
+from .common import SIZES, lpu_store, widget
+
+
+class SendGraph(object):
+    """Syncing the whole graph, possibly in chunks."""
+    params = SIZES
+    param_names = ['edges']
+    timeout = 600
+
+    def setup(self, n_edges):
+        self.w = widget()
+        self.w.graph = lpu_store(n_edges)
+        self._acknowledge()
+        del self.w.comm.log_send[:]
+
+    def _acknowledge(self):
+        # as the frontend does for every chunk it receives
+        chunks = self.w._chunks
+        while chunks.active:
+            chunks.ack(chunks._transfer, chunks._next - 1)
+
+    def time_send_graph(self, n_edges):
+        self.w.send_state('graph')
+        self._acknowledge()
+
+    def track_messages(self, n_edges):
+        self.w.send_state('graph')
+        self._acknowledge()
+        return len(self.w.comm.log_send)
+
+    track_messages.unit = 'messages'
+
+    def track_bytes(self, n_edges):
+        self.w.send_state('graph')
+        self._acknowledge()
+        return self.w.comm.nbytes
+
+    track_bytes.unit = 'bytes'
+
+
+class Diff(object):
+    """Incremental changes to a displayed graph."""
+    params = SIZES
+    param_names = ['edges']
+    timeout = 600
+
+    def setup(self, n_edges):
+        self.w = widget()
+        self.w.graph = lpu_store(n_edges)
+        n = self.w.graph.n_nodes
+        self.new_ids = ['new%d' % i for i in range(n // 100 + 1)]
+        rng = np.random.RandomState(0)
+        self.sources = self.w.graph.node_ids[rng.randint(0, n, len(self.new_ids))]
+        self.changed = self.w.graph.node_ids[rng.randint(0, n, n // 10 + 1)]
+        del self.w.comm.log_send[:]
+
+    def time_add_nodes_and_edges(self, n_edges):
+        with self.w.hold_diff():
+            self.w.add_nodes(self.new_ids)
+            self.w.add_edges(self.sources, self.new_ids)
+
+    def time_set_node_attrs(self, n_edges):
+        self.w.set_node_attrs(self.changed, {'V': np.zeros(len(self.changed))})
+
+    def track_set_node_attrs_bytes(self, n_edges):
+        self.w.set_node_attrs(self.changed, {'V': np.zeros(len(self.changed))})
+        return self.w.comm.nbytes
+
+    track_set_node_attrs_bytes.unit = 'bytes'
+
+
+class PushState(object):
+    """Simulation state frames."""
+    params = SIZES
+    param_names = ['edges']
+    timeout = 600
+
+    def setup(self, n_edges):
+        self.w = widget()
+        self.w.graph = lpu_store(n_edges)
+        self.V = np.random.RandomState(0).randn(self.w.graph.n_nodes)
+
+    def time_push_state(self, n_edges):
+        self.w.push_state({'V': self.V})
+        self.w.flush_state()
+        self.w._frames.discard()
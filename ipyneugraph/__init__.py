@@ -4,7 +4,9 @@
 # Copyright (c) Tingkai liu.
 # Distributed under the terms of the Modified BSD License.
 
-from .ipyneugraph import NeuGraphWidget
+from .ipyneugraph import NeuGraphWidget, NeuGraphPane
+from .playback import Playback
+from .store import GraphStore
 from ._version import __version__, version_info
 
 from .nbextension import _jupyter_nbextension_paths
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Hierarchical grouping of nodes for overview rendering.
+
+A :class:`Hierarchy` assigns every node a group at each of several nested
+levels, either from attributes (e.g. LPU, then ``class``) or from a
+Louvain-style community detection on the sparse adjacency matrix. An
+:class:`Aggregation` keeps the full graph in the kernel and decides, per
+node, whether it is shown as itself or as one of its enclosing groups. The
+displayed graph has one node per visible group and one edge per pair of
+connected visible nodes, so only a small super-graph is ever sent to the
+frontend; expanding a group replaces it by its children.
+"""
+
+import numpy as np
+
+from .store import GraphStore, _empty_like
+
+GROUP_PREFIX = 'group:'
+
+
+def _codes(values):
+    """Integer codes and the corresponding unique values, in order of first
+    appearance.
+    """
+    uniques, first, inverse = np.unique(np.asarray(values), return_index=True,
+                                        return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[inverse.ravel()], uniques[order]
+
+
+def _local_moves(A, k, m2, resolution, rng, max_sweeps):
+    """Move nodes between communities while modularity improves.
+
+    All nodes evaluate their best move at once; to keep neighbours from
+    swapping communities back and forth, a random half of the improving
+    nodes moves in each sweep.
+    """
+    n = A.shape[0]
+    from scipy import sparse
+    A = (A - sparse.diags(A.diagonal())).tocsr()
+    A.eliminate_zeros()
+    comm = np.arange(n)
+    rows = np.arange(n)
+    for _ in range(max_sweeps):
+        tot = np.bincount(comm, weights=k, minlength=n)
+        # weight from every node into every adjacent community
+        M = (A @ sparse.csr_matrix((np.ones(n), (rows, comm)), shape=(n, n))).tocsr()
+        counts = np.diff(M.indptr)
+        r = np.repeat(rows, counts)
+        own = M.indices == comm[r]
+        gain = M.data - resolution * k[r] * (tot[M.indices] - np.where(own, k[r], 0)) / m2
+        stay = -resolution * k * (tot[comm] - k) / m2
+        stay[r[own]] += M.data[own]
+        nonempty = counts > 0
+        best = np.full(n, -np.inf)
+        best[nonempty] = np.maximum.reduceat(gain, M.indptr[:-1][nonempty])
+        is_best = gain == best[r]
+        target = comm.copy()
+        # the first community reaching the best gain of each row
+        first = np.flatnonzero(is_best)
+        first = first[np.r_[True, r[first][1:] != r[first][:-1]]]
+        target[r[first]] = M.indices[first]
+        improving = (best > stay + 1e-12) & (target != comm)
+        if not improving.any():
+            break
+        move = improving & (rng.random_sample(n) < 0.5)
+        comm[move] = target[move]
+    return _codes(comm)[0]
+
+
+def louvain(n, source, target, weight=None, resolution=1.0, max_levels=10, max_sweeps=32,
+            seed=0):
+    """Hierarchical communities maximising modularity.
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes.
+    source, target : array_like of int
+        Edge endpoints as node rows; edge direction is ignored.
+    weight : array_like of float, optional
+        Edge weights.
+    resolution : float, optional
+        Larger values give smaller communities.
+    max_levels : int, optional
+        Maximum number of coarsening passes.
+    max_sweeps : int, optional
+        Maximum number of local-move sweeps per level.
+    seed : int, optional
+        Seed for the randomised moves.
+
+    Returns
+    -------
+    list of ndarray of int
+        Community of every node at each level, finest first.
+    """
+    from scipy import sparse
+    source = np.asarray(source, dtype=np.int64)
+    target = np.asarray(target, dtype=np.int64)
+    weight = np.ones(len(source)) if weight is None else np.asarray(weight, dtype=np.float64)
+    A = sparse.coo_matrix((weight, (source, target)), shape=(n, n)).tocsr()
+    A = A + A.T
+    m2 = A.sum()
+    rng = np.random.RandomState(seed)
+    levels = []
+    labels = np.arange(n)
+    for _ in range(max_levels):
+        if m2 == 0:
+            break
+        k = np.asarray(A.sum(axis=1)).ravel()
+        comm = _local_moves(A, k, m2, resolution, rng, max_sweeps)
+        c = comm.max() + 1 if len(comm) else 0
+        if c == A.shape[0]:
+            break
+        P = sparse.csr_matrix((np.ones(len(comm)), (np.arange(len(comm)), comm)),
+                              shape=(len(comm), c))
+        A = (P.T @ A @ P).tocsr()
+        labels = comm[labels]
+        levels.append(labels)
+    return levels
+
+
+class Hierarchy(object):
+    """Nested grouping of the nodes of a graph.
+
+    Parameters
+    ----------
+    labels : list of array_like of int
+        Group of every node at each level, finest first. Every group of a
+        level must lie within a single group of the next level.
+    names : list of sequence of str
+        Name of every group, per level.
+    """
+
+    def __init__(self, labels, names):
+        if len(labels) != len(names) or not labels:
+            raise ValueError('labels and names must be non-empty lists of equal length')
+        self.labels = [np.asarray(l, dtype=np.int64) for l in labels]
+        self.names = [np.asarray([str(n) for n in level], dtype=object) for level in names]
+
+    @property
+    def depth(self):
+        return len(self.labels)
+
+    @classmethod
+    def from_attributes(cls, store, by):
+        """Group by node attributes, coarsest first.
+
+        ``by=['lpu', 'class']`` groups nodes by LPU and, within each LPU,
+        by class.
+        """
+        if isinstance(by, str):
+            by = [by]
+        labels, names = [], []
+        path = None
+        for name in by:
+            if name not in store.node_attrs:
+                raise KeyError('no shared node attribute %r' % name)
+            values = np.asarray([str(v) for v in store.node_attrs[name]], dtype=object)
+            path = values if path is None else path + '/' + values
+            key, uniques = _codes(path)
+            labels.insert(0, key)
+            names.insert(0, uniques)
+        return cls(labels, names)
+
+    @classmethod
+    def from_louvain(cls, store, weight=None, **kwargs):
+        """Group by communities; see :func:`louvain` for the parameters.
+
+        ``weight`` names an edge attribute.
+        """
+        w = None if weight is None else np.nan_to_num(store.edge_column(weight))
+        levels = louvain(store.n_nodes, store.source, store.target, w, **kwargs)
+        if not levels:
+            levels = [np.zeros(store.n_nodes, dtype=np.int64)]
+        names = [np.arange(level.max() + 1 if len(level) else 0) for level in levels]
+        return cls(levels, names)
+
+
+class Aggregation(object):
+    """Which nodes of ``store`` are shown individually or as groups.
+
+    Every node is shown at a level of ``hierarchy``: as the group it belongs
+    to at that level, or as itself at level ``-1``. Initially all nodes are
+    shown at the coarsest level.
+
+    Group nodes of the displayed graph have the ID ``'group:<level>:<name>'``
+    and the attributes ``count`` (number of member nodes), ``level`` and
+    ``label``; edges have a ``count`` of the edges they stand for. Edges
+    between two individually shown nodes keep their own attributes.
+    """
+
+    def __init__(self, store, hierarchy):
+        self.store = store
+        self.hierarchy = hierarchy
+        self.shown = np.full(store.n_nodes, hierarchy.depth - 1, dtype=np.int64)
+        self._group_ids = [
+            np.array(['%s%d:%s' % (GROUP_PREFIX, level, name) for name in names], dtype=object)
+            for level, names in enumerate(hierarchy.names)
+        ]
+        self._groups = {
+            gid: (level, label)
+            for level, ids in enumerate(self._group_ids) for label, gid in enumerate(ids)
+        }
+        self._sizes = [np.bincount(l, minlength=len(n))
+                       for l, n in zip(hierarchy.labels, hierarchy.names)]
+
+    def is_group(self, node_id):
+        return node_id in self._groups
+
+    def display_ids(self, rows):
+        """Displayed node ID of each of the given full-graph rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        shown = self.shown[rows]
+        ids = self.store.node_ids[rows].copy()
+        for level in np.unique(shown[shown >= 0]):
+            sel = shown == level
+            ids[sel] = self._group_ids[level][self.hierarchy.labels[level][rows[sel]]]
+        return ids
+
+    def display_store(self):
+        """Build the displayed graph from scratch."""
+        store = GraphStore()
+        nodes = self._nodes(np.ones(self.store.n_nodes, dtype=bool))
+        store.add_nodes(nodes[0], nodes[1])
+        for sources, targets, attrs in self._edges(np.ones(self.store.n_nodes, dtype=bool)):
+            store.add_edges(sources, targets, attrs)
+        return store
+
+    def expand(self, node_id):
+        """Show the children of group ``node_id``.
+
+        Returns the change to the displayed graph as ``(removed node IDs,
+        (added node IDs, attributes), [(sources, targets, edge attributes)])``.
+        """
+        level, label = self._groups[node_id]
+        members = self.hierarchy.labels[level] == label
+        return self._regroup(members, level - 1)
+
+    def collapse(self, node_id):
+        """Show the group enclosing the displayed node ``node_id``.
+
+        Returns the change to the displayed graph, as :meth:`expand` does,
+        or ``None`` if ``node_id`` is already a top-level group.
+        """
+        if node_id in self._groups:
+            level = self._groups[node_id][0] + 1
+            if level == self.hierarchy.depth:
+                return None
+            row = np.flatnonzero(self.hierarchy.labels[level - 1] == self._groups[node_id][1])[0]
+        else:
+            level = 0
+            row = self.store.node_rows([node_id])[0]
+        members = self.hierarchy.labels[level] == self.hierarchy.labels[level][row]
+        return self._regroup(members, level)
+
+    def _regroup(self, members, level):
+        removed = np.unique(self.display_ids(np.flatnonzero(members)))
+        self.shown[members] = level
+        return removed, self._nodes(members), self._edges(members)
+
+    def _nodes(self, members):
+        """Displayed nodes standing for the ``members`` mask, with attributes.
+        """
+        rows = np.flatnonzero(members)
+        ids = self.display_ids(rows)
+        ids, first = np.unique(ids, return_index=True)
+        rows = rows[np.sort(first)]
+        ids = self.display_ids(rows)
+        shown = self.shown[rows]
+        real = shown < 0
+        n = len(rows)
+        attrs = {}
+        for name, column in self.store.gather_node_attrs(rows[real]).items():
+            attrs[name] = _empty_like(column, n)
+            attrs[name][real] = column
+        count = np.ones(n, dtype=np.int64)
+        label = attrs.get('label', np.full(n, '', dtype=object)).astype(object)
+        for level in np.unique(shown[~real]):
+            sel = shown == level
+            groups = self.hierarchy.labels[level][rows[sel]]
+            count[sel] = self._sizes[level][groups]
+            label[sel] = ['%s (%d)' % (name, c) for name, c in
+                          zip(self.hierarchy.names[level][groups], count[sel])]
+        attrs['count'] = count
+        attrs['level'] = shown
+        attrs['label'] = label
+        if 'size' in attrs or (~real).any():
+            size = attrs.get('size', np.full(n, np.nan))
+            attrs['size'] = np.where(real, size, 2.0 + np.sqrt(count))
+        return ids, attrs
+
+    def _edges(self, members):
+        """Displayed edges incident to the ``members`` mask.
+
+        Returns batches of ``(sources, targets, attrs)`` by node ID: edges
+        between individually shown nodes, then aggregated ones.
+        """
+        store = self.store
+        incident = np.flatnonzero(members[store.source] | members[store.target])
+        src_rows, tgt_rows = store.source[incident], store.target[incident]
+        real = (self.shown[src_rows] < 0) & (self.shown[tgt_rows] < 0)
+        batches = []
+        if real.any():
+            edges = incident[real]
+            attrs = store.gather_edge_attrs(edges)
+            attrs['count'] = np.ones(len(edges), dtype=np.int64)
+            batches.append((store.node_ids[src_rows[real]], store.node_ids[tgt_rows[real]], attrs))
+        sources = self.display_ids(src_rows[~real])
+        targets = self.display_ids(tgt_rows[~real])
+        # edges inside a group are not drawn
+        outer = sources != targets
+        if outer.any():
+            codes, uniques = _codes(np.concatenate([sources[outer], targets[outer]]))
+            m = outer.sum()
+            pairs, first, count = np.unique(codes[:m] * len(uniques) + codes[m:],
+                                            return_index=True, return_counts=True)
+            batches.append((uniques[codes[:m][first]], uniques[codes[m:][first]],
+                            {'count': count}))
+        return batches
@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Persistent cache of converted graphs and layouts.
+
+Entries live in a cache directory, one sub-directory per content hash, with
+every array saved as a ``.npy`` file next to a small ``index.json``.
+Arrays are loaded memory-mapped (copy-on-write), so reopening a cached
+circuit reads only the pages that are used. The directory is bounded in
+size: entries are evicted least recently used first, with the
+modification time of their ``index.json`` as the access time.
+
+The process-wide cache is in ``$IPYNEUGRAPH_CACHE_DIR``, or
+``~/.cache/ipyneugraph``; set the variable to an empty string, or call
+``set_cache(None)``, to disable it. Converted graphs are only cached under
+a key the caller supplies, e.g. :func:`path_key` of the file a graph was
+read from, combined with a digest of the graph's node IDs and edges:
+hashing every attribute would cost more than converting the graph.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from .convert import networkx_to_store
+from .store import GraphStore
+
+DEFAULT_MAX_BYTES = 4 << 30
+
+_INDEX = 'index.json'
+_FORMAT = 1
+
+
+def _digest(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def path_key(path):
+    """Key of a source file: its absolute path, size and modification time.
+
+    Cheap to compute, unlike a hash of the graph, and changes whenever the
+    file is rewritten.
+    """
+    path = os.path.abspath(os.path.expanduser(str(path)))
+    st = os.stat(path)
+    return _digest('path', path, st.st_size, st.st_mtime_ns)
+
+
+def _flatten(payload, prefix=''):
+    # attribute names may contain '/', so path components are quoted
+    arrays = {}
+    for name, value in payload.items():
+        name = quote(str(name), safe='')
+        path = prefix + '/' + name if prefix else name
+        if isinstance(value, dict):
+            arrays.update(_flatten(value, path))
+        elif isinstance(value, tuple):
+            rows, columns = value
+            arrays[path + '/rows'] = rows
+            arrays.update(_flatten(columns, path + '/columns'))
+        else:
+            arrays[path] = value
+    return arrays
+
+
+def _unflatten(arrays):
+    payload = {}
+    for path, value in arrays.items():
+        parts = [unquote(part) for part in path.split('/')]
+        node = payload
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return payload
+
+
+def _tables(tables):
+    return {cls: (t['rows'], t.get('columns', {})) for cls, t in (tables or {}).items()}
+
+
+class GraphCache(object):
+    """Content-addressed, size-bounded directory of arrays.
+
+    Parameters
+    ----------
+    path : str
+        Cache directory; created if missing.
+    max_bytes : int, optional
+        Size above which least recently used entries are evicted.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def _entry(self, key):
+        return os.path.join(self.path, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._entry(key), _INDEX))
+
+    def get_arrays(self, key):
+        """Arrays of entry ``key`` as memory maps, or ``None`` if missing."""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, _INDEX)) as f:
+                index = json.load(f)
+            arrays = {}
+            for name, meta in index['arrays'].items():
+                ar = np.load(os.path.join(entry, meta['file']), mmap_mode='c',
+                             allow_pickle=False)
+                if meta.get('strings'):
+                    ar = ar.astype(object)
+                arrays[name] = ar
+            os.utime(os.path.join(entry, _INDEX))
+        except (OSError, ValueError, KeyError):
+            return None
+        return arrays
+
+    def put_arrays(self, key, arrays):
+        """Store ``{name: array}`` under ``key``, then evict old entries.
+
+        Object arrays are stored as fixed-width strings.
+        """
+        entry = self._entry(key)
+        if key in self:
+            os.utime(os.path.join(entry, _INDEX))
+            return
+        tmp = os.path.join(self.path, '.tmp-' + uuid.uuid4().hex)
+        os.makedirs(tmp)
+        try:
+            index = {}
+            for i, (name, ar) in enumerate(arrays.items()):
+                ar = np.asarray(ar)
+                meta = {'file': '%d.npy' % i}
+                if ar.dtype.kind == 'O':
+                    ar = ar.astype(str)
+                    meta['strings'] = True
+                np.save(os.path.join(tmp, meta['file']), ar, allow_pickle=False)
+                index[name] = meta
+            with open(os.path.join(tmp, _INDEX), 'w') as f:
+                json.dump({'format': _FORMAT, 'arrays': index}, f)
+            os.rename(tmp, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if key not in self:
+                raise
+        self.evict()
+
+    def get_store(self, key):
+        """Cached :class:`~ipyneugraph.store.GraphStore`, or ``None``."""
+        arrays = self.get_arrays(key)
+        if arrays is None:
+            return None
+        payload = _unflatten(arrays)
+        nodes, edges = payload['nodes'], payload['edges']
+        nodes['tables'] = _tables(nodes.get('tables'))
+        edges['tables'] = _tables(edges.get('tables'))
+        return GraphStore.from_payload(payload, copy=False)
+
+    def put_store(self, key, store):
+        self.put_arrays(key, _flatten(store.to_payload()))
+
+    def get_layout(self, key):
+        """Cached ``(n_nodes, 2)`` positions, or ``None``."""
+        arrays = self.get_arrays(key)
+        return None if arrays is None else arrays['positions']
+
+    def put_layout(self, key, positions):
+        self.put_arrays(key, {'positions': np.asarray(positions, dtype=np.float32)})
+
+    def entries(self):
+        """``(key, bytes, last access)`` of every entry."""
+        result = []
+        for key in os.listdir(self.path):
+            entry = self._entry(key)
+            if key.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(entry))
+                atime = os.stat(os.path.join(entry, _INDEX)).st_mtime
+            except OSError:
+                continue
+            result.append((key, size, atime))
+        return result
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Remove least recently used entries until the cache fits."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        self.evict(0)
+
+
+def structure_key(G):
+    """Digest of the node IDs and edge endpoints of a NetworkX graph.
+
+    The same digest as :meth:`GraphStore.fingerprint
+    <ipyneugraph.store.GraphStore.fingerprint>` of its conversion, and much
+    cheaper than hashing every attribute dictionary.
+    """
+    index = {n: i for i, n in enumerate(G)}
+    if G.is_directed():
+        # edges in G.edges() order, read off the adjacency in bulk
+        targets, degrees, counts = [], [], []
+        for nbrs in G.adj.values():
+            targets.extend(map(index.__getitem__, nbrs))
+            degrees.append(len(nbrs))
+            if G.is_multigraph():
+                counts.extend(map(len, nbrs.values()))
+        counts = counts if G.is_multigraph() else 1
+        source = np.repeat(np.repeat(np.arange(len(index), dtype='<u4'), degrees), counts)
+        target = np.repeat(np.array(targets, dtype='<u4'), counts)
+    else:
+        edges = list(G.edges())
+        source = np.fromiter((index[u] for u, _ in edges), dtype='<u4', count=len(edges))
+        target = np.fromiter((index[v] for _, v in edges), dtype='<u4', count=len(edges))
+    h = hashlib.sha1()
+    h.update('\0'.join(str(n) for n in index).encode('utf-8'))
+    h.update(source.tobytes())
+    h.update(target.tobytes())
+    return h.hexdigest()
+
+
+def store_key(content_key, class_attr='class', structure=None):
+    """Disk key of the store converted from a source with ``content_key``
+    and, if given, the :func:`structure_key` ``structure``.
+    """
+    return _digest('store', content_key, class_attr, structure, _FORMAT)
+
+
+def positions_key(fingerprint, params=None):
+    """Disk key of a layout of the graph with ``fingerprint``; ``params``
+    of ``None`` names the latest layout of any kind.
+    """
+    return _digest('layout', fingerprint, sorted((params or {}).items()), _FORMAT)
+
+
+_cache = False
+
+
+def get_cache():
+    """The process-wide :class:`GraphCache`, or ``None`` if disabled."""
+    global _cache
+    if _cache is False:
+        path = os.environ.get('IPYNEUGRAPH_CACHE_DIR')
+        if path is None:
+            base = os.environ.get('XDG_CACHE_HOME') or os.path.join('~', '.cache')
+            path = os.path.join(base, 'ipyneugraph')
+        try:
+            _cache = GraphCache(path) if path else None
+        except OSError:
+            _cache = None
+    return _cache
+
+
+def set_cache(cache):
+    """Replace the process-wide cache: a :class:`GraphCache`, a directory or
+    ``None`` to disable caching.
+    """
+    global _cache
+    _cache = GraphCache(cache) if isinstance(cache, str) else cache
+
+
+def remember_positions(store, positions, params=None):
+    """Save positions of ``store`` as its latest layout and, if given, as
+    the layout computed with ``params``.
+    """
+    cache = get_cache()
+    if cache is None:
+        return
+    fingerprint = store.fingerprint()
+    cache.put_layout(positions_key(fingerprint), positions)
+    if params is not None:
+        cache.put_layout(positions_key(fingerprint, params), positions)
+
+
+def cached_positions(store, params=None):
+    """Positions of ``store`` saved by :func:`remember_positions`, or
+    ``None``.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    positions = cache.get_layout(positions_key(store.fingerprint(), params))
+    if positions is None or positions.shape != (store.n_nodes, 2):
+        return None
+    return positions
+
+
+def load_networkx(G, class_attr='class', key=None):
+    """:func:`~ipyneugraph.convert.networkx_to_store` through the cache.
+
+    ``key`` names the content of ``G``, e.g. :func:`path_key` of the file
+    it was read from; without one the graph is converted as usual. Entries
+    are also addressed by the graph's :func:`structure_key`, so graphs
+    with different nodes or edges never share one, whatever their ``key``.
+    The store also gets the latest cached layout of the graph as ``x``/``y``
+    node attributes, unless it has positions of its own.
+    """
+    cache = get_cache()
+    if cache is None or key is None:
+        return networkx_to_store(G, class_attr)
+    key = store_key(key, class_attr, structure_key(G))
+    store = cache.get_store(key)
+    if store is None:
+        store = networkx_to_store(G, class_attr)
+        cache.put_store(key, store)
+    if 'x' not in store.node_attrs and 'y' not in store.node_attrs:
+        positions = cached_positions(store)
+        if positions is not None:
+            store.node_attrs['x'] = np.array(positions[:, 0])
+            store.node_attrs['y'] = np.array(positions[:, 1])
+    return store
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Optional compression of the binary buffers sent to the frontend.
+
+A serialized array (see :mod:`ipyneugraph.serializers`) may carry a
+``codec`` list of the steps applied to its buffer, in order; ``dtype`` and
+``shape`` always describe the decoded array::
+
+    {'dtype': 'uint32', 'shape': [n], 'buffer': ...,
+     'codec': [{'name': 'delta', 'dtype': 'uint8', 'first': 0},
+               {'name': 'zlib', 'nbytes': n}]}
+
+The steps are
+
+``delta``
+    Non-decreasing integer arrays (edge keys, sorted sources, row
+    indices) are sent as differences in the narrowest unsigned dtype.
+``quantize``
+    Float arrays are sent as 16-bit fixed point over their range, with
+    ``65535`` for NaN. Lossy, so only applied when enabled.
+``zlib``
+    Deflate at the fastest level. Only applied to large buffers when the
+    measured link throughput makes it worth the compression time.
+
+The frontend announces the codecs it can decode when it connects; until
+then, and for codecs it did not list, buffers are sent as-is.
+"""
+
+import time
+import zlib
+
+import numpy as np
+
+CODECS = ('delta', 'quantize', 'zlib')
+
+_QUANTIZE_LEVELS = 65534
+_QUANTIZE_NAN = 65535
+
+# smoothing of the throughput estimates
+_ALPHA = 0.3
+
+
+def _narrow_unsigned(ar):
+    top = ar.max() if ar.size else 0
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if top <= np.iinfo(dtype).max:
+            return ar.astype(dtype)
+    return None
+
+
+def delta_encode(ar):
+    """Differences of a non-decreasing integer array, or ``None`` if
+    ``ar`` is not one or would not shrink.
+    """
+    if ar.dtype.kind not in 'iu' or ar.ndim != 1 or len(ar) < 2:
+        return None
+    d = np.diff(ar.astype(np.int64), prepend=ar[0])
+    if (d < 0).any():
+        return None
+    d = _narrow_unsigned(d)
+    if d is None or d.itemsize >= ar.itemsize:
+        return None
+    return d, {'name': 'delta', 'dtype': d.dtype.name, 'first': int(ar[0])}
+
+
+def quantize(ar):
+    """16-bit fixed-point version of a float array."""
+    finite = np.isfinite(ar)
+    lo = float(ar[finite].min()) if finite.any() else 0.0
+    hi = float(ar[finite].max()) if finite.any() else 0.0
+    span = hi - lo or 1.0
+    q = np.full(ar.shape, _QUANTIZE_NAN, dtype=np.uint16)
+    q[finite] = np.rint((ar[finite] - lo) / span * _QUANTIZE_LEVELS)
+    return q, {'name': 'quantize', 'dtype': 'uint16', 'range': [lo, hi]}
+
+
+def decode(value):
+    """Undo the ``codec`` steps of a serialized array.
+
+    Returns a copy of ``value`` with the decoded buffer and no ``codec``.
+    """
+    value = dict(value)
+    data = bytes(value['buffer'])
+    steps = value.pop('codec', [])
+    for step in reversed(steps):
+        name = step['name']
+        if name == 'zlib':
+            data = zlib.decompress(data)
+        elif name == 'delta':
+            d = np.frombuffer(data, dtype=np.dtype(step['dtype']).newbyteorder('<'))
+            ar = step['first'] + np.cumsum(d.astype(np.int64))
+            data = ar.astype(np.dtype(value['dtype']).newbyteorder('<')).tobytes()
+        elif name == 'quantize':
+            q = np.frombuffer(data, dtype='<u2')
+            lo, hi = step['range']
+            ar = (lo + q.astype(np.float64) * ((hi - lo) / _QUANTIZE_LEVELS)).astype(np.float32)
+            ar[q == _QUANTIZE_NAN] = np.nan
+            data = ar.astype(np.dtype(value['dtype']).newbyteorder('<')).tobytes()
+        else:
+            raise ValueError('unknown codec %r' % name)
+    value['buffer'] = memoryview(data)
+    return value
+
+
+def _is_array(value):
+    return isinstance(value, dict) and isinstance(value.get('buffer'), memoryview) \
+        and 'dtype' in value and 'codec' not in value
+
+
+class CompressionPolicy(object):
+    """Decides which codecs to apply to outgoing buffers.
+
+    Parameters
+    ----------
+    mode : {'auto', 'always', 'never'}, optional
+        ``'auto'`` deflates buffers of at least ``min_bytes`` when the
+        estimated transfer time saved exceeds the compression time.
+    min_bytes : int, optional
+        Buffers smaller than this are never deflated in ``'auto'`` mode.
+    quantize : bool, optional
+        Send float arrays as 16-bit fixed point.
+    """
+
+    def __init__(self, mode='auto', min_bytes=1 << 16, quantize=False, clock=time.perf_counter):
+        self.mode = mode
+        self.min_bytes = min_bytes
+        self.quantize = quantize
+        self.supported = frozenset()
+        self._clock = clock
+        #: Estimated link throughput in bytes per second, ``None`` until
+        #: measured.
+        self.bandwidth = None
+        #: Estimated deflate throughput (bytes per second) and output ratio.
+        self.deflate_rate = 100e6
+        self.deflate_ratio = 0.5
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def accept(self, codecs):
+        """Record the codecs the frontend can decode."""
+        self.supported = frozenset(codecs) & frozenset(CODECS)
+
+    def observe_transfer(self, nbytes, seconds):
+        """Update the link throughput from a round trip of ``nbytes``."""
+        if seconds <= 0:
+            return
+        rate = nbytes / seconds
+        self.bandwidth = rate if self.bandwidth is None \
+            else (1 - _ALPHA) * self.bandwidth + _ALPHA * rate
+
+    def should_deflate(self, nbytes):
+        if 'zlib' not in self.supported or self.mode == 'never':
+            return False
+        if self.mode == 'always':
+            return True
+        if nbytes < self.min_bytes:
+            return False
+        if self.bandwidth is None:
+            return True
+        saved = nbytes * (1 - self.deflate_ratio) / self.bandwidth
+        return saved > nbytes / self.deflate_rate
+
+    def encode(self, value):
+        """Encode one serialized array in place."""
+        nbytes = value['buffer'].nbytes
+        self.bytes_in += nbytes
+        if self.mode == 'never':
+            self.bytes_out += nbytes
+            return value
+        steps = []
+        if value['dtype'] != 'str' and 'categories' not in value:
+            ar = np.frombuffer(value['buffer'], dtype=np.dtype(value['dtype']).newbyteorder('<'))
+            encoded = None
+            if 'delta' in self.supported:
+                encoded = delta_encode(ar)
+            if encoded is None and self.quantize and 'quantize' in self.supported \
+                    and ar.dtype.kind == 'f' and ar.ndim == 1:
+                encoded = quantize(ar)
+            if encoded is not None:
+                value['buffer'] = memoryview(encoded[0].view(np.uint8))
+                steps.append(encoded[1])
+        data = value['buffer']
+        if self.should_deflate(data.nbytes):
+            start = self._clock()
+            packed = zlib.compress(data, 1)
+            elapsed = self._clock() - start
+            if elapsed > 0:
+                self.deflate_rate = (1 - _ALPHA) * self.deflate_rate \
+                    + _ALPHA * data.nbytes / elapsed
+            ratio = len(packed) / max(data.nbytes, 1)
+            self.deflate_ratio = (1 - _ALPHA) * self.deflate_ratio + _ALPHA * ratio
+            if ratio < 1:
+                steps.append({'name': 'zlib', 'nbytes': data.nbytes})
+                value['buffer'] = memoryview(packed)
+        if steps:
+            value['codec'] = steps
+        self.bytes_out += value['buffer'].nbytes
+        return value
+
+    def encode_all(self, content):
+        """Encode every serialized array nested in ``content`` in place."""
+        if _is_array(content):
+            self.encode(content)
+        elif isinstance(content, dict):
+            for v in content.values():
+                self.encode_all(v)
+        elif isinstance(content, (list, tuple)):
+            for v in content:
+                self.encode_all(v)
+        return content
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Conversion of NetworkX / NeuroDriver graphs into columnar arrays.
+
+NeuroDriver describes an LPU as a ``MultiDiGraph`` whose nodes carry a model
+``class`` together with that model's parameters and whose edges carry synapse
+attributes. Rather than building one attribute dictionary per element, nodes
+and edges are grouped by ``class`` and each group's attributes are gathered
+into typed arrays in a single pass per column.
+"""
+
+import sys
+
+import numpy as np
+
+from .store import GraphStore
+
+CLASS_ATTR = 'class'
+
+
+def _column(values):
+    """Turn a sequence of scalars into a typed array.
+
+    Numeric and boolean values keep their NumPy dtype; everything else
+    (strings, nested values) becomes an object array of strings. ``None``
+    marks a missing value, stored as ``NaN`` in numeric columns and ``''``
+    in string columns.
+    """
+    missing = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    present = [v for v in values if v is not None] if missing.any() else values
+    try:
+        column = np.asarray(present)
+    except ValueError:
+        column = None
+    if column is not None and column.ndim == 1 and column.dtype.kind in 'biuf' \
+            and len(column):
+        if len(column) == len(values):
+            return column
+        padded = np.full(len(values), np.nan, dtype=np.result_type(column, np.float32))
+        padded[~missing] = column
+        return padded
+    # repeated values such as model names share one string object
+    return np.array(['' if v is None else sys.intern(str(v)) for v in values], dtype=object)
+
+
+def _group_tables(records, class_attr=CLASS_ATTR):
+    """Group attribute dictionaries by their ``class`` value.
+
+    Returns a dictionary mapping each class to ``(rows, {name: column})``.
+    """
+    if len(records) == 0:
+        return {}
+    classes = np.array([str(d.get(class_attr, '')) for d in records], dtype=object)
+    names, inverse = np.unique(classes.astype(str), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(names)))[:-1]
+    tables = {}
+    for name, rows in zip(names.tolist(), np.split(order, bounds)):
+        group = [records[r] for r in rows]
+        keys = set().union(*group)
+        keys.discard(class_attr)
+        tables[name] = (rows, {key: _column([d.get(key) for d in group])
+                               for key in sorted(keys)})
+    return tables
+
+
+def _scatter_tables(tables, length, class_attr=CLASS_ATTR):
+    """Flatten per-class tables into full-length columns.
+
+    Rows of classes that lack an attribute are padded with ``NaN`` for
+    numeric columns and ``''`` for string columns. A ``class`` column is
+    added unless no row has a class.
+    """
+    columns = {}
+    if set(tables) - {''}:
+        classes = np.full(length, '', dtype=object)
+        for name, (rows, _) in tables.items():
+            classes[rows] = name
+        columns[class_attr] = classes
+    for rows, table in tables.values():
+        for key, values in table.items():
+            if key not in columns:
+                if values.dtype == object:
+                    columns[key] = np.full(length, '', dtype=object)
+                elif len(rows) == length:
+                    columns[key] = np.empty(length, dtype=values.dtype)
+                else:
+                    columns[key] = np.full(length, np.nan, dtype=np.result_type(values, np.float32))
+            column = columns[key]
+            dtype = np.result_type(column, values)
+            if dtype != column.dtype:
+                column = columns[key] = column.astype(dtype)
+            column[rows] = values
+    return columns
+
+
+def networkx_to_arrays(G, class_attr=CLASS_ATTR):
+    """Convert a NetworkX graph into node IDs, edge rows and attribute tables.
+
+    Parameters
+    ----------
+    G : networkx.Graph
+        Any NetworkX graph; ``MultiDiGraph`` as produced by NeuroDriver's LPU
+        loaders is the expected input.
+    class_attr : str, optional
+        Attribute used to group nodes and edges into model classes.
+
+    Returns
+    -------
+    node_ids : ndarray of object
+    source, target : ndarray of uint32
+        Edge endpoints as rows into ``node_ids``.
+    node_tables, edge_tables : dict
+        Map each class to ``(rows, {attribute: column})``.
+    """
+    nodes = list(G.nodes(data=True))
+    node_ids = np.array([str(n) for n, _ in nodes], dtype=object)
+    index = {n: i for i, (n, _) in enumerate(nodes)}
+    node_tables = _group_tables([d for _, d in nodes], class_attr)
+
+    edges = list(G.edges(data=True))
+    n_edges = len(edges)
+    source = np.fromiter((index[u] for u, _, _ in edges), dtype=np.uint32, count=n_edges)
+    target = np.fromiter((index[v] for _, v, _ in edges), dtype=np.uint32, count=n_edges)
+    edge_tables = _group_tables([d for _, _, d in edges], class_attr)
+    return node_ids, source, target, node_tables, edge_tables
+
+
+def _split_tables(tables, length, class_attr=CLASS_ATTR):
+    """Split per-class tables into shared full-length columns, for the
+    attributes every class has, and tables of the class-specific ones.
+    """
+    shared = set.intersection(*[set(t) for _, t in tables.values()]) if tables else set()
+    columns = _scatter_tables({name: (rows, {k: v for k, v in table.items() if k in shared})
+                               for name, (rows, table) in tables.items()}, length, class_attr)
+    specific = {}
+    for name, (rows, table) in tables.items():
+        table = {k: v for k, v in table.items() if k not in shared}
+        if table:
+            specific[name] = (rows, table)
+    return columns, specific
+
+
+def networkx_to_store(G, class_attr=CLASS_ATTR):
+    """Convert a NetworkX graph into a :class:`~ipyneugraph.store.GraphStore`.
+
+    Attributes every class has become shared columns; the others are kept
+    in per-class tables.
+    """
+    node_ids, source, target, node_tables, edge_tables = networkx_to_arrays(G, class_attr)
+    node_attrs, node_tables = _split_tables(node_tables, len(node_ids), class_attr)
+    edge_attrs, edge_tables = _split_tables(edge_tables, len(source), class_attr)
+    return GraphStore.from_arrays(node_ids, source, target, node_attrs, edge_attrs,
+                                  node_tables, edge_tables)
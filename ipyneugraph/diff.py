@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Incremental graph updates sent through the widget's custom-message channel.
+
+A :class:`GraphDiff` records node and edge additions, removals and attribute
+changes in order. When flushed it becomes a single ``{'method': 'diff'}``
+message whose columns travel as binary buffers, so the size of the message
+is proportional to the change rather than to the graph.
+"""
+
+import numpy as np
+from ipywidgets.widgets.widget import _remove_buffers
+
+from .serializers import array_to_binary, strings_to_binary, _columns_to_binary
+
+
+class GraphDiff(object):
+    """Ordered batch of graph changes.
+    """
+
+    def __init__(self):
+        self.ops = []
+
+    def __bool__(self):
+        return bool(self.ops)
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return len(self.ops)
+
+    def clear(self):
+        self.ops = []
+
+    def add_nodes(self, node_ids, attrs=None):
+        self.ops.append({'op': 'add_nodes', 'id': node_ids, 'attrs': attrs or {}})
+
+    def remove_nodes(self, node_ids):
+        self.ops.append({'op': 'drop_nodes', 'id': node_ids})
+
+    def add_edges(self, keys, sources, targets, attrs=None):
+        self.ops.append({'op': 'add_edges', 'id': keys, 'source': sources,
+                         'target': targets, 'attrs': attrs or {}})
+
+    def remove_edges(self, keys):
+        self.ops.append({'op': 'drop_edges', 'id': keys})
+
+    def set_node_attrs(self, node_ids, attrs):
+        self.ops.append({'op': 'set_node_attrs', 'id': node_ids, 'attrs': attrs})
+
+    def set_edge_attrs(self, keys, attrs):
+        self.ops.append({'op': 'set_edge_attrs', 'id': keys, 'attrs': attrs})
+
+    def to_json(self):
+        """Serialize the recorded operations; arrays become ``memoryview``s.
+        """
+        ops = []
+        for op in self.ops:
+            kind = op['op']
+            out = {'op': kind}
+            if kind.endswith('nodes') or kind == 'set_node_attrs':
+                out['id'] = strings_to_binary(op['id'])
+            else:
+                out['id'] = array_to_binary(np.asarray(op['id'], dtype=np.uint32))
+            if kind == 'add_edges':
+                out['source'] = strings_to_binary(op['source'])
+                out['target'] = strings_to_binary(op['target'])
+            if 'attrs' in op:
+                out['attrs'] = _columns_to_binary(op['attrs'])
+            ops.append(out)
+        return ops
+
+    def to_message(self):
+        """Return the ``(content, buffers)`` pair to pass to ``Widget.send``.
+        """
+        ops, buffer_paths, buffers = _remove_buffers({'ops': self.to_json()})
+        content = {'method': 'diff', 'ops': ops['ops'], 'buffer_paths': buffer_paths}
+        return content, buffers
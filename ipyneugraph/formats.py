@@ -0,0 +1,546 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Streaming GEXF and GraphML readers and writers.
+
+NeuroDriver's LPU loaders read circuits from GEXF or GraphML files, which
+can run to hundreds of megabytes. The readers here parse them with
+``iterparse``, discarding every element once its values are appended to
+compact typed buffers, and build a :class:`~ipyneugraph.store.GraphStore`
+directly, grouping attributes by model ``class`` as
+:func:`~ipyneugraph.convert.networkx_to_store` does. No intermediate
+NetworkX graph or per-element dictionary is built, so peak memory stays
+close to the size of the final columns. The writers stream a store back
+out in blocks of rows. Paths ending in ``.gz`` are (de)compressed.
+"""
+
+import gzip
+import os
+import sys
+from array import array
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from .convert import CLASS_ATTR, _split_tables
+from .store import GraphStore
+
+# rows written at a time
+_BLOCK = 1 << 14
+
+_GRAPHML_NS = 'http://graphml.graphdrawing.org/xmlns'
+_GEXF_NS = 'http://gexf.net/1.3'
+_GEXF_VIZ_NS = 'http://gexf.net/1.3/viz'
+
+# attribute types of both formats, and the dtypes they are read as
+_DTYPES = {
+    'boolean': 'bool', 'int': 'int32', 'integer': 'int32', 'long': 'int64',
+    'float': 'float32', 'double': 'float64',
+}
+
+# array typecodes of the dtypes
+_TYPECODES = {'bool': 'b', 'int32': 'i', 'int64': 'q', 'float32': 'f', 'float64': 'd'}
+
+
+def _parse_bool(text):
+    text = text.strip().lower()
+    if text in ('true', '1'):
+        return True
+    if text in ('false', '0'):
+        return False
+    raise ValueError('invalid boolean %r' % text)
+
+
+_PARSERS = {'bool': _parse_bool, 'int32': int, 'int64': int, 'float32': float,
+            'float64': float, 'str': sys.intern}
+
+
+class _Column(object):
+    """Values of one attribute, with the rows that have them.
+
+    Rows are only kept once a row is skipped, so attributes every element
+    has take no more memory than their values.
+    """
+
+    def __init__(self, dtype, default=None):
+        self.dtype = dtype
+        self.parse = _PARSERS[dtype]
+        self.default = None if default is None else self.parse(default)
+        self.rows = None
+        self.values = [] if dtype == 'str' else array(_TYPECODES[dtype])
+
+    def append(self, row, text):
+        value = self.parse(text)
+        if self.rows is None:
+            if row == len(self.values):
+                self.values.append(value)
+                return
+            self.rows = array('q', range(len(self.values)))
+        self.rows.append(row)
+        self.values.append(value)
+
+    def finish(self, length):
+        """The rows having a value, or None for all, and their values."""
+        if self.dtype == 'str':
+            values = np.array(self.values, dtype=object)
+        else:
+            values = np.frombuffer(self.values, dtype=self.values.typecode).astype(self.dtype)
+        self.values = None
+        rows = None if self.rows is None else np.frombuffer(self.rows, dtype=np.int64)
+        if rows is None and len(values) == length:
+            return None, values
+        if rows is None:
+            rows = np.arange(len(values))
+        if self.default is not None:
+            column = np.full(length, self.default, dtype=values.dtype)
+            column[rows] = values
+            return None, column
+        return rows, values
+
+
+def _padded(values, length):
+    if values.dtype == object:
+        return np.full(length, '', dtype=object)
+    return np.full(length, np.nan, dtype=np.result_type(values.dtype, np.float32))
+
+
+def _class_tables(columns, length, class_attr):
+    """Group sparse columns into ``{class: (rows, {name: column})}``.
+
+    Rows of a class lacking a value are padded with ``NaN`` or ``''``.
+    """
+    classes = np.full(length, '', dtype=object)
+    if class_attr in columns:
+        rows, values = columns.pop(class_attr).finish(length)
+        classes[slice(None) if rows is None else rows] = [sys.intern(str(v)) for v in values]
+    codes = {}
+    inverse = np.fromiter((codes.setdefault(c, len(codes)) for c in classes),
+                          dtype=np.int64, count=length)
+    names = list(codes)
+    order = np.argsort(inverse, kind='stable')
+    groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(names)))[:-1])
+    tables = {name: (rows, {}) for name, rows in zip(names, groups)}
+    for key in sorted(columns):
+        rows, values = columns.pop(key).finish(length)
+        if rows is None:
+            for name, group in zip(names, groups):
+                tables[name][1][key] = values[group]
+            continue
+        found = inverse[rows]
+        for code in np.unique(found):
+            group = groups[code]
+            hit = found == code
+            pos = np.searchsorted(group, rows[hit])
+            present = np.zeros(len(group), dtype=bool)
+            present[pos] = True
+            if present.all():
+                column = np.empty(len(group), dtype=values.dtype)
+            else:
+                column = _padded(values, len(group))
+            column[pos] = values[hit]
+            tables[names[code]][1][key] = column
+    return tables
+
+
+class _Builder(object):
+    """Node IDs, edge endpoints and attribute columns read so far."""
+
+    def __init__(self, class_attr):
+        self.class_attr = class_attr
+        self.node_ids = []
+        self.index = {}
+        self.source = array('q')
+        self.target = array('q')
+        self.node_columns = {}
+        self.edge_columns = {}
+
+    def node(self, node_id):
+        """Row of a node, added if new."""
+        row = self.index.get(node_id)
+        if row is None:
+            row = self.index[node_id] = len(self.node_ids)
+            self.node_ids.append(sys.intern(node_id))
+        return row
+
+    def edge(self, source, target):
+        self.source.append(self.node(source))
+        self.target.append(self.node(target))
+        return len(self.source) - 1
+
+    @staticmethod
+    def column(columns, name, dtype, default=None):
+        if name not in columns:
+            columns[name] = _Column(dtype, default)
+        return columns[name]
+
+    def store(self):
+        n_nodes, n_edges = len(self.node_ids), len(self.source)
+        node_tables = _class_tables(self.node_columns, n_nodes, self.class_attr)
+        edge_tables = _class_tables(self.edge_columns, n_edges, self.class_attr)
+        node_attrs, node_tables = _split_tables(node_tables, n_nodes, self.class_attr)
+        edge_attrs, edge_tables = _split_tables(edge_tables, n_edges, self.class_attr)
+        node_ids = np.empty(n_nodes, dtype=object)
+        node_ids[:] = self.node_ids
+        self.node_ids = self.index = None
+        return GraphStore.from_arrays(
+            node_ids, np.frombuffer(self.source, dtype=np.int64),
+            np.frombuffer(self.target, dtype=np.int64),
+            node_attrs, edge_attrs, node_tables, edge_tables)
+
+
+# local names of namespaced tags
+_LOCAL_NAMES = {}
+
+
+def _local(tag):
+    name = _LOCAL_NAMES.get(tag)
+    if name is None:
+        name = _LOCAL_NAMES[tag] = tag.rsplit('}', 1)[-1]
+    return name
+
+
+def _children(elem, tag):
+    return [child for child in elem if _local(child.tag) == tag]
+
+
+def _open(path, mode):
+    """Open a file name for binary reading (``'r'``) or text writing
+    (``'w'``); None for file objects, which are used as they are.
+    """
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+    gz = os.fspath(path).endswith('.gz')
+    if mode == 'r':
+        return gzip.open(path, 'rb') if gz else open(path, 'rb')
+    return gzip.open(path, 'wt', encoding='utf-8') if gz else open(path, 'w', encoding='utf-8')
+
+
+def _elements(source, tags):
+    """Yield ``(local name, element)`` for the elements named in ``tags``
+    once parsed, and discard each one afterwards so that the document is
+    never held in memory.
+
+    Elements nested in a yielded one are yielded with it rather than alone.
+    """
+    f = _open(source, 'r')
+    try:
+        # open elements enclosing the current one, outside yielded ones
+        parents = []
+        depth = 0
+        for event, elem in iterparse(source if f is None else f, events=('start', 'end')):
+            if event == 'start':
+                if depth:
+                    depth += 1
+                elif _local(elem.tag) in tags:
+                    depth = 1
+                else:
+                    parents.append(elem)
+                continue
+            if not depth:
+                parents.pop()
+                continue
+            depth -= 1
+            if depth:
+                continue
+            yield _local(elem.tag), elem
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def read_graphml(source, class_attr=CLASS_ATTR):
+    """Read a GraphML file into a :class:`~ipyneugraph.store.GraphStore`.
+
+    Parameters
+    ----------
+    source : str, path or file
+        File name or binary file object; names ending in ``.gz`` are
+        decompressed.
+    class_attr : str, optional
+        Attribute used to group nodes and edges into model classes.
+    """
+    builder = _Builder(class_attr)
+    # key ID to column, per domain
+    keys = {'node': {}, 'edge': {}}
+    for tag, elem in _elements(source, ('key', 'node', 'edge')):
+        if tag == 'key':
+            domain = elem.get('for', 'all')
+            default = _children(elem, 'default')
+            key_id = elem.get('id')
+            spec = (elem.get('attr.name', key_id), _DTYPES.get(elem.get('attr.type'), 'str'),
+                    default[0].text or '' if default else None)
+            if domain in ('all', 'node'):
+                keys['node'][key_id] = builder.column(builder.node_columns, *spec)
+            if domain in ('all', 'edge'):
+                keys['edge'][key_id] = builder.column(builder.edge_columns, *spec)
+            continue
+        if tag == 'node':
+            row = builder.node(elem.get('id'))
+        else:
+            row = builder.edge(elem.get('source'), elem.get('target'))
+        columns = keys[tag]
+        for data in elem:
+            column = columns.get(data.get('key'))
+            if column is not None:
+                column.append(row, data.text or '')
+    return builder.store()
+
+
+def read_gexf(source, class_attr=CLASS_ATTR):
+    """Read a GEXF file into a :class:`~ipyneugraph.store.GraphStore`.
+
+    Node positions (``viz:position``) become the ``x``/``y`` attributes
+    and edge weights the ``weight`` attribute; node labels are kept as
+    ``label`` where they differ from the node ID. Dynamic attributes are
+    not supported.
+
+    Parameters
+    ----------
+    source : str, path or file
+        File name or binary file object; names ending in ``.gz`` are
+        decompressed.
+    class_attr : str, optional
+        Attribute used to group nodes and edges into model classes.
+    """
+    builder = _Builder(class_attr)
+    # attribute ID to column, per class
+    attributes = {'node': {}, 'edge': {}}
+    for tag, elem in _elements(source, ('attributes', 'node', 'edge')):
+        if tag == 'attributes':
+            domain = elem.get('class', 'node')
+            columns = builder.node_columns if domain == 'node' else builder.edge_columns
+            for attribute in _children(elem, 'attribute'):
+                default = _children(attribute, 'default')
+                attr_id = attribute.get('id')
+                attributes[domain][attr_id] = builder.column(
+                    columns, attribute.get('title', attr_id),
+                    _DTYPES.get(attribute.get('type'), 'str'),
+                    default[0].text or '' if default else None)
+            continue
+        if tag == 'node':
+            node_id = elem.get('id')
+            row = builder.node(node_id)
+            columns = builder.node_columns
+            label = elem.get('label')
+            if label is not None and label != node_id:
+                builder.column(columns, 'label', 'str').append(row, label)
+        else:
+            row = builder.edge(elem.get('source'), elem.get('target'))
+            columns = builder.edge_columns
+            if elem.get('weight') is not None:
+                builder.column(columns, 'weight', 'float64').append(row, elem.get('weight'))
+        declared = attributes[tag]
+        for child in elem:
+            name = _local(child.tag)
+            if name == 'attvalues':
+                for attvalue in child:
+                    declared[attvalue.get('for')].append(row, attvalue.get('value'))
+            elif name == 'position':
+                for axis in ('x', 'y'):
+                    builder.column(columns, axis, 'float32').append(row, child.get(axis, '0'))
+    return builder.store()
+
+
+def _xml_type(dtype):
+    """GraphML type of a dtype; GEXF uses the same names but ``integer``."""
+    if dtype.kind == 'b':
+        return 'boolean'
+    if dtype.kind in 'iu':
+        return 'int' if np.can_cast(dtype, np.int32) else 'long'
+    if dtype.kind == 'f':
+        return 'float' if dtype.itemsize <= 4 else 'double'
+    return 'string'
+
+
+_FORMATTERS = {
+    'boolean': lambda v: 'true' if v else 'false',
+    'int': lambda v: '%d' % v,
+    'long': lambda v: '%d' % v,
+    'float': lambda v: repr(float(v)),
+    'double': lambda v: repr(float(v)),
+    'string': lambda v: str(v),
+}
+
+
+def _attributes(attrs, tables):
+    """``[(name, type, shared)]`` of the shared columns and table columns."""
+    dtypes = {}
+    for _, columns in tables.values():
+        for name, column in columns.items():
+            dtypes[name] = np.result_type(dtypes.get(name, column.dtype), column.dtype)
+    result = [(name, _xml_type(column.dtype), True) for name, column in attrs.items()]
+    return result + [(name, _xml_type(dtype), False) for name, dtype in dtypes.items()
+                     if name not in attrs]
+
+
+def _missing(value):
+    return value == '' or isinstance(value, float) and value != value
+
+
+def _rows(store, kind, attributes, element):
+    """Yield the text of the nodes or edges of ``store``, a block at a time.
+
+    ``element(row, values)`` renders one element from ``values``, the
+    ``(index, text)`` of its attributes.
+    """
+    n = store.n_nodes if kind == 'node' else store.n_edges
+    gather = store.gather_node_attrs if kind == 'node' else store.gather_edge_attrs
+    formatters = [_FORMATTERS[xml_type] for _, xml_type, _ in attributes]
+    for start in range(0, n, _BLOCK):
+        rows = np.arange(start, min(start + _BLOCK, n))
+        columns = gather(rows)
+        columns = [columns[name].tolist() for name, _, _ in attributes]
+        lines = []
+        for i, row in enumerate(rows.tolist()):
+            values = []
+            for k, (name, _, shared) in enumerate(attributes):
+                value = columns[k][i]
+                if not shared and _missing(value):
+                    # padding of a class attribute, for a row of another class
+                    continue
+                values.append((k, formatters[k](value)))
+            lines.append(element(row, values))
+        yield ''.join(lines)
+
+
+def _writer(target):
+    f = _open(target, 'w')
+    return (f, True) if f is not None else (target, False)
+
+
+def write_graphml(store, target):
+    """Write a :class:`~ipyneugraph.store.GraphStore` as GraphML.
+
+    Parameters
+    ----------
+    store : GraphStore
+    target : str, path or file
+        File name or text file object; names ending in ``.gz`` are
+        compressed.
+    """
+    node_attributes = _attributes(store.node_attrs, store.node_tables)
+    edge_attributes = _attributes(store.edge_attrs, store.edge_tables)
+    node_ids = store.node_ids
+    quoted = [quoteattr(str(n)) for n in node_ids.tolist()]
+    source, target_rows = store.source.tolist(), store.target.tolist()
+
+    def node(row, values):
+        data = ''.join('<data key="n%d">%s</data>' % (k, escape(text)) for k, text in values)
+        return '<node id=%s>%s</node>\n' % (quoted[row], data)
+
+    def edge(row, values):
+        data = ''.join('<data key="e%d">%s</data>' % (k, escape(text)) for k, text in values)
+        return '<edge source=%s target=%s>%s</edge>\n' % (quoted[source[row]],
+                                                        quoted[target_rows[row]], data)
+
+    f, close = _writer(target)
+    try:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<graphml xmlns="%s">\n' % _GRAPHML_NS)
+        for domain, attributes in (('node', node_attributes), ('edge', edge_attributes)):
+            for k, (name, xml_type, _) in enumerate(attributes):
+                f.write('<key id="%s%d" for="%s" attr.name=%s attr.type="%s"/>\n'
+                        % (domain[0], k, domain, quoteattr(name), xml_type))
+        f.write('<graph edgedefault="directed">\n')
+        for block in _rows(store, 'node', node_attributes, node):
+            f.write(block)
+        for block in _rows(store, 'edge', edge_attributes, edge):
+            f.write(block)
+        f.write('</graph>\n</graphml>\n')
+    finally:
+        if close:
+            f.close()
+
+
+def write_gexf(store, target):
+    """Write a :class:`~ipyneugraph.store.GraphStore` as GEXF 1.3.
+
+    The ``x``/``y`` node attributes are written as ``viz:position``.
+
+    Parameters
+    ----------
+    store : GraphStore
+    target : str, path or file
+        File name or text file object; names ending in ``.gz`` are
+        compressed.
+    """
+    node_attributes = _attributes(store.node_attrs, store.node_tables)
+    edge_attributes = _attributes(store.edge_attrs, store.edge_tables)
+    positions = 'x' in store.node_attrs and 'y' in store.node_attrs
+    if positions:
+        node_attributes = [a for a in node_attributes if a[0] not in ('x', 'y')]
+        xs, ys = store.node_attrs['x'].tolist(), store.node_attrs['y'].tolist()
+    quoted = [quoteattr(str(n)) for n in store.node_ids.tolist()]
+    source, target_rows = store.source.tolist(), store.target.tolist()
+    keys = store.edge_keys.tolist()
+
+    def attvalues(values):
+        if not values:
+            return ''
+        return '<attvalues>%s</attvalues>' % ''.join(
+            '<attvalue for="%d" value=%s/>' % (k, quoteattr(text)) for k, text in values)
+
+    def node(row, values):
+        viz = ''
+        if positions:
+            viz = '<viz:position x="%r" y="%r" z="0.0"/>' % (float(xs[row]), float(ys[row]))
+        return '<node id=%s label=%s>%s%s</node>\n' % (quoted[row], quoted[row],
+                                                       attvalues(values), viz)
+
+    def edge(row, values):
+        return '<edge id="%d" source=%s target=%s>%s</edge>\n' % (
+            keys[row], quoted[source[row]], quoted[target_rows[row]], attvalues(values))
+
+    f, close = _writer(target)
+    try:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gexf xmlns="%s" xmlns:viz="%s" version="1.3">\n'
+                '<graph defaultedgetype="directed" mode="static">\n' % (_GEXF_NS, _GEXF_VIZ_NS))
+        for domain, attributes in (('node', node_attributes), ('edge', edge_attributes)):
+            f.write('<attributes class="%s">\n' % domain)
+            for k, (name, xml_type, _) in enumerate(attributes):
+                f.write('<attribute id="%d" title=%s type="%s"/>\n'
+                        % (k, quoteattr(name), 'integer' if xml_type == 'int' else xml_type))
+            f.write('</attributes>\n')
+        f.write('<nodes>\n')
+        for block in _rows(store, 'node', node_attributes, node):
+            f.write(block)
+        f.write('</nodes>\n<edges>\n')
+        for block in _rows(store, 'edge', edge_attributes, edge):
+            f.write(block)
+        f.write('</edges>\n</graph>\n</gexf>\n')
+    finally:
+        if close:
+            f.close()
+
+
+_READERS = {'.gexf': read_gexf, '.graphml': read_graphml}
+_WRITERS = {'.gexf': write_gexf, '.graphml': write_graphml}
+
+
+def _format(path, formats):
+    name = os.fspath(path)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in formats:
+        raise ValueError('unknown graph file format %r; expected one of %s'
+                         % (ext, ', '.join(sorted(formats))))
+    return formats[ext]
+
+
+def read_graph(path, class_attr=CLASS_ATTR):
+    """Read a ``.gexf`` or ``.graphml`` file, optionally gzipped."""
+    return _format(path, _READERS)(path, class_attr)
+
+
+def write_graph(store, path):
+    """Write a store as ``.gexf`` or ``.graphml``, optionally gzipped."""
+    _format(path, _WRITERS)(store, path)
@@ -5,16 +5,62 @@
 # Distributed under the terms of the Modified BSD License.
 
 """
-TODO: Add module docstring
+Jupyter widget for NeuroDriver-compatible computational graphs.
 """
 
-from ipywidgets import DOMWidget
-from traitlets import Unicode
+import asyncio
+from contextlib import contextmanager
+
+import numpy as np
+from ipywidgets import DOMWidget, widget_serialization
+from ipywidgets.widgets.widget import _remove_buffers
+from traitlets import Unicode, Instance, Float, Int, Bool, Dict, Enum, observe, validate
 from ._frontend import module_name, module_version
+from .aggregate import Aggregation, Hierarchy
+from .cache import cached_positions, load_networkx, remember_positions
+from .codec import CompressionPolicy
+from .diff import GraphDiff
+from .formats import read_graph, write_graph
+from .layout import forceatlas2, layout_cache, layout_key, layout_params
+from .playback import Playback
+from .query import node_mask, paths_between, select, shortest_paths
+from .recorder import Recorder
+from .serializers import array_to_binary, graph_serialization
+from .store import GraphStore, _as_column, _set_columns
+from .style import validate_style
+from .viewport import ViewportLoader
+from .sync import ChunkedTransfer, FrameThrottle, frame_to_json
+from .telemetry import Telemetry
+
+
+# frames smaller than this do not update the link throughput estimate
+_MIN_PROBE_BYTES = 1 << 14
+
+# Python names of the frontend layout settings (see src/layout.worker.ts)
+_LAYOUT_SETTINGS = {
+    'scaling': 'scaling',
+    'gravity': 'gravity',
+    'theta': 'theta',
+    'jitter_tolerance': 'jitterTolerance',
+    'iterations_per_update': 'iterationsPerUpdate',
+    'max_iterations': 'maxIterations',
+    'convergence_threshold': 'convergenceThreshold',
+}
+
+
+def _columns(attrs, length):
+    """Attribute columns as the store holds them, scalars broadcast."""
+    return {name: _as_column(values, length, name) for name, values in (attrs or {}).items()}
 
 
 class NeuGraphWidget(DOMWidget):
-    """TODO: Add docstring here
+    """Widget displaying a NeuroDriver computational graph.
+
+    The graph is held in a :class:`~ipyneugraph.store.GraphStore` and synced
+    to the frontend as a columnar payload (see
+    :func:`~ipyneugraph.serializers.graph_to_json`), with node IDs, edge
+    index arrays and attributes sent as binary buffers. After the initial
+    sync, the mutation methods send only incremental diffs.
     """
     _model_name = Unicode('NeuGraphModel').tag(sync=True)
     _model_module = Unicode(module_name).tag(sync=True)
@@ -23,4 +69,1123 @@ class NeuGraphWidget(DOMWidget):
     _view_module = Unicode(module_name).tag(sync=True)
     _view_module_version = Unicode(module_version).tag(sync=True)
 
-    value = Unicode('Hello World').tag(sync=True)
+    graph = Instance(GraphStore, args=()).tag(sync=True, **graph_serialization)
+
+    height = Unicode('500px', help="CSS height of the rendering area.").tag(sync=True)
+    lod_edge_ratio = Float(
+        2.0, help="Camera zoom-out ratio above which edges are hidden.").tag(sync=True)
+    lod_min_edges = Int(
+        20000, help="Edge count from which level-of-detail culling applies.").tag(sync=True)
+    lod_label_size = Float(
+        8.0, help="Rendered node size under which labels are hidden.").tag(sync=True)
+    auto_layout = Bool(
+        True, help="Lay out graphs without x/y positions in a frontend worker.").tag(sync=True)
+    layout_running = Bool(
+        False, read_only=True, help="Whether the frontend layout is running.").tag(sync=True)
+
+    style = Dict(
+        help="Attribute-driven style; see ipyneugraph.style for the spec.").tag(sync=True)
+    lazy_loading = Bool(
+        False, read_only=True, help="Whether nodes are loaded as the view pans and zooms."
+    ).tag(sync=True)
+
+    loading = Bool(
+        False, read_only=True, help="Whether load_async is sending a graph.").tag(sync=True)
+    load_progress = Float(
+        0.0, read_only=True, help="Fraction of the graph sent by load_async.").tag(sync=True)
+
+    snapshot_max_bytes = Int(
+        8 << 20, help="Size cap of the graph snapshot saved with the notebook's widget state."
+    ).tag(sync=True)
+
+    recording = Dict(
+        read_only=True, help="Neurons and buffer sizes of the spike raster and trace panel."
+    ).tag(sync=True)
+    panel_window = Float(
+        1.0, help="Seconds of history shown in the spike raster and trace panel.").tag(sync=True)
+
+    path_query = Enum(
+        ('off', 'shortest', 'all'), 'off',
+        help="Paths highlighted between two clicked nodes: none, the shortest ones, or all "
+             "paths of up to max_path_length edges.").tag(sync=True)
+    max_path_length = Int(3, help="Maximum length of the paths highlighted in 'all' mode.")
+    path_weight = Unicode(
+        None, allow_none=True, help="Edge attribute measuring shortest paths; hops if None.")
+
+    editable = Bool(
+        False, help="Let the user move, add and delete nodes and edges in the view; "
+                    "turned off by collapse() and lazy_load()."
+    ).tag(sync=True)
+
+    max_fps = Float(30.0, help="Maximum rate of state frames sent to the frontend.")
+    max_frames_in_flight = Int(
+        2, help="Unacknowledged state frames after which new frames are held back.")
+
+    chunk_bytes = Int(
+        4 << 20, help="Graphs with more binary data than this are sent in chunks of this size.")
+    max_chunks_in_flight = Int(
+        4, help="Unacknowledged graph chunks after which sending waits for the frontend.")
+
+    profiling = Bool(False, help="Record timings and sizes of every message in telemetry.")
+
+    compression = Enum(
+        ('auto', 'always', 'never'), 'auto',
+        help="Deflate large buffers: when it saves transfer time, always or never.")
+    compression_min_bytes = Int(
+        1 << 16, help="Buffers smaller than this are not deflated in 'auto' mode.")
+    quantize = Bool(
+        False, help="Send float columns such as positions as 16-bit fixed point.")
+
+    def __init__(self, **kwargs):
+        self._full = None
+        self._aggregation = None
+        self._viewport = None
+        self._diff = GraphDiff()
+        self._diff_holds = 0
+        self._frames = FrameThrottle(self._send_frame, lambda: self.graph.node_attrs)
+        self._frame_bytes = {}
+        self._codec = CompressionPolicy()
+        self._load_task = None
+        self._recorder = None
+        self._picked = []
+        self._edit_keys = {}
+        # sent with the graph, to tell edits of an older graph
+        self._edit_epoch = 0
+        self._edit_callbacks = []
+        self._edits_answered = None
+        self._chunks = ChunkedTransfer(self.send)
+        # timings and sizes of the messages sent while profiling
+        self.telemetry = Telemetry()
+        # set once the comm is open, so that a large graph is sent in chunks
+        # rather than in the comm's opening message
+        graph = kwargs.pop('graph', None)
+        super(NeuGraphWidget, self).__init__(**kwargs)
+        self._throttle_changed(None)
+        self._compression_changed(None)
+        self._chunks_changed(None)
+        if graph is not None:
+            self.graph = graph
+        self.on_msg(self._handle_frontend_msg)
+
+    @observe('graph')
+    def _graph_replaced(self, change):
+        # pending changes refer to the previous graph
+        self._diff.clear()
+        self._frames.discard()
+        self._full = None
+        self._aggregation = None
+        self._viewport = None
+        self._picked = []
+        self._edit_keys = {}
+        self.set_trait('lazy_loading', False)
+
+    @validate('graph')
+    def _new_graph(self, proposal):
+        # validated before the graph is sent, which carries the epoch
+        if proposal['value'] is not self.graph:
+            self._edit_epoch += 1
+        return proposal['value']
+
+    @validate('style')
+    def _valid_style(self, proposal):
+        return validate_style(proposal['value'])
+
+    @observe('max_fps', 'max_frames_in_flight')
+    def _throttle_changed(self, change):
+        self._frames.interval = 1.0 / self.max_fps
+        self._frames.max_in_flight = self.max_frames_in_flight
+
+    @observe('compression', 'compression_min_bytes', 'quantize')
+    def _compression_changed(self, change):
+        self._codec.mode = self.compression
+        self._codec.min_bytes = self.compression_min_bytes
+        self._codec.quantize = self.quantize
+
+    @observe('chunk_bytes', 'max_chunks_in_flight')
+    def _chunks_changed(self, change):
+        self._chunks.chunk_bytes = self.chunk_bytes
+        self._chunks.max_in_flight = self.max_chunks_in_flight
+
+    def send_state(self, key=None):
+        """Send the widget state, or a piece of it, to the frontend.
+
+        A graph larger than ``chunk_bytes`` is sent with a
+        :class:`~ipyneugraph.sync.ChunkedTransfer` instead of in one update.
+        """
+        keys = self.keys if key is None else [key] if isinstance(key, str) else list(key)
+        self.telemetry.start()
+        if 'graph' not in keys:
+            return super(NeuGraphWidget, self).send_state(key)
+        others = [k for k in keys if k != 'graph']
+        if others:
+            super(NeuGraphWidget, self).send_state(others)
+            self.telemetry.start()
+        state, buffer_paths, buffers = _remove_buffers(self.get_state('graph'))
+        # while a transfer runs, a plain update could be overtaken by its
+        # remaining chunks, so it supersedes the transfer instead
+        if self._chunks.active or sum(memoryview(b).nbytes for b in buffers) > self.chunk_bytes:
+            self._chunks.start({'state': state, 'buffer_paths': buffer_paths}, buffers)
+        else:
+            self._send({'method': 'update', 'state': state, 'buffer_paths': buffer_paths},
+                       buffers=buffers)
+
+    def _send(self, msg, buffers=None):
+        if not self.profiling:
+            return super(NeuGraphWidget, self)._send(msg, buffers)
+        custom = msg['method'] == 'custom'
+        method = msg['content'].get('method', 'custom') if custom else msg['method']
+        # chunks are covered by the record of their transfer's header
+        record_id = self.telemetry.record(method, buffers or [],
+                                          awaits_report=method != 'chunk')
+        if custom and method not in ('chunk', 'chunked'):
+            msg['content']['profile_id'] = record_id
+        super(NeuGraphWidget, self)._send(msg, buffers)
+        if not custom or method == 'chunked':
+            # reported once the frontend has applied the update
+            super(NeuGraphWidget, self)._send(
+                {'method': 'custom', 'content': {'method': 'profile', 'profile_id': record_id}})
+
+    def _handle_frontend_msg(self, _, content, buffers):
+        event = content.get('event')
+        if event == 'layout_done':
+            self._layout_done(content, buffers)
+        elif event == 'frame_ack':
+            self._frame_acked(content['seq'])
+        elif event == 'chunk_ack':
+            self._chunks.ack(content['transfer'], content['seq'])
+        elif event == 'pick':
+            self._pick(content['node'])
+        elif event == 'edits':
+            self._apply_edits(content)
+        elif event == 'request_history':
+            if self._recorder is not None:
+                self._recorder.resend()
+        elif event == 'telemetry':
+            self.telemetry.report(content['id'], content)
+        elif event == 'codecs':
+            self._codec.accept(content['codecs'])
+        elif event == 'cancel_load':
+            self.cancel_load()
+        elif event == 'request_graph':
+            # the frontend restored a partial snapshot from saved state;
+            # the full graph already includes any pending changes
+            self._diff.clear()
+            self.send_state('graph')
+        elif event == 'expand':
+            self.expand(content['node'])
+        elif event == 'viewport':
+            self._load_viewport(content)
+
+    def _frame_acked(self, seq):
+        rtt = self._frames.ack(seq)
+        nbytes = self._frame_bytes.pop(seq, 0)
+        for s in [s for s in self._frame_bytes if s < seq]:
+            del self._frame_bytes[s]
+        # round trips of small frames measure latency rather than throughput
+        if rtt is not None and nbytes >= _MIN_PROBE_BYTES:
+            self._codec.observe_transfer(nbytes, rtt)
+
+    def _layout_done(self, content, buffers):
+        # keep the store in sync with the positions computed by the worker
+        positions = np.frombuffer(buffers[0], dtype='<f4').reshape(content['shape'])
+        if len(positions) == self.graph.n_nodes:
+            self.graph.node_attrs['x'] = positions[:, 0].copy()
+            self.graph.node_attrs['y'] = positions[:, 1].copy()
+            remember_positions(self.graph, positions)
+
+    @classmethod
+    def from_networkx(cls, G, class_attr='class', cache_key=None, **kwargs):
+        """Create a widget displaying a NetworkX / NeuroDriver graph.
+
+        Node and edge attributes are grouped by ``class_attr`` and converted
+        into typed columns; see :func:`~ipyneugraph.convert.networkx_to_arrays`.
+        With a ``cache_key`` naming the graph's content, e.g.
+        :func:`~ipyneugraph.cache.path_key` of the file it was read from, the
+        conversion and the latest layout are kept in the on-disk cache (see
+        :mod:`ipyneugraph.cache`), so reopening a known circuit skips both.
+        Remaining keyword arguments are passed to the widget constructor.
+        """
+        return cls(graph=load_networkx(G, class_attr, cache_key), **kwargs)
+
+    def set_networkx(self, G, class_attr='class', cache_key=None):
+        """Replace the displayed graph with a NetworkX / NeuroDriver graph.
+        """
+        self.graph = load_networkx(G, class_attr, cache_key)
+
+    @classmethod
+    def from_file(cls, path, class_attr='class', **kwargs):
+        """Create a widget displaying a GEXF or GraphML file.
+
+        The file is streamed into the store without building a NetworkX
+        graph; see :mod:`ipyneugraph.formats`. Remaining keyword arguments
+        are passed to the widget constructor.
+        """
+        return cls(graph=read_graph(path, class_attr), **kwargs)
+
+    def to_file(self, path):
+        """Write :attr:`full_graph` as GEXF or GraphML, including changes
+        made while a filtered subgraph was shown.
+
+        The format follows the extension of ``path``: ``.gexf`` or
+        ``.graphml``, optionally followed by ``.gz``.
+        """
+        write_graph(self.full_graph, path)
+
+    def set_graph(self, node_ids, source, target, node_attrs=None, edge_attrs=None):
+        """Replace the displayed graph.
+
+        Parameters
+        ----------
+        node_ids : sequence of str
+            Unique node identifiers, length N.
+        source, target : array_like of int
+            Edge endpoints as indices into ``node_ids``, length E each.
+        node_attrs : dict, optional
+            Mapping of attribute name to an array of length N.
+        edge_attrs : dict, optional
+            Mapping of attribute name to an array of length E.
+        """
+        self.graph = GraphStore.from_arrays(node_ids, source, target, node_attrs, edge_attrs)
+
+    def load_async(self, graph, class_attr='class', chunk_size=50000, cache_key=None):
+        """Replace the displayed graph without blocking the kernel.
+
+        A NetworkX graph is converted on a worker thread; the result is then
+        sent in chunks of ``chunk_size`` nodes or edges, nodes first, so the
+        view fills in progressively and shows a progress bar with a cancel
+        button. Cancelling keeps the part of the graph sent so far.
+
+        Parameters
+        ----------
+        graph : networkx.Graph or GraphStore
+        class_attr : str, optional
+            See :meth:`from_networkx`.
+        chunk_size : int, optional
+            Number of nodes or edges per message.
+        cache_key : str, optional
+            See :meth:`from_networkx`.
+
+        Returns
+        -------
+        asyncio.Task
+            Resolves to the loaded :class:`~ipyneugraph.store.GraphStore`.
+            ``await`` it, or let it run while executing other cells.
+        """
+        self.cancel_load()
+        self._load_task = asyncio.ensure_future(
+            self._load(graph, class_attr, chunk_size, cache_key))
+        return self._load_task
+
+    def cancel_load(self):
+        """Stop a running :meth:`load_async`."""
+        if self._load_task is not None and not self._load_task.done():
+            self._load_task.cancel()
+        self._load_task = None
+
+    async def _load(self, graph, class_attr, chunk_size, cache_key):
+        self.set_trait('load_progress', 0.0)
+        self.set_trait('loading', True)
+        try:
+            if isinstance(graph, GraphStore):
+                full = graph
+            else:
+                full = await asyncio.get_event_loop().run_in_executor(
+                    None, load_networkx, graph, class_attr, cache_key)
+            self.graph = store = GraphStore()
+            total = max(full.n_nodes + full.n_edges, 1)
+            ids = full.node_ids
+            for start in range(0, full.n_nodes, chunk_size):
+                stop = min(start + chunk_size, full.n_nodes)
+                store.extend_from(full, stop, 0)
+                self._diff.add_nodes(ids[start:stop],
+                                     full.gather_node_attrs(np.arange(start, stop)))
+                self.send_diff()
+                self.set_trait('load_progress', stop / total)
+                # let the kernel handle other messages, e.g. a cancel
+                await asyncio.sleep(0)
+                if self.graph is not store:
+                    return store
+            for start in range(0, full.n_edges, chunk_size):
+                stop = min(start + chunk_size, full.n_edges)
+                store.extend_from(full, full.n_nodes, stop)
+                self._diff.add_edges(full.edge_keys[start:stop], ids[full.source[start:stop]],
+                                     ids[full.target[start:stop]],
+                                     full.gather_edge_attrs(np.arange(start, stop)))
+                self.send_diff()
+                self.set_trait('load_progress', (full.n_nodes + stop) / total)
+                await asyncio.sleep(0)
+                if self.graph is not store:
+                    return store
+        finally:
+            self.set_trait('loading', False)
+        if self.auto_layout and store.n_nodes and 'x' not in store.node_attrs:
+            self.start_layout()
+        return store
+
+    def collapse(self, by='class', **kwargs):
+        """Show an overview in which groups of nodes are collapsed.
+
+        The full graph stays in the kernel as :attr:`full_graph`; only the
+        super-graph of the coarsest groups is sent. Clicking a group in the
+        view, or calling :meth:`expand`, replaces it by its children.
+
+        Parameters
+        ----------
+        by : str, list of str, 'louvain' or Hierarchy
+            Node attribute(s) to group by, coarsest first, ``'louvain'`` for
+            communities of the adjacency matrix (requires SciPy), or a
+            precomputed :class:`~ipyneugraph.aggregate.Hierarchy`.
+        **kwargs
+            Passed to :meth:`Hierarchy.from_louvain
+            <ipyneugraph.aggregate.Hierarchy.from_louvain>`.
+
+        Examples
+        --------
+        >>> widget.collapse(by=['lpu', 'class'])
+        >>> widget.expand('group:1:retina')
+        """
+        full = self.full_graph
+        if isinstance(by, Hierarchy):
+            hierarchy = by
+        elif by == 'louvain':
+            hierarchy = Hierarchy.from_louvain(full, **kwargs)
+        else:
+            hierarchy = Hierarchy.from_attributes(full, by)
+        aggregation = Aggregation(full, hierarchy)
+        self._show(aggregation.display_store(), full)
+        self._aggregation = aggregation
+        # groups are no nodes of the full graph
+        self.editable = False
+
+    @property
+    def full_graph(self):
+        """The complete graph, of which :attr:`graph` may be an overview,
+        a filtered subgraph or the lazily loaded part.
+        """
+        return self.graph if self._full is None else self._full
+
+    def _show(self, store, full):
+        # display part of `full`; replacing the graph resets the view state
+        self.graph = store
+        self._full = full
+
+    def expand(self, node_id):
+        """Replace a collapsed group by its children."""
+        if self._aggregation is None or not self._aggregation.is_group(node_id):
+            return
+        self._apply_regroup(self._aggregation.expand(node_id))
+
+    def collapse_group(self, node_id):
+        """Replace a displayed node or group by its enclosing group."""
+        if self._aggregation is None:
+            return
+        self._apply_regroup(self._aggregation.collapse(node_id))
+
+    def expand_all(self):
+        """Show the full graph again."""
+        if self._full is not None:
+            self.graph = self._full
+
+    def lazy_load(self, tile_capacity=1000):
+        """Load nodes as the view pans and zooms instead of all at once.
+
+        Only the highest-degree nodes of the whole layout are sent up front;
+        the view then reports its viewport and receives the nodes and edges
+        of the tiles it covers (see :mod:`ipyneugraph.viewport`). The graph
+        must have ``x``/``y`` positions, e.g. from :meth:`compute_layout`.
+
+        Parameters
+        ----------
+        tile_capacity : int, optional
+            Maximum number of nodes a tile shows at its own zoom level,
+            which also bounds the size of the initial display.
+        """
+        full = self.full_graph
+        loader = ViewportLoader(full, tile_capacity)
+        rows, edges = loader.load_overview()
+        node_ids, node_attrs = loader.nodes(rows)
+        sources, targets, edge_attrs = loader.edges(edges)
+        store = GraphStore()
+        store.add_nodes(node_ids, node_attrs)
+        store.add_edges(sources, targets, edge_attrs)
+        self._show(store, full)
+        self._viewport = loader
+        self.set_trait('lazy_loading', True)
+        self.editable = False
+
+    def select(self, nodes=None, edges=None, hops=0, direction='both', between=None,
+               max_length=3):
+        """Select nodes and edges of :attr:`full_graph`.
+
+        Parameters
+        ----------
+        nodes : str, array_like of bool or sequence of str, optional
+            Expression over node attributes, boolean mask or node IDs. Names
+            in expressions refer to attributes, or to ``id``, ``degree``,
+            ``in_degree`` and ``out_degree``.
+        edges : str, array_like of bool or sequence of int, optional
+            Expression over edge attributes (or ``source``, ``target``,
+            ``key``), boolean mask or edge keys.
+        hops : int, optional
+            Extend the node selection to its ``hops``-hop neighbourhood.
+        direction : {'both', 'out', 'in'}, optional
+            Edge direction followed by ``hops``.
+        between : tuple, optional
+            ``(sources, targets)`` node selectors; keep only what lies on
+            directed paths of at most ``max_length`` edges between them.
+        max_length : int, optional
+            Maximum path length for ``between``.
+
+        Returns
+        -------
+        node_mask, edge_mask : ndarray of bool
+            Masks over the rows of :attr:`full_graph`.
+
+        Examples
+        --------
+        >>> nodes, edges = widget.select("class == 'LeakyIAF' and V_th < -50", hops=1)
+        """
+        return select(self.full_graph, nodes, edges, hops, direction, between, max_length)
+
+    def filter(self, nodes=None, edges=None, **kwargs):
+        """Display only a selected subgraph.
+
+        Takes the same arguments as :meth:`select`; only the selected
+        subgraph is synced to the frontend. Call without arguments, or
+        :meth:`expand_all`, to show the whole graph again.
+
+        Examples
+        --------
+        >>> widget.filter("class == 'LeakyIAF'", edges='gmax > 0.1')
+        >>> widget.filter(between=(['retina-R1'], "class == 'MorrisLecar'"), max_length=4)
+        """
+        if nodes is None and edges is None and not kwargs:
+            self.expand_all()
+            return
+        full = self.full_graph
+        self._show(full.subgraph(*select(full, nodes, edges, **kwargs)), full)
+
+    def view(self, **kwargs):
+        """Another view of this widget's graph, with its own camera and filter.
+
+        The graph is synced once, to this widget's model, and shared by all
+        its views; see :class:`NeuGraphPane`.
+        """
+        return NeuGraphPane(source=self, **kwargs)
+
+    def highlight_paths(self, sources, targets, weight=None, max_length=None):
+        """Highlight the directed paths between nodes of the displayed graph.
+
+        Parameters
+        ----------
+        sources, targets : str, array_like of bool or sequence of str
+            Node selectors, as in :meth:`select`.
+        weight : str, optional
+            Edge attribute giving edge lengths for weighted shortest paths.
+        max_length : int, optional
+            Highlight all paths of up to ``max_length`` edges instead of the
+            shortest ones.
+
+        Returns
+        -------
+        node_mask, edge_mask : ndarray of bool
+            Masks over the rows of :attr:`graph`.
+        """
+        store = self.graph
+        sources, targets = node_mask(store, sources), node_mask(store, targets)
+        if max_length is not None:
+            nodes, edges = paths_between(store, sources, targets, max_length)
+        else:
+            weights = None if weight is None else store.edge_column(weight)
+            nodes, edges = shortest_paths(store, sources, targets, weights)
+        self.highlight(nodes, edges)
+        return nodes, edges
+
+    def highlight(self, nodes=None, edges=None):
+        """Highlight nodes and edges of the displayed graph, dimming the rest.
+
+        Takes boolean masks over the rows of :attr:`graph`; call without
+        arguments to clear the highlight.
+        """
+        if nodes is None and edges is None:
+            self.send({'method': 'highlight', 'nodes': None, 'edges': None})
+            return
+        store = self.graph
+        nodes = np.zeros(store.n_nodes, dtype=bool) if nodes is None else np.asarray(nodes)
+        edges = np.zeros(store.n_edges, dtype=bool) if edges is None else np.asarray(edges)
+        # only the index set is sent: rows for nodes, keys for edges
+        self._send_binary({
+            'method': 'highlight',
+            'nodes': array_to_binary(np.flatnonzero(nodes).astype(np.uint32)),
+            'edges': array_to_binary(store.edge_keys[edges].astype(np.uint32)),
+        })
+
+    def _pick(self, node_id):
+        if self.path_query == 'off' or node_id not in self.graph:
+            return
+        self._picked = self._picked[-1:] if len(self._picked) == 1 else []
+        self._picked.append(node_id)
+        if len(self._picked) == 1:
+            self.highlight(node_mask(self.graph, self._picked))
+            return
+        max_length = self.max_path_length if self.path_query == 'all' else None
+        self.highlight_paths(self._picked[:1], self._picked[1:], self.path_weight, max_length)
+
+    def _load_viewport(self, content):
+        if self._viewport is None:
+            return
+        rows, edges = self._viewport.load(content['x0'], content['y0'],
+                                          content['x1'], content['y1'])
+        if not len(rows):
+            return
+        with self.hold_diff():
+            self._add_nodes(*self._viewport.nodes(rows))
+            if len(edges):
+                self._add_edges(*self._viewport.edges(edges))
+
+    def _apply_regroup(self, change):
+        if change is None:
+            return
+        removed, (node_ids, attrs), edges = change
+        store = self.graph
+        if 'x' in store.node_attrs and 'y' in store.node_attrs:
+            # spread the new nodes around the node(s) they replace
+            rows = store.node_rows(removed)
+            center = np.array([np.nanmean(store.node_attrs['x'][rows]),
+                               np.nanmean(store.node_attrs['y'][rows])])
+            radius = np.nanmax(store.node_attrs.get('size', np.ones(1))[rows]) \
+                if 'size' in store.node_attrs else 1.0
+            angle = np.linspace(0, 2 * np.pi, len(node_ids), endpoint=False)
+            attrs['x'] = (center[0] + radius * np.cos(angle)).astype(np.float32)
+            attrs['y'] = (center[1] + radius * np.sin(angle)).astype(np.float32)
+        with self.hold_diff():
+            self._remove_nodes(removed)
+            self._add_nodes(node_ids, attrs)
+            for sources, targets, edge_attrs in edges:
+                self._add_edges(sources, targets, edge_attrs)
+
+    def compute_layout(self, iterations=100, weight=None, use_cache=True, **params):
+        """Lay the graph out in the kernel and send the positions.
+
+        Runs :func:`~ipyneugraph.layout.forceatlas2` on the store's edge
+        arrays, writes the result to the ``x``/``y`` node attributes and sends
+        only the final float32 positions to the frontend. Layouts are cached
+        by graph fingerprint, in memory and in the on-disk cache, so laying
+        out the same circuit again is free, also after a kernel restart.
+
+        Parameters
+        ----------
+        iterations : int, optional
+            Number of ForceAtlas2 iterations.
+        weight : str, optional
+            Name of the edge attribute scaling the attraction.
+        use_cache : bool, optional
+            Whether to reuse a cached layout of the same graph.
+        **params
+            Further arguments to :func:`~ipyneugraph.layout.forceatlas2`.
+
+        Returns
+        -------
+        ndarray of float32, shape (n_nodes, 2)
+        """
+        store = self.graph
+        weights = None if weight is None else np.nan_to_num(store.edge_column(weight))
+        # keyed by the weights themselves, which change unlike the structure
+        key = layout_key(store, iterations=iterations, weight=weight, weights=weights, **params)
+        settings = dict(layout_params(iterations=iterations, weight=weight, weights=weights,
+                                      **params))
+        positions = None
+        if use_cache:
+            positions = layout_cache.get(key)
+            if positions is None:
+                positions = cached_positions(store, settings)
+        if positions is None:
+            positions = forceatlas2(
+                store.n_nodes, store.source, store.target,
+                weight=weights, iterations=iterations, **params)
+        layout_cache.put(key, positions)
+        remember_positions(store, positions, settings)
+        self.set_positions(positions)
+        return positions
+
+    def start_layout(self, weight=None, **settings):
+        """Run ForceAtlas2 in a Web Worker of the frontend.
+
+        Positions are updated progressively in the view and written back to
+        the store once the layout converges or is stopped.
+
+        Parameters
+        ----------
+        weight : str, optional
+            Name of the edge attribute scaling the attraction.
+        **settings
+            Any of ``scaling``, ``gravity``, ``theta``, ``jitter_tolerance``,
+            ``iterations_per_update``, ``max_iterations`` and
+            ``convergence_threshold``.
+        """
+        unknown = set(settings) - set(_LAYOUT_SETTINGS)
+        if unknown:
+            raise TypeError('Unknown layout settings: %s' % ', '.join(sorted(unknown)))
+        self.send_diff()
+        self.send({'method': 'start_layout', 'weight': weight,
+                   'settings': {_LAYOUT_SETTINGS[k]: v for k, v in settings.items()}})
+
+    def stop_layout(self):
+        """Stop the frontend layout, keeping the positions reached so far.
+        """
+        self.send({'method': 'stop_layout'})
+
+    def set_positions(self, positions):
+        """Set every node's position, in store row order.
+
+        Positions are stored as the ``x``/``y`` node attributes and sent as a
+        single float32 buffer rather than as a diff keyed by node ID.
+        """
+        positions = np.asarray(positions, dtype=np.float32).reshape(self.graph.n_nodes, 2)
+        self.graph.node_attrs['x'] = positions[:, 0].copy()
+        self.graph.node_attrs['y'] = positions[:, 1].copy()
+        # pending diffs must reach the frontend first so node rows line up
+        self.send_diff()
+        self._send_binary({'method': 'positions', 'positions': array_to_binary(positions)})
+
+    def _send_binary(self, content):
+        """Send a custom message, moving its memoryviews into buffers.
+
+        Returns the number of bytes in the buffers.
+        """
+        self.telemetry.start()
+        content, buffer_paths, buffers = _remove_buffers(self._codec.encode_all(content))
+        content['buffer_paths'] = buffer_paths
+        self.send(content, buffers)
+        return sum(memoryview(b).nbytes for b in buffers)
+
+    def push_state(self, attrs, node_ids=None):
+        """Update high-frequency node state, e.g. from a running simulation.
+
+        Values are written to the store immediately but sent at most
+        ``max_fps`` times per second: writes between two frames are coalesced
+        into one binary message carrying only the latest values of the rows
+        that changed. Frames that cannot be sent in time are dropped.
+
+        Parameters
+        ----------
+        attrs : dict
+            Mapping of attribute name to values, one per node (in store row
+            order) or one per entry of ``node_ids``.
+        node_ids : sequence of str, optional
+            Nodes the values apply to; all nodes if omitted.
+
+        Examples
+        --------
+        >>> for t in range(steps):
+        ...     lpu.run_step()
+        ...     widget.push_state({'V': V_gpu.get(), 'spike': spikes.get()})
+        """
+        store = self.graph
+        if node_ids is None:
+            for name, values in attrs.items():
+                values = np.asarray(values)
+                if len(values) != store.n_nodes:
+                    raise ValueError('attribute %r has length %d, expected %d'
+                                     % (name, len(values), store.n_nodes))
+                store.node_attrs[name] = values
+                self._frames.mark(name, None, store.n_nodes)
+            self._frames.maybe_flush()
+        else:
+            self._push_rows(attrs, store.node_rows(node_ids))
+
+    def _push_rows(self, attrs, rows):
+        # push_state for callers that already resolved node IDs to rows
+        store = self.graph
+        _set_columns(store.node_attrs, store.n_nodes, rows, attrs)
+        for name in attrs:
+            self._frames.mark(name, rows, store.n_nodes)
+        self._frames.maybe_flush()
+
+    def set_style(self, **channels):
+        """Update channels of :attr:`style`; ``None`` removes a channel.
+
+        Examples
+        --------
+        >>> widget.set_style(node_color={'attr': 'V', 'colormap': 'coolwarm',
+        ...                              'domain': [-70, -40]},
+        ...                  node_size='spike')
+        """
+        style = dict(self.style)
+        style.update(channels)
+        self.style = {k: v for k, v in style.items() if v is not None}
+
+    def playback(self, source, color=None, size=None, **kwargs):
+        """Play back recorded simulation output on this widget's nodes.
+
+        Only the current time window is read from disk; see
+        :class:`~ipyneugraph.playback.Playback` for the parameters.
+
+        Returns
+        -------
+        Playback
+            Object with ``play``, ``pause`` and ``seek`` methods and a
+            ``controls()`` widget.
+        """
+        return Playback(self, source, color=color, size=size, **kwargs)
+
+    def record(self, neurons, capacity=10000, spike_capacity=100000, label='V'):
+        """Show a live spike raster and traces of ``neurons`` in a side panel.
+
+        Parameters
+        ----------
+        neurons : list of str
+            IDs of the neurons to record.
+        capacity : int, optional
+            Number of trace samples kept, in the kernel and in the frontend.
+        spike_capacity : int, optional
+            Number of spikes kept.
+        label : str, optional
+            Name of the traced variable.
+
+        Returns
+        -------
+        Recorder
+            Call its ``record(t, values, spikes)`` at every step, or with
+            blocks of steps; only new samples are sent to the frontend.
+        """
+        neurons = list(neurons)
+        self.graph.node_rows(neurons)
+        self._recorder = Recorder(
+            self._send_binary, neurons, capacity, spike_capacity, interval=1.0 / self.max_fps)
+        self.set_trait('recording', {'neurons': neurons, 'capacity': capacity,
+                                     'spike_capacity': spike_capacity, 'label': label})
+        return self._recorder
+
+    def stop_recording(self):
+        """Hide the spike raster and trace panel."""
+        self._recorder = None
+        self.set_trait('recording', {})
+
+    def hold_state(self):
+        """Context manager coalescing all :meth:`push_state` calls of the
+        block into the next frame.
+        """
+        return self._frames.hold()
+
+    def flush_state(self):
+        """Send pending node state now, regardless of the rate limit.
+        """
+        self._frames.flush()
+
+    def _send_frame(self, seq, rows, columns):
+        # frames address nodes by row, so structural changes must land first
+        self.send_diff()
+        self._frame_bytes[seq] = self._send_binary(frame_to_json(seq, rows, columns))
+
+    @contextmanager
+    def hold_diff(self):
+        """Batch graph mutations into a single diff message.
+
+        Examples
+        --------
+        >>> with widget.hold_diff():
+        ...     widget.remove_nodes(['n1'])
+        ...     widget.set_node_attrs(['n2'], {'V_th': [-50.0]})
+        """
+        self._diff_holds += 1
+        try:
+            yield self._diff
+        finally:
+            self._diff_holds -= 1
+            if self._diff_holds == 0:
+                self.send_diff()
+
+    def send_diff(self):
+        """Send the pending changes to the frontend, if any.
+        """
+        if not self._diff and self._edits_answered is None:
+            return
+        try:
+            content = {'method': 'diff', 'ops': self._diff.to_json()}
+        finally:
+            # a diff failing to serialize must not block later ones
+            self._diff.clear()
+        if self._edits_answered is not None:
+            # the frontend drops its provisional edits up to this batch
+            content['edits'] = self._edits_answered
+            self._edits_answered = None
+        self._send_binary(content)
+
+    def on_edit(self, callback, remove=False):
+        """(Un)register ``callback(edits)``, called with the edits the user
+        made in the view once they are applied to :attr:`graph`.
+
+        ``edits`` is a list of dicts with an ``op`` (``'move'``,
+        ``'add_nodes'``, ``'drop_nodes'``, ``'add_edges'`` or
+        ``'drop_edges'``) and the node IDs or edge keys in ``id``, along
+        with ``x``/``y`` or ``source``/``target`` where they apply.
+        """
+        if remove:
+            self._edit_callbacks.remove(callback)
+        else:
+            self._edit_callbacks.append(callback)
+
+    def _apply_edits(self, content):
+        """Apply a batch of edits made in the view (see src/edit.ts).
+
+        Edits conflicting with the store, e.g. moving a node the kernel
+        removed meanwhile, are dropped. The answering diff carries the
+        accepted ones, so the frontend ends up with the kernel's graph.
+        Edits of a filtered view also apply to :attr:`full_graph`; those of
+        an overview or a lazily loaded view are all dropped.
+        """
+        applied = []
+        self._edits_answered = content['seq']
+        editable = self._aggregation is None and self._viewport is None
+        if editable and content.get('epoch') == self._edit_epoch:
+            with self.hold_diff():
+                for op in content['ops']:
+                    op = self._apply_edit(op)
+                    if op is not None:
+                        applied.append(op)
+        self.send_diff()
+        if applied:
+            for callback in self._edit_callbacks:
+                callback(applied)
+
+    def _apply_edit(self, op):
+        store = self.graph
+        kind = op['op']
+        ids = op['id']
+        if kind in ('move', 'add_nodes'):
+            # moved nodes must be shown, added ones must not exist at all
+            known = store if kind == 'move' else self.full_graph
+            keep = np.zeros(len(ids), dtype=bool)
+            seen = set()
+            for i, node_id in enumerate(ids):
+                keep[i] = (node_id in known) == (kind == 'move') and node_id not in seen
+                seen.add(node_id)
+            ids = [n for n, k in zip(ids, keep) if k]
+            x = np.asarray(op['x'], dtype=np.float32)[keep]
+            y = np.asarray(op['y'], dtype=np.float32)[keep]
+            if not ids:
+                return None
+            if kind == 'move':
+                self.set_node_attrs(ids, {'x': x, 'y': y})
+            else:
+                self.add_nodes(ids, {'x': x, 'y': y})
+            return {'op': kind, 'id': ids, 'x': x, 'y': y}
+        if kind == 'drop_nodes':
+            ids = [n for n in dict.fromkeys(ids) if n in store]
+            if ids:
+                self.remove_nodes(ids)
+        elif kind == 'add_edges':
+            edges = [(k, s, t) for k, s, t in zip(ids, op['source'], op['target'])
+                     if s in store and t in store]
+            if not edges:
+                return None
+            provisional, sources, targets = zip(*edges)
+            keys = self.add_edges(list(sources), list(targets))
+            self._edit_keys.update(zip(provisional, keys.tolist()))
+            return {'op': kind, 'id': keys, 'source': list(sources), 'target': list(targets)}
+        elif kind == 'drop_edges':
+            keys = [self._edit_keys.get(k, k) for k in ids]
+            keys = np.unique([int(k) for k in keys if not str(k).startswith('~')])
+            ids = keys[np.isin(keys, store.edge_keys)]
+            if len(ids):
+                self.remove_edges(ids)
+        else:
+            return None
+        return {'op': kind, 'id': ids} if len(ids) else None
+
+    def _record(self):
+        if self._diff_holds == 0:
+            self.send_diff()
+
+    def _edited_full(self):
+        """The full graph that changes must also reach, while a filtered
+        subgraph of it is shown.
+
+        The nodes of overviews and lazily loaded views are not those of
+        :attr:`full_graph`, so they cannot be changed.
+        """
+        if self._full is None:
+            return None
+        if self._aggregation is not None or self._viewport is not None:
+            raise RuntimeError('the graph cannot be changed while collapsed or lazily '
+                               'loaded; call expand_all() first')
+        return self._full
+
+    def add_nodes(self, node_ids, attrs=None):
+        """Add nodes with optional attribute columns.
+        """
+        full = self._edited_full()
+        if full is not None:
+            full.add_nodes(node_ids, attrs)
+        self._add_nodes(node_ids, attrs)
+
+    def _add_nodes(self, node_ids, attrs=None):
+        # changes of the displayed graph only
+        node_ids = self.graph.add_nodes(node_ids, attrs)
+        self._diff.add_nodes(node_ids, _columns(attrs, len(node_ids)))
+        self._frames.invalidate()
+        self._record()
+
+    def remove_nodes(self, node_ids):
+        """Remove nodes together with their incident edges.
+        """
+        full = self._edited_full()
+        if full is not None:
+            full.remove_nodes(node_ids)
+            node_ids = [n for n in node_ids if n in self.graph]
+            if not node_ids:
+                return
+        self._remove_nodes(node_ids)
+
+    def _remove_nodes(self, node_ids):
+        self.graph.remove_nodes(node_ids)
+        self._diff.remove_nodes(node_ids)
+        self._frames.invalidate()
+        self._record()
+
+    def add_edges(self, sources, targets, attrs=None):
+        """Add edges between existing nodes and return their keys.
+        """
+        full = self._edited_full()
+        if full is None:
+            return self._add_edges(sources, targets, attrs)
+        keys = full.add_edges(sources, targets, attrs)
+        # the filtered view shows the edges between its nodes, with their keys
+        shown = np.array([s in self.graph and t in self.graph
+                          for s, t in zip(sources, targets)], dtype=bool)
+        if shown.any():
+            self._add_edges([s for s, k in zip(sources, shown) if k],
+                            [t for t, k in zip(targets, shown) if k],
+                            {name: values[shown]
+                             for name, values in _columns(attrs, len(keys)).items()},
+                            keys[shown])
+        return keys
+
+    def _add_edges(self, sources, targets, attrs=None, keys=None):
+        keys = self.graph.add_edges(sources, targets, attrs, keys)
+        self._diff.add_edges(keys, sources, targets, _columns(attrs, len(keys)))
+        self._record()
+        return keys
+
+    def remove_edges(self, keys):
+        """Remove edges by key.
+        """
+        full = self._edited_full()
+        if full is not None:
+            full.remove_edges(keys)
+            keys = np.asarray(keys, dtype=np.int64)
+            keys = keys[np.isin(keys, self.graph.edge_keys)]
+            if not len(keys):
+                return
+        self.graph.remove_edges(keys)
+        self._diff.remove_edges(keys)
+        self._record()
+
+    def set_node_attrs(self, node_ids, attrs):
+        """Update attributes of existing nodes.
+        """
+        full = self._edited_full()
+        attrs = _columns(attrs, len(node_ids))
+        if full is not None:
+            full.set_node_attrs(node_ids, attrs)
+            shown = np.array([n in self.graph for n in node_ids], dtype=bool)
+            if not shown.any():
+                return
+            node_ids = [n for n, k in zip(node_ids, shown) if k]
+            attrs = {name: values[shown] for name, values in attrs.items()}
+        self.graph.set_node_attrs(node_ids, attrs)
+        self._diff.set_node_attrs(node_ids, attrs)
+        self._record()
+
+    def set_edge_attrs(self, keys, attrs):
+        """Update attributes of existing edges.
+        """
+        full = self._edited_full()
+        attrs = _columns(attrs, len(keys))
+        if full is not None:
+            full.set_edge_attrs(keys, attrs)
+            keys = np.asarray(keys, dtype=np.int64)
+            shown = np.isin(keys, self.graph.edge_keys)
+            if not shown.any():
+                return
+            keys = keys[shown]
+            attrs = {name: values[shown] for name, values in attrs.items()}
+        self.graph.set_edge_attrs(keys, attrs)
+        self._diff.set_edge_attrs(keys, attrs)
+        self._record()
+
+
+class NeuGraphPane(DOMWidget):
+    """A further view of a :class:`NeuGraphWidget`'s graph.
+
+    The graph, its state and its style stay on the source widget's model and
+    are shared by every pane; a pane only syncs its camera and the index set
+    of the nodes and edges it shows, so that several panes of a large graph
+    cost no more than one.
+
+    Examples
+    --------
+    >>> overview = widget.view(height='300px')
+    >>> retina = widget.view()
+    >>> retina.filter("class == 'LeakyIAF'", hops=1)
+    """
+    _model_name = Unicode('NeuGraphPaneModel').tag(sync=True)
+    _model_module = Unicode(module_name).tag(sync=True)
+    _model_module_version = Unicode(module_version).tag(sync=True)
+    _view_name = Unicode('NeuGraphPaneView').tag(sync=True)
+    _view_module = Unicode(module_name).tag(sync=True)
+    _view_module_version = Unicode(module_version).tag(sync=True)
+
+    source = Instance(NeuGraphWidget).tag(sync=True, **widget_serialization)
+    height = Unicode('400px', help="CSS height of the rendering area.").tag(sync=True)
+    camera = Dict(
+        help="Camera state ({x, y, ratio, angle}), updated as the view pans and zooms."
+    ).tag(sync=True)
+
+    def __init__(self, **kwargs):
+        self._selectors = None
+        super(NeuGraphPane, self).__init__(**kwargs)
+        self.source.observe(self._source_replaced, 'graph')
+        self.on_msg(self._handle_frontend_msg)
+
+    def _handle_frontend_msg(self, _, content, buffers):
+        if content.get('event') == 'request_filter':
+            self._send_filter()
+
+    def _source_replaced(self, change):
+        # rows of the previous graph no longer apply
+        self._send_filter()
+
+    def filter(self, nodes=None, edges=None, **kwargs):
+        """Show only a selection of the source's displayed graph.
+
+        Takes the same arguments as :meth:`NeuGraphWidget.select`, applied
+        to the source's :attr:`~NeuGraphWidget.graph`; call without
+        arguments to show the whole graph again. The selection is evaluated
+        again when the source's graph is replaced; nodes and edges added
+        otherwise are hidden until the next call.
+        """
+        if nodes is None and edges is None and not kwargs:
+            self._selectors = None
+        else:
+            self._selectors = (nodes, edges, kwargs)
+        self._send_filter()
+
+    def _send_filter(self):
+        if self._selectors is None:
+            self.send({'method': 'filter', 'nodes': None, 'edges': None})
+            return
+        nodes, edges, kwargs = self._selectors
+        source = self.source
+        store = source.graph
+        nodes, edges = select(store, nodes, edges, **kwargs)
+        # rows refer to the source's graph with its pending diffs applied
+        source.send_diff()
+        content, buffer_paths, buffers = _remove_buffers({
+            'method': 'filter',
+            'nodes': array_to_binary(np.flatnonzero(nodes).astype(np.uint32)),
+            'edges': array_to_binary(store.edge_keys[edges].astype(np.uint32)),
+        })
+        content['buffer_paths'] = buffer_paths
+        self.send(content, buffers)
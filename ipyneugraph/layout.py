@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Kernel-side ForceAtlas2 layout with Barnes-Hut approximated repulsion.
+
+The quadtree is built as a stack of dense grids, one per depth, holding the
+mass and center of mass of every cell. Each node is repelled by the cells of
+each level that are children of its parent's neighbours but not adjacent to
+its own cell -- the well-separated set of a classic Barnes-Hut traversal --
+and by the individual nodes of its adjacent leaf cells. Every level is a
+fixed number of whole-array operations, so an iteration does ``O(n log n)``
+work without any per-node Python loop.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_DEPTH = 10
+
+# offsets of a cell's 3x3 neighbourhood
+_NEIGHBOURS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def _depth(unit, leaf_size):
+    """Quadtree depth for positions normalised to the unit square.
+
+    Starts from the depth at which uniformly spread nodes would fill leaves
+    of ``leaf_size`` and refines while clustered leaves would make the exact
+    near-field interactions quadratic.
+    """
+    n = len(unit)
+    depth = int(np.clip(np.ceil(np.log(max(n, 1) / float(leaf_size)) / np.log(4)), 2, MAX_DEPTH))
+    while depth < MAX_DEPTH:
+        g = 1 << depth
+        cell = np.minimum((unit * g).astype(np.int64), g - 1)
+        counts = np.bincount(cell[:, 0] * g + cell[:, 1])
+        if (counts.astype(np.float64) ** 2).sum() <= 2 * leaf_size * n:
+            break
+        depth += 1
+    return depth
+
+
+def _ragged_arange(counts):
+    """Concatenation of ``arange(c)`` for every ``c`` in ``counts``."""
+    total = counts.sum()
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(total) - offsets
+
+
+def _repulsion(pos, mass, scaling, leaf_size):
+    """Barnes-Hut approximation of ForceAtlas2's degree-weighted repulsion.
+    """
+    n = len(pos)
+    # float32 halves the memory traffic of the per-level passes
+    pos = pos.astype(np.float32)
+    force = np.zeros_like(pos)
+    lo = pos.min(axis=0)
+    extent = max(float((pos.max(axis=0) - lo).max()), 1e-9) * (1 + 1e-6)
+    unit = (pos - lo) / extent
+    depth = _depth(unit, leaf_size)
+
+    # far field, level by level; at level 1 every cell is adjacent
+    for level in range(2, depth + 1):
+        g = 1 << level
+        cell = np.minimum((unit * g).astype(np.int64), g - 1)
+        flat = cell[:, 0] * g + cell[:, 1]
+        # per-cell (mass, center x, center y), gathered with a single take
+        cells = np.empty((g * g, 3), dtype=np.float32)
+        cells[:, 0] = np.bincount(flat, weights=mass, minlength=g * g)
+        cells[:, 1] = np.bincount(flat, weights=mass * pos[:, 0], minlength=g * g)
+        cells[:, 2] = np.bincount(flat, weights=mass * pos[:, 1], minlength=g * g)
+        occupied = cells[:, 0] > 0
+        cells[occupied, 1:] /= cells[occupied, :1]
+        base = (cell >> 1) * 2 - 2
+        for i in range(6):
+            ox = base[:, 0] + i
+            far_x = np.abs(ox - cell[:, 0]) > 1
+            in_x = (ox >= 0) & (ox < g)
+            for j in range(6):
+                oy = base[:, 1] + j
+                valid = (far_x | (np.abs(oy - cell[:, 1]) > 1)) & in_x & (oy >= 0) & (oy < g)
+                other = cells.take(np.where(valid, ox * g + oy, 0), axis=0)
+                other[~valid, 0] = 0.0
+                d = pos - other[:, 1:]
+                d2 = np.einsum('ij,ij->i', d, d)
+                d2[other[:, 0] == 0] = np.inf
+                force += d * (other[:, 0] / d2)[:, None]
+
+    # near field: exact interactions with nodes of adjacent leaf cells
+    g = 1 << depth
+    cell = np.minimum((unit * g).astype(np.int64), g - 1)
+    flat = cell[:, 0] * g + cell[:, 1]
+    order = np.argsort(flat, kind='stable')
+    counts = np.bincount(flat, minlength=g * g)
+    starts = np.cumsum(counts) - counts
+    for dxc, dyc in _NEIGHBOURS:
+        nx_ = cell[:, 0] + dxc
+        ny_ = cell[:, 1] + dyc
+        ids = np.flatnonzero((nx_ >= 0) & (nx_ < g) & (ny_ >= 0) & (ny_ < g))
+        c = nx_[ids] * g + ny_[ids]
+        k = counts[c]
+        src = np.repeat(ids, k)
+        dst = order[np.repeat(starts[c], k) + _ragged_arange(k)]
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        dx = pos[src, 0] - pos[dst, 0]
+        dy = pos[src, 1] - pos[dst, 1]
+        d2 = dx * dx + dy * dy
+        d2[d2 == 0] = np.inf
+        f = mass[dst] / d2
+        force[:, 0] += np.bincount(src, weights=dx * f, minlength=n)
+        force[:, 1] += np.bincount(src, weights=dy * f, minlength=n)
+    return force.astype(np.float64) * (scaling * mass)[:, None]
+
+
+def forceatlas2(n, source, target, weight=None, pos=None, iterations=100,
+                scaling=2.0, gravity=1.0, jitter_tolerance=1.0, leaf_size=8, seed=0):
+    """Compute a ForceAtlas2 layout.
+
+    Parameters
+    ----------
+    n : int
+        Number of nodes.
+    source, target : array_like of int
+        Edge endpoints as node rows.
+    weight : array_like of float, optional
+        Edge weights scaling the attraction.
+    pos : array_like, shape (n, 2), optional
+        Initial positions; random if omitted.
+    iterations : int, optional
+        Number of iterations.
+    scaling : float, optional
+        Repulsion strength.
+    gravity : float, optional
+        Attraction of every node towards the origin.
+    jitter_tolerance : float, optional
+        Tolerance of the adaptive speed to oscillation.
+    leaf_size : int, optional
+        Target number of nodes per leaf cell of the quadtree.
+    seed : int, optional
+        Seed for the random initial positions.
+
+    Returns
+    -------
+    ndarray of float32, shape (n, 2)
+    """
+    source = np.asarray(source, dtype=np.int64)
+    target = np.asarray(target, dtype=np.int64)
+    if pos is None:
+        rng = np.random.RandomState(seed)
+        pos = rng.uniform(-1, 1, size=(n, 2)) * np.sqrt(max(n, 1))
+    pos = np.array(pos, dtype=np.float64).reshape(n, 2)
+    if n == 0:
+        return pos.astype(np.float32)
+    weight = np.ones(len(source)) if weight is None else np.asarray(weight, dtype=np.float64)
+    # ForceAtlas2 weights repulsion and gravity by degree + 1
+    mass = 1.0 + np.bincount(source, minlength=n) + np.bincount(target, minlength=n)
+
+    speed = 1.0
+    speed_efficiency = 1.0
+    previous = np.zeros_like(pos)
+    for _ in range(iterations):
+        force = _repulsion(pos, mass, scaling, leaf_size)
+
+        delta = pos[target] - pos[source]
+        attraction = delta * weight[:, None]
+        force[:, 0] += np.bincount(source, weights=attraction[:, 0], minlength=n)
+        force[:, 1] += np.bincount(source, weights=attraction[:, 1], minlength=n)
+        force[:, 0] -= np.bincount(target, weights=attraction[:, 0], minlength=n)
+        force[:, 1] -= np.bincount(target, weights=attraction[:, 1], minlength=n)
+
+        dist = np.sqrt((pos ** 2).sum(axis=1))
+        dist[dist == 0] = 1.0
+        force -= pos * (gravity * mass / dist)[:, None]
+
+        # adaptive global and local speeds, as in the reference implementation
+        swing = mass * np.sqrt(((force - previous) ** 2).sum(axis=1))
+        traction = mass * np.sqrt(((force + previous) ** 2).sum(axis=1)) / 2.0
+        total_swing = swing.sum()
+        total_traction = traction.sum()
+        estimated_jitter = 0.05 * np.sqrt(n)
+        min_jitter = np.sqrt(estimated_jitter)
+        max_jitter = 10.0
+        jitter = jitter_tolerance * max(min_jitter, min(
+            max_jitter, estimated_jitter * total_traction / (n * n)))
+        if total_swing / max(total_traction, 1e-12) > 2.0:
+            if speed_efficiency > 0.05:
+                speed_efficiency *= 0.5
+            jitter = max(jitter, jitter_tolerance)
+        target_speed = jitter * speed_efficiency * total_traction / max(total_swing, 1e-12)
+        if total_swing > jitter * total_traction:
+            if speed_efficiency > 0.05:
+                speed_efficiency *= 0.7
+        elif speed < 1000:
+            speed_efficiency *= 1.3
+        speed = speed + min(target_speed - speed, 0.5 * speed)
+
+        node_speed = speed / (1.0 + np.sqrt(speed * swing))
+        magnitude = np.sqrt((force ** 2).sum(axis=1))
+        magnitude[magnitude == 0] = 1.0
+        node_speed = np.minimum(node_speed, 10.0 / magnitude)
+        pos += force * node_speed[:, None]
+        previous = force
+    return pos.astype(np.float32)
+
+
+class LayoutCache(object):
+    """Bounded in-memory cache of layouts keyed by graph fingerprint.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        positions = self._entries.get(key)
+        if positions is not None:
+            self._entries.move_to_end(key)
+        return positions
+
+    def put(self, key, positions):
+        self._entries[key] = positions
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+#: Process-wide layout cache shared by all widgets.
+layout_cache = LayoutCache()
+
+
+def _param_key(value):
+    # arrays, e.g. initial positions, are keyed by their bytes: unhashable,
+    # and their repr elides all but a few values
+    if isinstance(value, (np.ndarray, list, tuple)):
+        array = np.ascontiguousarray(value)
+        if array.dtype.kind != 'O':
+            return (array.dtype.str, array.shape, hashlib.sha1(array.tobytes()).hexdigest())
+    return value
+
+
+def layout_params(**params):
+    """``params`` as sorted ``(name, value)`` pairs, hashable and with a
+    faithful ``repr``.
+    """
+    return tuple(sorted((name, _param_key(value)) for name, value in params.items()))
+
+
+def layout_key(store, **params):
+    """Cache key for a layout of ``store`` computed with ``params``.
+    """
+    return (store.fingerprint(),) + layout_params(**params)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Playback of recorded simulation output.
+
+NeuroDriver records every state variable to HDF5 as a group holding a
+``data`` dataset of shape ``(steps, neurons)`` and the matching ``uids``.
+Recordings can be far larger than memory, so a :class:`Playback` only ever
+reads the time window being shown: contiguous uncompressed datasets are
+memory-mapped, chunked or compressed ones are read slab by slab through
+h5py. Each window's raw values are pushed through
+:meth:`~ipyneugraph.NeuGraphWidget.push_state`, so playback is subject to
+the widget's frame rate limit, and mapped to node colors and/or sizes by
+the widget's :attr:`~ipyneugraph.NeuGraphWidget.style` in the frontend.
+"""
+
+import numpy as np
+from traitlets import HasTraits, Bool, Float, Int, Unicode, observe, validate
+
+_REDUCE = {
+    'last': lambda window: window[-1],
+    'mean': lambda window: window.mean(axis=0),
+    'max': lambda window: window.max(axis=0),
+}
+
+
+def _memmap(dataset):
+    """Memory-map ``dataset`` if its data is stored contiguously in the file.
+
+    Chunked, compressed and in-memory datasets are returned unchanged and
+    read through h5py.
+    """
+    if dataset.chunks is not None or dataset.compression is not None \
+            or dataset.dtype.kind not in 'biuf':
+        return dataset
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.file.driver not in ('sec2', 'stdio'):
+        return dataset
+    return np.memmap(dataset.file.filename, dtype=dataset.dtype, mode='r',
+                     offset=offset, shape=dataset.shape)
+
+
+def _uids(values):
+    return [u.decode('utf-8') if isinstance(u, bytes) else str(u) for u in values]
+
+
+class _Trace(object):
+    """One recorded variable, aligned with the store rows it applies to.
+    """
+
+    def __init__(self, data, uids):
+        if data.ndim != 2:
+            raise ValueError('recorded data must have shape (steps, neurons)')
+        self.data = data
+        self.uids = None if uids is None else _uids(uids)
+        self._node_ids = None
+
+    @property
+    def n_steps(self):
+        return self.data.shape[0]
+
+    def align(self, store):
+        """Dataset columns and store rows of the recorded nodes in ``store``.
+        """
+        # node_ids is replaced whenever nodes are added or removed
+        if self._node_ids is not store.node_ids:
+            if self.uids is None:
+                if self.data.shape[1] != store.n_nodes:
+                    raise ValueError('recording without uids has %d columns, expected %d'
+                                     % (self.data.shape[1], store.n_nodes))
+                self.columns = slice(None)
+                self.rows = np.arange(store.n_nodes)
+            else:
+                present = np.array([u in store for u in self.uids], dtype=bool)
+                self.columns = np.flatnonzero(present)
+                if len(self.columns) == len(self.uids):
+                    self.columns = slice(None)
+                self.rows = store.node_rows([u for u, p in zip(self.uids, present) if p])
+            self._node_ids = store.node_ids
+        return self.columns, self.rows
+
+    def read(self, stop, window, reduce):
+        """Reduce the ``window`` steps ending at ``stop`` (inclusive)."""
+        start = max(0, stop - window + 1)
+        return _REDUCE[reduce](np.asarray(self.data[start:stop + 1], dtype=np.float64))
+
+    def sample_range(self, samples=16):
+        """Value range estimated from a few evenly spaced steps."""
+        steps = np.unique(np.linspace(0, self.n_steps - 1, min(samples, self.n_steps)).astype(int))
+        values = np.concatenate([np.asarray(self.data[s], dtype=np.float64) for s in steps])
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return 0.0, 1.0
+        return float(values.min()), float(values.max())
+
+
+class Playback(HasTraits):
+    """Play back recorded node state on a :class:`~ipyneugraph.NeuGraphWidget`.
+
+    Parameters
+    ----------
+    widget : NeuGraphWidget
+        Widget whose nodes the recording refers to.
+    source : str or h5py.File or h5py.Group
+        HDF5 file or group holding the recorded variables.
+    color, size : str, optional
+        Recorded variables mapped to node color and node size. Their values
+        are stored as node attributes of the same name.
+    uids : str or sequence of str, optional
+        Node IDs of the recorded columns for variables stored as a bare
+        dataset; NeuroDriver groups carry their own ``uids``.
+    window : int, optional
+        Number of steps reduced into one frame.
+    reduce : {'last', 'mean', 'max'}, optional
+        Reduction over the window; use ``'max'`` for spike trains.
+    color_range, size_range : tuple of float, optional
+        Values mapped to the ends of the colormap and of ``node_sizes``;
+        estimated from a sample of steps if omitted.
+    colormap : str or sequence of str, optional
+        Colormap name or stops; see :mod:`ipyneugraph.style`.
+    node_sizes : tuple of float, optional
+        Rendered sizes of the smallest and largest values.
+    dt : float, optional
+        Duration of a step in seconds, used to label the controls.
+
+    Examples
+    --------
+    >>> player = widget.playback('lpu_output.h5', color='V', size='spike_state',
+    ...                          window=10, reduce='max')
+    >>> player.controls()
+    """
+
+    step = Int(0, help="Current time step.")
+    playing = Bool(False, help="Whether playback is advancing.")
+    fps = Float(30.0, help="Ticks per second while playing; each advances `stride` steps.")
+    stride = Int(1, help="Steps advanced per tick.")
+    loop = Bool(False, help="Restart from the first step at the end.")
+    time = Unicode('', read_only=True)
+
+    def __init__(self, widget, source, color=None, size=None, uids=None, window=1,
+                 reduce='last', color_range=None, size_range=None, colormap='coolwarm',
+                 node_sizes=(1.0, 10.0), dt=None, **kwargs):
+        if color is None and size is None:
+            raise ValueError('at least one of color and size must be given')
+        if reduce not in _REDUCE:
+            raise ValueError('reduce must be one of %s' % ', '.join(sorted(_REDUCE)))
+        self.widget = widget
+        self.window = window
+        self.reduce = reduce
+        self.dt = dt
+        self._file = None
+        if isinstance(source, str):
+            import h5py
+            source = self._file = h5py.File(source, 'r')
+        self._traces = {}
+        style = {}
+        if color is not None:
+            trace = self._traces[color] = self._trace(source, color, uids)
+            style['node_color'] = {'attr': color, 'colormap': colormap,
+                                   'domain': color_range or trace.sample_range()}
+        if size is not None:
+            trace = self._traces.setdefault(size, self._trace(source, size, uids))
+            style['node_size'] = {'attr': size, 'range': node_sizes,
+                                  'domain': size_range or trace.sample_range()}
+        self.n_steps = min(trace.n_steps for trace in self._traces.values())
+        self._timer = None
+        widget.set_style(**style)
+        super(Playback, self).__init__(**kwargs)
+        self._render()
+
+    @staticmethod
+    def _trace(source, name, uids):
+        node = source[name]
+        if hasattr(node, 'keys'):
+            return _Trace(_memmap(node['data']), node['uids'][()] if 'uids' in node else None)
+        if isinstance(uids, str):
+            uids = source[uids][()]
+        return _Trace(_memmap(node), uids)
+
+    @validate('step')
+    def _valid_step(self, proposal):
+        return int(np.clip(proposal['value'], 0, max(self.n_steps - 1, 0)))
+
+    @observe('step')
+    def _step_changed(self, change):
+        self._render()
+
+    @observe('playing')
+    def _playing_changed(self, change):
+        if change['new']:
+            if self.step >= self.n_steps - 1:
+                self.step = 0
+            self._start_timer()
+        else:
+            self._stop_timer()
+
+    @observe('fps')
+    def _fps_changed(self, change):
+        if self._timer is not None:
+            self._stop_timer()
+            self._start_timer()
+
+    def _render(self):
+        store = self.widget.graph
+        for name, trace in self._traces.items():
+            columns, rows = trace.align(store)
+            values = trace.read(self.step, self.window, self.reduce)[columns]
+            self.widget._push_rows({name: values.astype(np.float32)}, rows)
+        seconds = '' if self.dt is None else ' (%.4g s)' % (self.step * self.dt)
+        self.set_trait('time', 'step %d / %d%s' % (self.step, self.n_steps - 1, seconds))
+
+    def _tick(self):
+        if self.step + self.stride < self.n_steps:
+            self.step += self.stride
+        elif self.loop:
+            self.step = 0
+        else:
+            self.step = self.n_steps - 1
+            self.playing = False
+
+    def _start_timer(self):
+        from tornado.ioloop import PeriodicCallback
+        self._timer = PeriodicCallback(self._tick, 1000.0 / self.fps)
+        self._timer.start()
+
+    def _stop_timer(self):
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+
+    def play(self):
+        self.playing = True
+
+    def pause(self):
+        self.playing = False
+
+    def seek(self, step):
+        """Show ``step``; a float is interpreted as a time in seconds if
+        ``dt`` is set.
+        """
+        if isinstance(step, float) and self.dt is not None:
+            step = int(round(step / self.dt))
+        self.step = step
+
+    def close(self):
+        """Stop playback and close the file if it was opened from a path.
+        """
+        self.playing = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def controls(self):
+        """Play/pause button, step slider and time label linked to this
+        playback.
+        """
+        from ipywidgets import HBox, IntSlider, Label, ToggleButton, dlink, link
+        button = ToggleButton(value=self.playing, icon='play', tooltip='Play / pause',
+                              layout={'width': '3em'})
+        slider = IntSlider(value=self.step, min=0, max=max(self.n_steps - 1, 0),
+                           readout=False, continuous_update=True, layout={'flex': '1'})
+        label = Label(self.time)
+        link((self, 'playing'), (button, 'value'))
+        link((self, 'step'), (slider, 'value'))
+        dlink((self, 'time'), (label, 'value'))
+        button.observe(lambda change: setattr(button, 'icon', 'pause' if change['new'] else 'play'),
+                       'value')
+        return HBox([button, slider, label])
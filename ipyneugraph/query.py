@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Vectorized selection of nodes and edges.
+
+Selections are boolean masks over the rows of a
+:class:`~ipyneugraph.store.GraphStore`. Attribute expressions such as
+``"class == 'LeakyIAF' and V_th < -50"`` are parsed with :mod:`ast` and
+evaluated as whole-column NumPy operations; neighbourhoods and paths are
+frontier expansions over the store's CSR adjacency, i.e. sparse
+matrix-vector products with the adjacency matrix. Weighted shortest paths
+use Dijkstra's algorithm on the same adjacency, relaxing all edges of a
+node at once.
+"""
+
+import ast
+import heapq
+import io
+import keyword
+import operator
+import tokenize
+
+import numpy as np
+
+from .layout import _ragged_arange
+
+_KEYWORD_PREFIX = '_kw_'
+
+_BINARY = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+}
+
+_COMPARE = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.In: lambda a, b: np.isin(a, list(b)),
+    ast.NotIn: lambda a, b: ~np.isin(a, list(b)),
+}
+
+_FUNCTIONS = {'abs': np.abs, 'isnan': np.isnan}
+
+
+def _escape_keywords(expr):
+    """Rename keywords used as attribute names, e.g. ``class``."""
+    operators = {'and', 'or', 'not', 'in', 'is', 'True', 'False', 'None'}
+    tokens = []
+    for tok in tokenize.generate_tokens(io.StringIO(expr).readline):
+        if tok.type == tokenize.NAME and keyword.iskeyword(tok.string) \
+                and tok.string not in operators:
+            tokens.append((tok.type, _KEYWORD_PREFIX + tok.string))
+        else:
+            tokens.append((tok.type, tok.string))
+    return tokenize.untokenize(tokens)
+
+
+class _Evaluator(object):
+
+    def __init__(self, lookup, length):
+        self.lookup = lookup
+        self.length = length
+
+    def visit(self, node):
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body)
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = self.visit(node.values[0])
+            for value in node.values[1:]:
+                result = combine(result, self.visit(value))
+            return result
+        if isinstance(node, ast.UnaryOp):
+            operand = self.visit(node.operand)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        if isinstance(node, ast.Compare):
+            result = True
+            left = self.visit(node.left)
+            for op, right in zip(node.ops, node.comparators):
+                right = self.visit(right)
+                result = np.logical_and(result, _COMPARE[type(op)](left, right))
+                left = right
+            return result
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            return _BINARY[type(node.op)](self.visit(node.left), self.visit(node.right))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+                and node.func.id in _FUNCTIONS and not node.keywords:
+            return _FUNCTIONS[node.func.id](*[self.visit(a) for a in node.args])
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name.startswith(_KEYWORD_PREFIX):
+                name = name[len(_KEYWORD_PREFIX):]
+            return self.lookup(name)
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return [self.visit(e) for e in node.elts]
+        raise ValueError('unsupported expression: %s' % ast.dump(node))
+
+
+def evaluate(expr, lookup, length):
+    """Evaluate a boolean expression over columns.
+
+    Parameters
+    ----------
+    expr : str
+        Expression using comparisons, ``and``/``or``/``not``, ``in``,
+        arithmetic, ``abs()`` and ``isnan()``. Names refer to columns.
+    lookup : callable
+        Returns the column of a name; raises ``KeyError`` if unknown.
+    length : int
+        Number of rows.
+
+    Returns
+    -------
+    ndarray of bool
+    """
+    tree = ast.parse(_escape_keywords(expr).strip(), mode='eval')
+    try:
+        mask = _Evaluator(lookup, length).visit(tree)
+    except KeyError as e:
+        raise ValueError('unknown attribute %s in %r' % (e, expr))
+    mask = np.asarray(mask)
+    if mask.dtype != bool:
+        raise ValueError('expression %r does not evaluate to a boolean' % expr)
+    return np.broadcast_to(mask, (length,)).copy()
+
+
+def _node_lookup(store):
+    def lookup(name):
+        if name == 'id':
+            return store.node_ids
+        if name in store.node_attrs or any(name in t for _, t in store.node_tables.values()):
+            return store.node_column(name)
+        if name == 'degree':
+            return store.degree()
+        if name == 'in_degree':
+            return np.diff(store.in_csr()[0])
+        if name == 'out_degree':
+            return np.diff(store.out_csr()[0])
+        raise KeyError(name)
+    return lookup
+
+
+def _edge_lookup(store):
+    def lookup(name):
+        if name in store.edge_attrs or any(name in t for _, t in store.edge_tables.values()):
+            return store.edge_column(name)
+        if name == 'key':
+            return store.edge_keys
+        if name == 'source':
+            return store.node_ids[store.source]
+        if name == 'target':
+            return store.node_ids[store.target]
+        raise KeyError(name)
+    return lookup
+
+
+def node_mask(store, selector):
+    """Boolean node mask from an expression, a mask or a sequence of IDs.
+
+    ``None`` selects every node.
+    """
+    if selector is None:
+        return np.ones(store.n_nodes, dtype=bool)
+    if isinstance(selector, str):
+        return evaluate(selector, _node_lookup(store), store.n_nodes)
+    selector = np.asarray(selector)
+    if selector.dtype == bool:
+        if selector.shape != (store.n_nodes,):
+            raise ValueError('node mask must have length %d' % store.n_nodes)
+        return selector.copy()
+    mask = np.zeros(store.n_nodes, dtype=bool)
+    mask[store.node_rows([str(n) for n in selector])] = True
+    return mask
+
+
+def edge_mask(store, selector):
+    """Boolean edge mask from an expression, a mask or a sequence of keys.
+
+    ``None`` selects every edge.
+    """
+    if selector is None:
+        return np.ones(store.n_edges, dtype=bool)
+    if isinstance(selector, str):
+        return evaluate(selector, _edge_lookup(store), store.n_edges)
+    selector = np.asarray(selector)
+    if selector.dtype == bool:
+        if selector.shape != (store.n_edges,):
+            raise ValueError('edge mask must have length %d' % store.n_edges)
+        return selector.copy()
+    mask = np.zeros(store.n_edges, dtype=bool)
+    mask[store.edge_rows(selector)] = True
+    return mask
+
+
+def _adjacency(store, direction):
+    if direction == 'out':
+        return [store.out_csr()]
+    if direction == 'in':
+        return [store.in_csr()]
+    if direction == 'both':
+        return [store.out_csr(), store.in_csr()]
+    raise ValueError("direction must be 'out', 'in' or 'both'")
+
+
+def expand(csrs, rows):
+    """Neighbour rows of ``rows`` (with repetitions) in the given CSR
+    adjacencies.
+    """
+    found = []
+    for indptr, indices, _ in csrs:
+        starts = indptr[rows]
+        counts = indptr[rows + 1] - starts
+        found.append(indices[np.repeat(starts, counts) + _ragged_arange(counts)])
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def hop_distance(store, mask, max_hops=None, direction='both'):
+    """Breadth-first hop distance of every node from the nodes in ``mask``.
+
+    Returns an int array with ``-1`` for nodes not reached within
+    ``max_hops``.
+    """
+    csrs = _adjacency(store, direction)
+    dist = np.full(store.n_nodes, -1, dtype=np.int64)
+    frontier = np.flatnonzero(mask)
+    dist[frontier] = 0
+    hop = 0
+    while len(frontier) and (max_hops is None or hop < max_hops):
+        hop += 1
+        reached = expand(csrs, frontier)
+        frontier = np.unique(reached[dist[reached] < 0])
+        dist[frontier] = hop
+    return dist
+
+
+def neighborhood(store, mask, hops, direction='both'):
+    """Nodes within ``hops`` hops of the nodes in ``mask``."""
+    return hop_distance(store, mask, hops, direction) >= 0
+
+
+def paths_between(store, sources, targets, max_length):
+    """Nodes and edges on directed paths of at most ``max_length`` edges
+    from a node of ``sources`` to a node of ``targets``.
+
+    Returns ``(node_mask, edge_mask)``.
+    """
+    forward = hop_distance(store, sources, max_length, 'out').astype(np.float64)
+    backward = hop_distance(store, targets, max_length, 'in').astype(np.float64)
+    forward[forward < 0] = np.inf
+    backward[backward < 0] = np.inf
+    nodes = forward + backward <= max_length
+    edges = forward[store.source] + 1 + backward[store.target] <= max_length
+    return nodes, edges
+
+
+def dijkstra(store, mask, weights, max_distance=np.inf, direction='out'):
+    """Weighted distance of every node from the nodes in ``mask``.
+
+    ``weights`` are non-negative edge lengths in store row order. Returns a
+    float array with ``inf`` for nodes farther than ``max_distance``.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if (weights < 0).any():
+        raise ValueError('edge weights must be non-negative')
+    csrs = [(indptr, neighbours, weights[edges])
+            for indptr, neighbours, edges in _adjacency(store, direction)]
+    dist = np.full(store.n_nodes, np.inf)
+    heap = [(0.0, row) for row in np.flatnonzero(mask).tolist()]
+    dist[[row for _, row in heap]] = 0.0
+    done = np.zeros(store.n_nodes, dtype=bool)
+    while heap:
+        d, row = heapq.heappop(heap)
+        if done[row]:
+            continue
+        if d > max_distance:
+            break
+        done[row] = True
+        for indptr, neighbours, lengths in csrs:
+            lo, hi = indptr[row], indptr[row + 1]
+            # relax all edges of the node at once
+            cand = d + lengths[lo:hi]
+            rows = neighbours[lo:hi]
+            better = cand < dist[rows]
+            for r, c in zip(rows[better].tolist(), cand[better].tolist()):
+                if c < dist[r]:
+                    dist[r] = c
+                    heapq.heappush(heap, (c, r))
+    dist[dist > max_distance] = np.inf
+    return dist
+
+
+def shortest_paths(store, sources, targets, weights=None):
+    """Nodes and edges on the shortest directed paths from a node of
+    ``sources`` to a node of ``targets``.
+
+    Paths are counted in edges (breadth-first search), or measured with
+    the edge lengths ``weights`` (Dijkstra). Every shortest path is
+    included. Returns ``(node_mask, edge_mask)``, empty if no path exists.
+    """
+    if weights is None:
+        dist = hop_distance(store, sources, direction='out')[np.flatnonzero(targets)]
+        dist = dist[dist >= 0]
+        if not len(dist):
+            return np.zeros(store.n_nodes, dtype=bool), np.zeros(store.n_edges, dtype=bool)
+        return paths_between(store, sources, targets, dist.min())
+    forward = dijkstra(store, sources, weights, direction='out')
+    length = forward[np.asarray(targets, dtype=bool)].min(initial=np.inf)
+    if np.isinf(length):
+        return np.zeros(store.n_nodes, dtype=bool), np.zeros(store.n_edges, dtype=bool)
+    backward = dijkstra(store, targets, weights, length, direction='in')
+    tol = 1e-9 * max(length, 1.0)
+    nodes = forward + backward <= length + tol
+    edges = forward[store.source] + weights + backward[store.target] <= length + tol
+    return nodes, edges
+
+
+def select(store, nodes=None, edges=None, hops=0, direction='both', between=None,
+           max_length=3):
+    """Select a subgraph.
+
+    Parameters
+    ----------
+    store : GraphStore
+    nodes : str, array_like of bool or sequence of str, optional
+        Node expression, mask or IDs; all nodes if omitted.
+    edges : str, array_like of bool or sequence of int, optional
+        Edge expression, mask or keys; all edges if omitted.
+    hops : int, optional
+        Extend the node selection to its neighbourhood within ``hops``.
+    direction : {'both', 'out', 'in'}, optional
+        Edge direction followed by ``hops``.
+    between : tuple, optional
+        ``(sources, targets)`` node selectors; restricts the selection to
+        the directed paths of at most ``max_length`` edges between them.
+    max_length : int, optional
+        Maximum path length for ``between``.
+
+    Returns
+    -------
+    node_mask, edge_mask : ndarray of bool
+        Selected edges always have both endpoints selected.
+    """
+    nmask = node_mask(store, nodes)
+    if hops:
+        nmask = neighborhood(store, nmask, hops, direction)
+    emask = edge_mask(store, edges)
+    if between is not None:
+        on_path, path_edges = paths_between(store, node_mask(store, between[0]),
+                                            node_mask(store, between[1]), max_length)
+        nmask &= on_path
+        emask &= path_edges
+    emask &= nmask[store.source] & nmask[store.target]
+    return nmask, emask
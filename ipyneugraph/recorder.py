@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Live spike raster and traces of selected neurons.
+
+A :class:`Recorder` keeps the latest samples of a traced variable (e.g. the
+membrane voltage) and the latest spikes of a few neurons in fixed-size
+:class:`RingBuffer` s, so memory stays bounded however long the simulation
+runs. At most once per frame interval it sends the samples and spikes
+recorded since the previous message, as binary arrays; the frontend keeps
+ring buffers of the same size and draws the widget's side panel from them.
+Histories are only sent in full when a frontend asks for them, e.g. after a
+page reload.
+"""
+
+import time
+
+import numpy as np
+
+from .serializers import array_to_binary
+from .sync import _schedule_on_ioloop
+
+
+class RingBuffer(object):
+    """The latest ``capacity`` rows appended to a stream.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of rows kept.
+    shape : tuple, optional
+        Shape of a row.
+    dtype : numpy.dtype, optional
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        self.data = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        # rows ever appended; row i is kept at i % capacity
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.data)
+
+    @property
+    def start(self):
+        """Index of the oldest row kept."""
+        return max(0, self.count - self.capacity)
+
+    def __len__(self):
+        return self.count - self.start
+
+    def append(self, rows):
+        """Append ``rows``, overwriting the oldest ones when full."""
+        rows = np.asarray(rows, dtype=self.data.dtype)
+        n = len(rows)
+        if n > self.capacity:
+            rows = rows[n - self.capacity:]
+        pos = (self.count + n - len(rows)) % self.capacity
+        first = min(len(rows), self.capacity - pos)
+        self.data[pos:pos + first] = rows[:first]
+        self.data[:len(rows) - first] = rows[first:]
+        self.count += n
+
+    def since(self, index):
+        """Copy of the rows appended from ``index`` on that are still kept,
+        oldest first.
+        """
+        index = max(index, self.start)
+        n = self.count - index
+        pos = index % self.capacity
+        if pos + n <= self.capacity:
+            return self.data[pos:pos + n].copy()
+        return np.concatenate([self.data[pos:], self.data[:pos + n - self.capacity]])
+
+    def clear(self):
+        self.count = 0
+
+
+class Recorder(object):
+    """Ring-buffered traces and spikes of selected neurons, drawn in the
+    widget's side panel.
+
+    Created by :meth:`~ipyneugraph.NeuGraphWidget.record`.
+
+    Parameters
+    ----------
+    send : callable
+        Called with the ``samples`` message content to transmit.
+    neurons : list of str
+        IDs of the recorded neurons, in panel order.
+    capacity : int, optional
+        Number of trace samples kept.
+    spike_capacity : int, optional
+        Number of spikes kept.
+    interval : float, optional
+        Minimum number of seconds between two messages.
+    clock, schedule : callable, optional
+        As for :class:`~ipyneugraph.sync.FrameThrottle`.
+    """
+
+    def __init__(self, send, neurons, capacity=10000, spike_capacity=100000,
+                 interval=1 / 30., clock=time.monotonic, schedule=_schedule_on_ioloop):
+        self._send = send
+        self.neurons = list(neurons)
+        self.interval = interval
+        self._clock = clock
+        self._schedule = schedule
+        self.times = RingBuffer(capacity)
+        self.values = RingBuffer(capacity, (len(self.neurons),), np.float32)
+        self.spike_times = RingBuffer(spike_capacity)
+        self.spike_units = RingBuffer(spike_capacity, dtype=np.uint32)
+        self._sent = 0
+        self._spikes_sent = 0
+        self._reset = False
+        self._last_sent = -np.inf
+        self._scheduled = False
+
+    def record(self, t, values=None, spikes=None):
+        """Append the state of the recorded neurons at time(s) ``t``.
+
+        Parameters
+        ----------
+        t : float or array_like
+            Time of one step, or of several steps.
+        values : array_like, optional
+            Traced values, of shape ``(neurons,)`` or ``(steps, neurons)``.
+        spikes : array_like, optional
+            Spike flags, of the same shape as ``values``.
+        """
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        shape = (len(t), len(self.neurons))
+        if values is not None:
+            self.times.append(t)
+            self.values.append(np.asarray(values, dtype=np.float32).reshape(shape))
+        if spikes is not None:
+            steps, units = np.nonzero(np.asarray(spikes, dtype=bool).reshape(shape))
+            self.spike_times.append(t[steps])
+            self.spike_units.append(units)
+        self.maybe_flush()
+
+    def resend(self):
+        """Send the whole history kept, replacing the frontend's."""
+        self._sent = self.times.start
+        self._spikes_sent = self.spike_times.start
+        self._reset = True
+        self.flush()
+
+    def clear(self):
+        for ring in (self.times, self.values, self.spike_times, self.spike_units):
+            ring.clear()
+        self.resend()
+
+    def maybe_flush(self):
+        """Send new samples if the rate limit allows."""
+        now = self._clock()
+        wait = self._last_sent + self.interval - now
+        if wait > 0:
+            self._schedule_flush(wait)
+            return False
+        self.flush(now)
+        return True
+
+    def flush(self, now=None):
+        """Send the samples and spikes recorded since the last message."""
+        if not self._reset and self._sent == self.times.count \
+                and self._spikes_sent == self.spike_times.count:
+            return
+        content = {
+            'method': 'samples',
+            'reset': self._reset,
+            't': array_to_binary(self.times.since(self._sent)),
+            'values': array_to_binary(self.values.since(self._sent)),
+            'spike_t': array_to_binary(self.spike_times.since(self._spikes_sent)),
+            'spike_unit': array_to_binary(self.spike_units.since(self._spikes_sent)),
+        }
+        self._sent = self.times.count
+        self._spikes_sent = self.spike_times.count
+        self._reset = False
+        self._last_sent = self._clock() if now is None else now
+        self._send(content)
+
+    def _schedule_flush(self, delay):
+        if self._scheduled or self._schedule is None:
+            return
+        self._scheduled = True
+
+        def trailing():
+            self._scheduled = False
+            self.maybe_flush()
+
+        self._schedule(delay, trailing)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Binary serialization of graph payloads.
+
+Every column of a graph payload is turned into a ``{dtype, shape, buffer}``
+dictionary whose ``buffer`` is a ``memoryview``. ipywidgets strips those
+values out of the JSON state and ships them as the comm's binary buffers,
+so array data never goes through the JSON encoder. The matching
+deserializers live in ``src/serializers.ts``.
+"""
+
+import numpy as np
+
+from .codec import decode
+from .store import GraphStore
+
+# dtypes the frontend can view as a TypedArray without copying
+_WIRE_DTYPES = {
+    'bool', 'int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32',
+    'float32', 'float64',
+}
+
+# separator used to pack string columns into a single UTF-8 buffer
+STRING_SEPARATOR = '\0'
+
+
+def _wire_array(ar):
+    """Cast an array to a contiguous little-endian dtype the frontend knows."""
+    ar = np.asarray(ar)
+    if ar.dtype.kind == 'i' and ar.dtype.itemsize > 4:
+        ar = ar.astype(np.int32 if _fits(ar, np.int32) else np.float64)
+    elif ar.dtype.kind == 'u' and ar.dtype.itemsize > 4:
+        ar = ar.astype(np.uint32 if _fits(ar, np.uint32) else np.float64)
+    elif ar.dtype.kind == 'f' and ar.dtype.itemsize == 2:
+        ar = ar.astype(np.float32)
+    if ar.dtype.name not in _WIRE_DTYPES:
+        raise ValueError('Unsupported dtype for binary transfer: %s' % ar.dtype)
+    if ar.dtype.byteorder == '>':
+        ar = ar.astype(ar.dtype.newbyteorder('<'))
+    return np.ascontiguousarray(ar)
+
+
+def _fits(ar, dtype):
+    if ar.size == 0:
+        return True
+    info = np.iinfo(dtype)
+    return ar.min() >= info.min and ar.max() <= info.max
+
+
+def _is_string_array(ar):
+    return ar.dtype.kind in 'USO'
+
+
+def array_to_binary(ar):
+    """Serialize a numeric NumPy array as a ``{dtype, shape, buffer}`` dict.
+    """
+    if ar is None:
+        return None
+    ar = _wire_array(ar)
+    return {
+        'dtype': ar.dtype.name,
+        'shape': list(ar.shape),
+        'buffer': memoryview(ar.view(np.uint8).reshape(-1)),
+    }
+
+
+def array_from_binary(value):
+    """Deserialize a ``{dtype, shape, buffer}`` dict into a NumPy array.
+    """
+    if value is None:
+        return None
+    if 'codec' in value:
+        value = decode(value)
+    ar = np.frombuffer(value['buffer'], dtype=np.dtype(value['dtype']).newbyteorder('<'))
+    ar = ar.reshape(value['shape'])
+    if 'categories' in value:
+        return np.asarray(value['categories'], dtype=object)[ar]
+    return ar
+
+
+def strings_to_binary(strings):
+    """Serialize a sequence of strings as one separator-joined UTF-8 buffer.
+    """
+    strings = [str(s) for s in strings]
+    data = STRING_SEPARATOR.join(strings).encode('utf-8')
+    return {
+        'dtype': 'str',
+        'shape': [len(strings)],
+        'buffer': memoryview(data),
+    }
+
+
+def strings_from_binary(value):
+    """Deserialize a string column packed by :func:`strings_to_binary`.
+    """
+    if 'codec' in value:
+        value = decode(value)
+    if value['shape'][0] == 0:
+        return np.empty(0, dtype=object)
+    data = bytes(value['buffer']).decode('utf-8')
+    return np.array(data.split(STRING_SEPARATOR), dtype=object)
+
+
+def categorical_to_binary(values):
+    """Serialize a string attribute column as integer codes plus categories.
+
+    Attributes such as a neuron's model ``class`` take a handful of distinct
+    values over hundreds of thousands of nodes, so only the codes go into the
+    binary buffer and the categories travel as a short JSON list.
+    """
+    categories, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    if len(categories) <= np.iinfo(np.uint8).max:
+        codes = codes.astype(np.uint8)
+    elif len(categories) <= np.iinfo(np.uint16).max:
+        codes = codes.astype(np.uint16)
+    else:
+        codes = codes.astype(np.uint32)
+    value = array_to_binary(codes)
+    value['categories'] = categories.tolist()
+    return value
+
+
+def column_to_binary(values):
+    """Serialize an attribute column, picking the encoding from its dtype.
+
+    String columns are sent as categoricals unless most values are distinct
+    (e.g. neuron names), in which case they are packed like node IDs.
+    """
+    if values is None:
+        return None
+    values = np.asarray(values)
+    if _is_string_array(values):
+        value = categorical_to_binary(values)
+        if len(value['categories']) > max(len(values) // 2, 256):
+            return strings_to_binary(values)
+        return value
+    return array_to_binary(values)
+
+
+def column_from_binary(value):
+    """Deserialize any column produced by :func:`column_to_binary` or
+    :func:`strings_to_binary`.
+    """
+    if value is None:
+        return None
+    if value['dtype'] == 'str':
+        return strings_from_binary(value)
+    return array_from_binary(value)
+
+
+def _columns_to_binary(columns):
+    return {name: column_to_binary(col) for name, col in (columns or {}).items()}
+
+
+def _columns_from_binary(columns):
+    return {name: column_from_binary(col) for name, col in (columns or {}).items()}
+
+
+def _tables_to_binary(tables):
+    return {
+        name: {'rows': array_to_binary(np.asarray(rows, dtype=np.uint32)),
+               'attrs': _columns_to_binary(columns)}
+        for name, (rows, columns) in (tables or {}).items()
+    }
+
+
+def _tables_from_binary(tables):
+    return {
+        name: (array_from_binary(table['rows']), _columns_from_binary(table.get('attrs')))
+        for name, table in (tables or {}).items()
+    }
+
+
+def graph_to_json(graph, widget):
+    """Serialize a graph payload for the ``graph`` trait.
+
+    The payload is a :class:`~ipyneugraph.store.GraphStore` or a dictionary::
+
+        {
+            'nodes': {'id': <N strings>, 'attrs': {name: <N values>},
+                      'tables': {class: (<rows>, {name: <values per row>})}},
+            'edges': {'id': <E ints>, 'source': <E ints>, 'target': <E ints>,
+                      'attrs': {name: <E values>}, 'tables': {...}},
+        }
+
+    where ``source`` and ``target`` index into ``nodes['id']``, the optional
+    edge ``id`` holds the keys used by incremental updates and the optional
+    ``tables`` hold class-specific attributes for some rows only. The
+    widget's edit epoch is added, for the frontend to send back with edits.
+
+    Buffers are encoded with the widget's negotiated codecs, if any (see
+    :mod:`ipyneugraph.codec`).
+    """
+    if graph is None:
+        return None
+    if isinstance(graph, GraphStore):
+        graph = graph.to_payload()
+    nodes = graph.get('nodes', {})
+    edges = graph.get('edges', {})
+    source = np.asarray(edges.get('source', ()), dtype=np.uint32)
+    keys = edges.get('id')
+    if keys is None:
+        keys = np.arange(len(source), dtype=np.uint32)
+    result = {
+        'nodes': {
+            'id': strings_to_binary(nodes.get('id', ())),
+            'attrs': _columns_to_binary(nodes.get('attrs')),
+            'tables': _tables_to_binary(nodes.get('tables')),
+        },
+        'edges': {
+            'id': array_to_binary(np.asarray(keys, dtype=np.uint32)),
+            'source': array_to_binary(source),
+            'target': array_to_binary(np.asarray(edges.get('target', ()), dtype=np.uint32)),
+            'attrs': _columns_to_binary(edges.get('attrs')),
+            'tables': _tables_to_binary(edges.get('tables')),
+        },
+    }
+    epoch = getattr(widget, '_edit_epoch', None)
+    if epoch is not None:
+        result['epoch'] = epoch
+    policy = getattr(widget, '_codec', None)
+    if policy is not None:
+        policy.encode_all(result)
+    return result
+
+
+def graph_from_json(value, widget):
+    """Deserialize a graph payload produced by :func:`graph_to_json` into a
+    :class:`~ipyneugraph.store.GraphStore`.
+    """
+    if value is None:
+        return None
+    nodes = value.get('nodes', {})
+    edges = value.get('edges', {})
+    return GraphStore.from_payload({
+        'nodes': {
+            'id': column_from_binary(nodes['id']),
+            'attrs': _columns_from_binary(nodes.get('attrs')),
+            'tables': _tables_from_binary(nodes.get('tables')),
+        },
+        'edges': {
+            'id': array_from_binary(edges.get('id')),
+            'source': array_from_binary(edges['source']),
+            'target': array_from_binary(edges['target']),
+            'attrs': _columns_from_binary(edges.get('attrs')),
+            'tables': _tables_from_binary(edges.get('tables')),
+        },
+    })
+
+
+graph_serialization = dict(to_json=graph_to_json, from_json=graph_from_json)
@@ -0,0 +1,536 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Columnar in-kernel graph store backing :class:`~ipyneugraph.NeuGraphWidget`.
+
+Nodes and edges live in flat integer arrays (edges as COO ``source`` /
+``target`` rows, with CSR/CSC adjacency built on demand) and attributes in
+NumPy columns. Attributes shared by all elements are full-length columns;
+attributes specific to a model class, such as a neuron model's parameters,
+live in per-class tables holding only that class's rows, so heterogeneous
+NeuroDriver circuits do not pay for one padded column per parameter.
+"""
+
+import hashlib
+import sys
+
+import numpy as np
+
+
+def _fill_value(dtype):
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind in 'OUS':
+        return ''
+    return 0
+
+
+def _empty_like(column, length):
+    column = np.asarray(column)
+    dtype = object if column.dtype.kind in 'US' else column.dtype
+    out = np.empty((length,) + column.shape[1:], dtype=dtype)
+    out[...] = _fill_value(out.dtype)
+    return out
+
+
+def _as_column(values, length, name):
+    values = np.asarray(values)
+    if values.dtype.kind in 'US':
+        values = values.astype(object)
+    if values.ndim == 0:
+        values = np.full(length, values[()], dtype=values.dtype)
+    if len(values) != length:
+        raise ValueError('attribute %r has length %d, expected %d'
+                         % (name, len(values), length))
+    return values
+
+
+def _append_columns(columns, n_old, new_columns, n_new):
+    """Append ``n_new`` rows to ``columns`` in place, padding missing values.
+    """
+    for name, values in new_columns.items():
+        values = _as_column(values, n_new, name)
+        if name not in columns:
+            columns[name] = np.concatenate([_empty_like(values, n_old), values])
+        else:
+            column = columns[name]
+            dtype = np.result_type(column, values) if column.dtype != values.dtype else column.dtype
+            columns[name] = np.concatenate([column.astype(dtype), values.astype(dtype)])
+    for name, column in columns.items():
+        if name not in new_columns:
+            columns[name] = np.concatenate([column, _empty_like(column, n_new)])
+
+
+def _padded(column, length):
+    """Column of ``length`` missing values able to hold ``column``'s values.
+    """
+    if column.dtype.kind in 'OUS':
+        return np.full(length, '', dtype=object)
+    return np.full(length, np.nan, dtype=np.result_type(column.dtype, np.float32))
+
+
+def _filter_tables(tables, keep):
+    """Drop the rows of per-class tables where ``keep`` is false and
+    renumber the remaining ones.
+    """
+    remap = np.cumsum(keep) - 1
+    for name, (rows, columns) in list(tables.items()):
+        kept = keep[rows]
+        if not kept.any():
+            del tables[name]
+        elif not kept.all():
+            tables[name] = (remap[rows[kept]], {k: v[kept] for k, v in columns.items()})
+        else:
+            tables[name] = (remap[rows], columns)
+
+
+def _gather(columns, tables, rows):
+    """Attribute values of ``rows``, padding class attributes for rows of
+    other classes.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    out = {name: column[rows] for name, column in columns.items()}
+    for table_rows, table in tables.values():
+        pos = np.minimum(np.searchsorted(table_rows, rows), max(len(table_rows) - 1, 0))
+        hit = table_rows[pos] == rows if len(table_rows) else np.zeros(len(rows), dtype=bool)
+        for name, column in table.items():
+            if name not in out:
+                out[name] = _padded(column, len(rows))
+            out[name][hit] = column[pos[hit]]
+    return out
+
+
+def _set_table_columns(tables, rows, new_columns):
+    """Assign class attributes at ``rows``; every row must belong to a
+    table having the attribute.
+    """
+    for name, values in new_columns.items():
+        values = _as_column(values, len(rows), name)
+        assigned = np.zeros(len(rows), dtype=bool)
+        for table_rows, table in tables.values():
+            if name not in table:
+                continue
+            pos = np.minimum(np.searchsorted(table_rows, rows), len(table_rows) - 1)
+            hit = table_rows[pos] == rows
+            column = table[name]
+            if np.result_type(column, values) != column.dtype:
+                column = table[name] = column.astype(np.result_type(column, values))
+            column[pos[hit]] = values[hit]
+            assigned |= hit
+        if not assigned.all():
+            raise ValueError('attribute %r is specific to classes that %d of the rows '
+                             'do not belong to' % (name, (~assigned).sum()))
+
+
+def _extend_tables(tables, other_tables, start, stop):
+    """Append the table rows of ``other_tables`` in ``[start, stop)``."""
+    for name, (rows, columns) in other_tables.items():
+        lo, hi = np.searchsorted(rows, [start, stop])
+        if lo == hi:
+            continue
+        new_rows = rows[lo:hi]
+        new_columns = {k: v[lo:hi] for k, v in columns.items()}
+        if name in tables:
+            old_rows, old_columns = tables[name]
+            new_rows = np.concatenate([old_rows, new_rows])
+            new_columns = {k: np.concatenate([old_columns[k], v]) for k, v in new_columns.items()}
+        tables[name] = (new_rows, new_columns)
+
+
+def _split_attrs(tables, attrs):
+    names = set()
+    for _, table in tables.values():
+        names.update(table)
+    shared = {k: v for k, v in attrs.items() if k not in names}
+    specific = {k: v for k, v in attrs.items() if k in names}
+    return shared, specific
+
+
+def _set_columns(columns, length, rows, new_columns):
+    """Assign ``new_columns`` at ``rows``, creating columns as needed.
+    """
+    for name, values in new_columns.items():
+        values = _as_column(values, len(rows), name)
+        if name not in columns:
+            columns[name] = _empty_like(values, length)
+        column = columns[name]
+        if column.dtype != values.dtype and np.result_type(column, values) != column.dtype:
+            column = columns[name] = column.astype(np.result_type(column, values))
+        column[rows] = values
+
+
+class GraphStore(object):
+    """Directed multigraph kept as columnar arrays.
+
+    Nodes are identified by string IDs and stored in insertion order; edges
+    are stored as parallel ``source``/``target`` arrays of node rows together
+    with a stable, monotonically increasing integer key. Attributes are
+    dictionaries of NumPy columns aligned with the node or edge rows.
+
+    Class-specific attributes are kept in ``node_tables`` / ``edge_tables``,
+    which map a class name to ``(rows, {name: column})`` with sorted rows;
+    :meth:`node_column` and :meth:`gather_node_attrs` read both kinds.
+    """
+
+    def __init__(self):
+        self.node_ids = np.empty(0, dtype=object)
+        self.node_attrs = {}
+        self.node_tables = {}
+        self.edge_keys = np.empty(0, dtype=np.uint32)
+        self.source = np.empty(0, dtype=np.uint32)
+        self.target = np.empty(0, dtype=np.uint32)
+        self.edge_attrs = {}
+        self.edge_tables = {}
+        self._index = {}
+        self._next_edge_key = 0
+        self._adjacency = {}
+
+    @classmethod
+    def from_arrays(cls, node_ids, source, target, node_attrs=None, edge_attrs=None,
+                    node_tables=None, edge_tables=None):
+        """Build a store from node IDs and edge endpoint rows.
+
+        ``node_tables`` and ``edge_tables`` optionally hold class-specific
+        attributes as ``{class: (rows, {name: column})}``.
+        """
+        store = cls()
+        store.add_nodes(node_ids, node_attrs)
+        source = np.asarray(source, dtype=np.int64)
+        target = np.asarray(target, dtype=np.int64)
+        if source.shape != target.shape:
+            raise ValueError('source and target must have the same length')
+        if source.size and max(source.max(), target.max()) >= store.n_nodes:
+            raise ValueError('edge endpoints must index into node_ids')
+        store._append_edges(source, target, edge_attrs)
+        store.node_tables = _as_tables(node_tables, store.n_nodes)
+        store.edge_tables = _as_tables(edge_tables, store.n_edges)
+        return store
+
+    @property
+    def n_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self):
+        return len(self.edge_keys)
+
+    def __len__(self):
+        return self.n_nodes
+
+    def __contains__(self, node_id):
+        return node_id in self._index
+
+    def node_rows(self, node_ids):
+        """Rows of the given node IDs; raises ``KeyError`` for unknown IDs.
+        """
+        index = self._index
+        return np.fromiter((index[n] for n in node_ids), dtype=np.int64, count=len(node_ids))
+
+    def edge_rows(self, keys):
+        """Rows of the given edge keys; raises ``KeyError`` for unknown keys.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        rows = np.searchsorted(self.edge_keys, keys)
+        valid = rows < self.n_edges
+        valid[valid] = self.edge_keys[rows[valid]] == keys[valid]
+        if not valid.all():
+            raise KeyError(keys[~valid].tolist())
+        return rows
+
+    def out_csr(self):
+        """Outgoing adjacency as ``(indptr, target rows, edge rows)``.
+
+        The neighbours of node row ``i`` are ``targets[indptr[i]:indptr[i + 1]]``.
+        Built on first use and cached until the structure changes.
+        """
+        return self._csr('out', self.source, self.target)
+
+    def in_csr(self):
+        """Incoming adjacency as ``(indptr, source rows, edge rows)``."""
+        return self._csr('in', self.target, self.source)
+
+    def _csr(self, kind, rows, cols):
+        if kind not in self._adjacency:
+            order = np.argsort(rows, kind='stable')
+            indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=self.n_nodes), out=indptr[1:])
+            self._adjacency[kind] = (indptr, cols[order], order)
+        return self._adjacency[kind]
+
+    def successors(self, node_id):
+        """IDs of the targets of ``node_id``'s outgoing edges."""
+        indptr, targets, _ = self.out_csr()
+        row = self._index[node_id]
+        return self.node_ids[targets[indptr[row]:indptr[row + 1]]]
+
+    def predecessors(self, node_id):
+        """IDs of the sources of ``node_id``'s incoming edges."""
+        indptr, sources, _ = self.in_csr()
+        row = self._index[node_id]
+        return self.node_ids[sources[indptr[row]:indptr[row + 1]]]
+
+    def out_edges(self, node_id):
+        """Keys of ``node_id``'s outgoing edges."""
+        indptr, _, edges = self.out_csr()
+        row = self._index[node_id]
+        return self.edge_keys[edges[indptr[row]:indptr[row + 1]]]
+
+    def in_edges(self, node_id):
+        """Keys of ``node_id``'s incoming edges."""
+        indptr, _, edges = self.in_csr()
+        row = self._index[node_id]
+        return self.edge_keys[edges[indptr[row]:indptr[row + 1]]]
+
+    def degree(self):
+        """Total degree of every node row."""
+        return np.diff(self.out_csr()[0]) + np.diff(self.in_csr()[0])
+
+    def node_column(self, name):
+        """Full-length column of a node attribute, shared or class-specific.
+        """
+        if name in self.node_attrs:
+            return self.node_attrs[name]
+        return _gather({}, {k: t for k, t in self.node_tables.items() if name in t[1]},
+                       np.arange(self.n_nodes))[name]
+
+    def edge_column(self, name):
+        """Full-length column of an edge attribute, shared or class-specific.
+        """
+        if name in self.edge_attrs:
+            return self.edge_attrs[name]
+        return _gather({}, {k: t for k, t in self.edge_tables.items() if name in t[1]},
+                       np.arange(self.n_edges))[name]
+
+    def gather_node_attrs(self, rows):
+        """All attributes of the node ``rows``, as columns."""
+        return _gather(self.node_attrs, self.node_tables, rows)
+
+    def gather_edge_attrs(self, rows):
+        """All attributes of the edge ``rows``, as columns."""
+        return _gather(self.edge_attrs, self.edge_tables, rows)
+
+    def add_nodes(self, node_ids, attrs=None):
+        """Append nodes; IDs must not already be present.
+
+        Attributes are stored as shared columns.
+        """
+        # interned, so IDs built elsewhere share the store's string objects
+        node_ids = np.asarray([sys.intern(str(n)) for n in node_ids], dtype=object)
+        start = self.n_nodes
+        index = dict(zip(node_ids.tolist(), range(start, start + len(node_ids))))
+        if len(index) != len(node_ids) or not self._index.keys().isdisjoint(index):
+            raise ValueError('node IDs must be unique')
+        _append_columns(self.node_attrs, start, attrs or {}, len(node_ids))
+        self.node_ids = np.concatenate([self.node_ids, node_ids])
+        self._index.update(index)
+        self._adjacency = {}
+        return node_ids
+
+    def remove_nodes(self, node_ids):
+        """Remove nodes and their incident edges.
+
+        Returns the keys of the edges that were removed along with the nodes.
+        """
+        rows = self.node_rows(node_ids)
+        keep = np.ones(self.n_nodes, dtype=bool)
+        keep[rows] = False
+        dropped = ~(keep[self.source] & keep[self.target])
+        removed_keys = self.edge_keys[dropped]
+        self._drop_edge_rows(dropped)
+
+        remap = np.cumsum(keep) - 1
+        self.source = remap[self.source].astype(np.uint32)
+        self.target = remap[self.target].astype(np.uint32)
+        self.node_ids = self.node_ids[keep]
+        for name in self.node_attrs:
+            self.node_attrs[name] = self.node_attrs[name][keep]
+        _filter_tables(self.node_tables, keep)
+        self._index = dict(zip(self.node_ids.tolist(), range(self.n_nodes)))
+        self._adjacency = {}
+        return removed_keys
+
+    def add_edges(self, sources, targets, attrs=None, keys=None):
+        """Append edges between existing node IDs and return their keys.
+
+        ``keys``, e.g. those of the same edges in another store, must be
+        increasing and above every key present; new keys are assigned if
+        omitted.
+        """
+        if len(sources) != len(targets):
+            raise ValueError('sources and targets must have the same length')
+        return self._append_edges(self.node_rows(sources), self.node_rows(targets), attrs, keys)
+
+    def _append_edges(self, source, target, attrs, keys=None):
+        n = len(source)
+        if keys is None:
+            keys = np.arange(self._next_edge_key, self._next_edge_key + n, dtype=np.uint32)
+        else:
+            keys = np.asarray(keys, dtype=np.uint32)
+            if len(keys) != n:
+                raise ValueError('keys must have one entry per edge')
+            if n and (keys[0] < self._next_edge_key or np.any(np.diff(keys.astype(np.int64)) <= 0)):
+                raise ValueError('keys must be increasing and new')
+        _append_columns(self.edge_attrs, self.n_edges, attrs or {}, n)
+        self.edge_keys = np.concatenate([self.edge_keys, keys])
+        self.source = np.concatenate([self.source, source]).astype(np.uint32)
+        self.target = np.concatenate([self.target, target]).astype(np.uint32)
+        if n:
+            self._next_edge_key = int(keys[-1]) + 1
+        self._adjacency = {}
+        return keys
+
+    def extend_from(self, other, n_nodes, n_edges):
+        """Grow to the first ``n_nodes`` nodes and ``n_edges`` edges of
+        ``other``, of which this store must hold a prefix.
+
+        Used to build a store chunk by chunk; per-class tables and edge
+        keys are carried over, so the result equals ``other`` once complete.
+        """
+        n0, e0 = self.n_nodes, self.n_edges
+        if n_nodes > n0:
+            ids = other.node_ids[n0:n_nodes]
+            _append_columns(self.node_attrs, n0,
+                            {k: v[n0:n_nodes] for k, v in other.node_attrs.items()}, len(ids))
+            _extend_tables(self.node_tables, other.node_tables, n0, n_nodes)
+            self.node_ids = np.concatenate([self.node_ids, ids])
+            self._index.update(zip(ids.tolist(), range(n0, n_nodes)))
+        if n_edges > e0:
+            source, target = other.source[e0:n_edges], other.target[e0:n_edges]
+            if len(source) and max(source.max(), target.max()) >= self.n_nodes:
+                raise ValueError('edges refer to nodes that were not added yet')
+            _append_columns(self.edge_attrs, e0,
+                            {k: v[e0:n_edges] for k, v in other.edge_attrs.items()}, len(source))
+            _extend_tables(self.edge_tables, other.edge_tables, e0, n_edges)
+            self.edge_keys = np.concatenate([self.edge_keys, other.edge_keys[e0:n_edges]])
+            self.source = np.concatenate([self.source, source]).astype(np.uint32)
+            self.target = np.concatenate([self.target, target]).astype(np.uint32)
+            self._next_edge_key = max(self._next_edge_key, other._next_edge_key)
+        self._adjacency = {}
+
+    def remove_edges(self, keys):
+        """Remove edges by key.
+        """
+        dropped = np.zeros(self.n_edges, dtype=bool)
+        dropped[self.edge_rows(keys)] = True
+        self._drop_edge_rows(dropped)
+
+    def _drop_edge_rows(self, dropped):
+        keep = ~dropped
+        self.edge_keys = self.edge_keys[keep]
+        self.source = self.source[keep]
+        self.target = self.target[keep]
+        for name in self.edge_attrs:
+            self.edge_attrs[name] = self.edge_attrs[name][keep]
+        _filter_tables(self.edge_tables, keep)
+        self._adjacency = {}
+
+    def set_node_attrs(self, node_ids, attrs):
+        """Set attribute values for the given nodes.
+        """
+        rows = self.node_rows(node_ids)
+        shared, specific = _split_attrs(self.node_tables, attrs)
+        _set_table_columns(self.node_tables, rows, specific)
+        _set_columns(self.node_attrs, self.n_nodes, rows, shared)
+
+    def set_edge_attrs(self, keys, attrs):
+        """Set attribute values for the given edges.
+        """
+        rows = self.edge_rows(keys)
+        shared, specific = _split_attrs(self.edge_tables, attrs)
+        _set_table_columns(self.edge_tables, rows, specific)
+        _set_columns(self.edge_attrs, self.n_edges, rows, shared)
+
+    def subgraph(self, node_mask, edge_mask=None):
+        """Store of the selected nodes and of the selected edges between them.
+
+        Edges keep their keys.
+        """
+        node_mask = np.asarray(node_mask, dtype=bool)
+        keep = node_mask[self.source] & node_mask[self.target]
+        if edge_mask is not None:
+            keep &= np.asarray(edge_mask, dtype=bool)
+        rows = np.flatnonzero(node_mask)
+        edges = np.flatnonzero(keep)
+        remap = np.cumsum(node_mask) - 1
+        node_tables = dict(self.node_tables)
+        _filter_tables(node_tables, node_mask)
+        edge_tables = dict(self.edge_tables)
+        _filter_tables(edge_tables, keep)
+        store = GraphStore.from_arrays(
+            self.node_ids[rows], remap[self.source[edges]], remap[self.target[edges]],
+            {k: v[rows] for k, v in self.node_attrs.items()},
+            {k: v[edges] for k, v in self.edge_attrs.items()},
+            node_tables, edge_tables)
+        store.edge_keys = self.edge_keys[edges]
+        store._next_edge_key = self._next_edge_key
+        return store
+
+    def fingerprint(self):
+        """Hex digest identifying the graph's structure.
+
+        Two stores with the same node IDs in the same order and the same
+        edges have the same fingerprint, regardless of attribute values.
+        """
+        h = hashlib.sha1()
+        h.update('\0'.join(self.node_ids.tolist()).encode('utf-8'))
+        h.update(np.ascontiguousarray(self.source, dtype='<u4').tobytes())
+        h.update(np.ascontiguousarray(self.target, dtype='<u4').tobytes())
+        return h.hexdigest()
+
+    def to_payload(self):
+        """Return the columnar payload understood by
+        :func:`~ipyneugraph.serializers.graph_to_json`.
+        """
+        return {
+            'nodes': {'id': self.node_ids, 'attrs': dict(self.node_attrs),
+                      'tables': dict(self.node_tables)},
+            'edges': {'id': self.edge_keys, 'source': self.source,
+                      'target': self.target, 'attrs': dict(self.edge_attrs),
+                      'tables': dict(self.edge_tables)},
+        }
+
+    @classmethod
+    def from_payload(cls, payload, copy=True):
+        """Inverse of :meth:`to_payload`.
+
+        With ``copy=False`` the arrays, e.g. memory maps of a cached store,
+        are adopted as they are rather than validated and copied; they must
+        come from :meth:`to_payload`.
+        """
+        nodes, edges = payload['nodes'], payload['edges']
+        if not copy:
+            store = cls()
+            store.node_ids = np.asarray(nodes['id'], dtype=object)
+            store._index = dict(zip(store.node_ids.tolist(), range(store.n_nodes)))
+            store.node_attrs = dict(nodes.get('attrs') or {})
+            store.node_tables = dict(nodes.get('tables') or {})
+            store.edge_keys = np.asanyarray(edges['id'], dtype=np.uint32)
+            store.source = np.asanyarray(edges['source'], dtype=np.uint32)
+            store.target = np.asanyarray(edges['target'], dtype=np.uint32)
+            store.edge_attrs = dict(edges.get('attrs') or {})
+            store.edge_tables = dict(edges.get('tables') or {})
+            store._next_edge_key = int(store.edge_keys.max()) + 1 if store.n_edges else 0
+            return store
+        store = cls.from_arrays(nodes['id'], edges['source'], edges['target'],
+                                nodes.get('attrs'), edges.get('attrs'),
+                                nodes.get('tables'), edges.get('tables'))
+        if edges.get('id') is not None:
+            store.edge_keys = np.asarray(edges['id'], dtype=np.uint32)
+            store._next_edge_key = int(store.edge_keys.max()) + 1 if store.n_edges else 0
+        return store
+
+
+def _as_tables(tables, length):
+    result = {}
+    for name, (rows, columns) in (tables or {}).items():
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) and (rows.min() < 0 or rows.max() >= length):
+            raise ValueError('rows of table %r out of range' % name)
+        order = np.argsort(rows, kind='stable')
+        result[str(name)] = (rows[order], {k: _as_column(v, len(rows), k)[order]
+                                           for k, v in columns.items()})
+    return result
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Declarative attribute-driven styling.
+
+A style maps node and edge attributes to visual channels::
+
+    {
+        'node_color': {'attr': 'V', 'colormap': 'viridis', 'domain': [-70, -40]},
+        'node_size': {'attr': 'spike', 'range': [2, 8]},
+        'edge_width': {'attr': 'gmax', 'scale': 'log'},
+    }
+
+The spec is synced as-is and evaluated by the frontend (``src/style.ts``)
+on whole attribute columns whenever the attribute, the graph or the style
+changes, so per-frame state only needs to send the raw values.
+"""
+
+from traitlets import TraitError
+
+CHANNELS = {
+    'node_color': 'color',
+    'node_size': 'size',
+    'edge_color': 'color',
+    'edge_width': 'size',
+}
+
+SCALES = ('linear', 'log', 'sqrt')
+
+#: Colormap stops, from low to high values. ``category10`` is used as-is
+#: for string attributes; the others are interpolated.
+COLORMAPS = {
+    'viridis': ['#440154', '#3b528b', '#21918c', '#5ec962', '#fde725'],
+    'magma': ['#000004', '#51127c', '#b73779', '#fc8961', '#fcfdbf'],
+    'coolwarm': ['#313695', '#74add1', '#ffffbf', '#f46d43', '#a50026'],
+    'greys': ['#ffffff', '#000000'],
+    'category10': ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+                   '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'],
+}
+
+DEFAULT_SIZE_RANGE = {'node_size': [1.0, 10.0], 'edge_width': [0.2, 3.0]}
+
+
+def _is_color(value):
+    return isinstance(value, str) and len(value) == 7 and value.startswith('#')
+
+
+def _pair(spec, key, channel):
+    value = spec[key]
+    try:
+        lo, hi = [float(v) for v in value]
+    except (TypeError, ValueError):
+        raise TraitError('%s %s must be a pair of numbers' % (channel, key))
+    return [lo, hi]
+
+
+def validate_style(style):
+    """Check a style spec and fill in defaults.
+
+    Raises
+    ------
+    traitlets.TraitError
+        For unknown channels, colormaps or scales and malformed ranges.
+    """
+    result = {}
+    for channel, spec in style.items():
+        if channel not in CHANNELS:
+            raise TraitError('unknown style channel %r; expected one of %s'
+                             % (channel, ', '.join(sorted(CHANNELS))))
+        if spec is None:
+            continue
+        if isinstance(spec, str):
+            spec = {'attr': spec}
+        spec = dict(spec)
+        if not isinstance(spec.get('attr'), str):
+            raise TraitError('%s needs an attr' % channel)
+        scale = spec.setdefault('scale', 'linear')
+        if scale not in SCALES:
+            raise TraitError('%s scale must be one of %s' % (channel, ', '.join(SCALES)))
+        if 'domain' in spec and spec['domain'] is not None:
+            spec['domain'] = _pair(spec, 'domain', channel)
+        if CHANNELS[channel] == 'color':
+            colormap = spec.setdefault('colormap', 'viridis')
+            if isinstance(colormap, str):
+                if colormap not in COLORMAPS:
+                    raise TraitError('unknown colormap %r' % colormap)
+                spec['colormap'] = COLORMAPS[colormap]
+            elif not all(_is_color(c) for c in colormap) or len(colormap) < 2:
+                raise TraitError('%s colormap must be a name or at least two #rrggbb colors'
+                                 % channel)
+            else:
+                spec['colormap'] = list(colormap)
+        else:
+            spec['range'] = _pair(spec, 'range', channel) if 'range' in spec \
+                else list(DEFAULT_SIZE_RANGE[channel])
+        result[channel] = spec
+    return result
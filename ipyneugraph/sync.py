@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Rate-limited, coalescing delivery of high-frequency node state.
+
+During a simulation, node state such as membrane voltages and spike flags is
+written many times per second. :class:`FrameThrottle` records which rows of
+which attributes changed, and at most once per frame interval sends a single
+binary ``frame`` message with their latest values. Writes that happen between
+two frames overwrite each other, so frames that could not be sent in time are
+dropped rather than queued. The frontend acknowledges every frame; while too
+many frames are unacknowledged, sending is paused.
+
+Large payloads, such as a whole graph, go through :class:`ChunkedTransfer`
+instead of a single comm message: their buffers are split into chunks of a
+fixed size, which are sent a few at a time as the frontend acknowledges
+them, so other widgets' messages are interleaved rather than stuck behind
+hundreds of megabytes.
+"""
+
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from .serializers import array_to_binary, column_to_binary
+
+
+def _schedule_on_ioloop(delay, callback):
+    try:
+        from tornado.ioloop import IOLoop
+    except ImportError:
+        return
+    IOLoop.current().call_later(delay, callback)
+
+
+class FrameThrottle(object):
+    """Coalesce attribute writes into at most one message per interval.
+
+    Parameters
+    ----------
+    send : callable
+        Called as ``send(seq, rows, columns)`` with the frame to transmit,
+        where ``rows`` maps each attribute to the updated rows (``None``
+        for all rows) and ``columns`` to the corresponding values.
+    columns : callable
+        Returns the mapping of attribute name to current full column.
+    interval : float, optional
+        Minimum number of seconds between two frames.
+    max_in_flight : int, optional
+        Number of unacknowledged frames after which sending pauses.
+    ack_timeout : float, optional
+        Seconds after which an unacknowledged frame is considered lost. The
+        kernel cannot read acknowledgements while a cell is busy, so without
+        this a blocking simulation loop would stall after ``max_in_flight``
+        frames.
+    clock, schedule : callable, optional
+        Time source and ``schedule(delay, callback)`` used for the trailing
+        frame; default to ``time.monotonic`` and the tornado IOLoop.
+    """
+
+    def __init__(self, send, columns, interval=1 / 30., max_in_flight=2, ack_timeout=1.0,
+                 clock=time.monotonic, schedule=_schedule_on_ioloop):
+        self._send = send
+        self._columns = columns
+        self.interval = interval
+        self.max_in_flight = max_in_flight
+        self.ack_timeout = ack_timeout
+        self._clock = clock
+        self._schedule = schedule
+        self._dirty = {}
+        self._in_flight = {}
+        self._seq = 0
+        self._last_sent = -np.inf
+        self._holds = 0
+        self._scheduled = False
+        self.frames_sent = 0
+        self.writes_coalesced = 0
+
+    @property
+    def pending(self):
+        return bool(self._dirty)
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def mark(self, name, rows, length):
+        """Record that ``rows`` of attribute ``name`` changed.
+
+        ``rows=None`` marks the whole column.
+        """
+        if name in self._dirty:
+            self.writes_coalesced += 1
+        elif rows is not None:
+            self._dirty[name] = np.zeros(length, dtype=bool)
+        if rows is None:
+            self._dirty[name] = None
+        elif self._dirty[name] is not None:
+            self._dirty[name][rows] = True
+
+    def invalidate(self):
+        """Resend pending attributes in full, e.g. after rows were renumbered.
+        """
+        for name in self._dirty:
+            self._dirty[name] = None
+
+    def discard(self):
+        """Forget pending writes and unacknowledged frames.
+        """
+        self._dirty = {}
+        self._in_flight = {}
+
+    @contextmanager
+    def hold(self):
+        """Delay sending until the end of the block.
+        """
+        self._holds += 1
+        try:
+            yield
+        finally:
+            self._holds -= 1
+            if self._holds == 0:
+                self.maybe_flush()
+
+    def maybe_flush(self):
+        """Send the pending frame if the rate limit and acknowledgements allow.
+        """
+        if self._holds or not self._dirty:
+            return False
+        now = self._clock()
+        self._expire(now)
+        wait = self._last_sent + self.interval - now
+        if wait > 0 or len(self._in_flight) >= self.max_in_flight:
+            self._schedule_flush(max(wait, self.interval))
+            return False
+        self.flush(now)
+        return True
+
+    def flush(self, now=None):
+        """Send the pending frame now.
+        """
+        if not self._dirty:
+            return
+        now = self._clock() if now is None else now
+        columns = self._columns()
+        rows, values = {}, {}
+        for name, mask in self._dirty.items():
+            column = columns.get(name)
+            if column is None:
+                continue
+            if mask is None or mask.sum() * 4 > len(column):
+                rows[name] = None
+                values[name] = column
+            else:
+                rows[name] = np.flatnonzero(mask)
+                values[name] = column[rows[name]]
+        self._dirty = {}
+        seq = self._seq
+        self._seq += 1
+        self._in_flight[seq] = now
+        self._last_sent = now
+        self.frames_sent += 1
+        self._send(seq, rows, values)
+
+    def ack(self, seq):
+        """Acknowledge frame ``seq`` and all frames before it.
+
+        Returns the round-trip time of frame ``seq`` in seconds, or ``None``
+        if it was not in flight.
+        """
+        sent = self._in_flight.get(seq)
+        for s in [s for s in self._in_flight if s <= seq]:
+            del self._in_flight[s]
+        rtt = None if sent is None else self._clock() - sent
+        self.maybe_flush()
+        return rtt
+
+    def _expire(self, now):
+        for s, sent in list(self._in_flight.items()):
+            if now - sent > self.ack_timeout:
+                del self._in_flight[s]
+
+    def _schedule_flush(self, delay):
+        if self._scheduled or self._schedule is None:
+            return
+        self._scheduled = True
+
+        def trailing():
+            self._scheduled = False
+            self.maybe_flush()
+
+        self._schedule(delay, trailing)
+
+
+def _split_buffers(views, chunk_bytes):
+    # yields ([[buffer index, offset], ...], [slice, ...]) of chunk_bytes
+    # each, packing small buffers together without copying
+    parts, slices, size = [], [], 0
+    for i, view in enumerate(views):
+        offset = 0
+        while offset < view.nbytes:
+            n = min(chunk_bytes - size, view.nbytes - offset)
+            parts.append([i, offset])
+            slices.append(view[offset:offset + n])
+            size += n
+            offset += n
+            if size == chunk_bytes:
+                yield parts, slices
+                parts, slices, size = [], [], 0
+    if parts:
+        yield parts, slices
+
+
+class ChunkedTransfer(object):
+    """Send a message with large buffers as acknowledged chunks.
+
+    A ``chunked`` header carries the JSON content and the buffer sizes; it
+    is followed by ``chunk`` messages numbered from 0, at most
+    ``max_in_flight`` of which are unacknowledged at any time. Starting a
+    transfer supersedes the previous one.
+
+    Parameters
+    ----------
+    send : callable
+        Called as ``send(content, buffers)`` for every message.
+    chunk_bytes : int, optional
+        Size of a chunk.
+    max_in_flight : int, optional
+        Number of unacknowledged chunks after which sending pauses until
+        the next acknowledgement.
+    """
+
+    def __init__(self, send, chunk_bytes=1 << 20, max_in_flight=4):
+        self._send = send
+        self.chunk_bytes = chunk_bytes
+        self.max_in_flight = max_in_flight
+        self._transfer = 0
+        self._chunks = []
+        self._next = 0
+        self._acked = -1
+        self.chunks_sent = 0
+
+    @property
+    def active(self):
+        """Whether chunks of the current transfer are unsent or unacknowledged."""
+        return self._acked + 1 < len(self._chunks)
+
+    @property
+    def in_flight(self):
+        return self._next - self._acked - 1
+
+    def start(self, content, buffers):
+        """Begin sending ``content`` with ``buffers``; returns the transfer ID."""
+        self._transfer += 1
+        views = [memoryview(b).cast('B') for b in buffers]
+        self._chunks = list(_split_buffers(views, self.chunk_bytes))
+        self._next = 0
+        self._acked = -1
+        self._send(dict(content, method='chunked', transfer=self._transfer,
+                        sizes=[v.nbytes for v in views], chunks=len(self._chunks)), [])
+        self._pump()
+        return self._transfer
+
+    def ack(self, transfer, seq):
+        """Acknowledge chunk ``seq`` of ``transfer`` and all chunks before it."""
+        if transfer != self._transfer:
+            return
+        self._acked = max(self._acked, min(seq, self._next - 1))
+        self._pump()
+        if not self.active:
+            self._chunks = []
+
+    def _pump(self):
+        while self._next < len(self._chunks) and self.in_flight < self.max_in_flight:
+            parts, slices = self._chunks[self._next]
+            # sent chunks need not be kept
+            self._chunks[self._next] = None
+            self._send({'method': 'chunk', 'transfer': self._transfer, 'seq': self._next,
+                        'parts': parts}, slices)
+            self._next += 1
+            self.chunks_sent += 1
+
+
+def frame_to_json(seq, rows, columns):
+    """Serialize a frame; arrays become ``memoryview``s.
+    """
+    return {
+        'method': 'frame',
+        'seq': seq,
+        'attrs': {
+            name: {
+                'rows': None if rows[name] is None
+                else array_to_binary(np.asarray(rows[name], dtype=np.uint32)),
+                'values': column_to_binary(values),
+            }
+            for name, values in columns.items()
+        },
+    }
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Timings and sizes of the messages a widget sends to the frontend.
+
+With ``widget.profiling = True``, every message is recorded with the time
+spent serializing it in the kernel, its size and number of buffers. The
+frontend reports back, for every message it applies, how long it took to
+decode, to apply and to draw the next frame, and the kernel notes the round
+trip time. Together they tell whether a slow update is spent in the kernel,
+on the wire or in the browser::
+
+    w.profiling = True
+    w.graph = store
+    w.telemetry.to_dataframe()
+
+The round trip time includes any time the kernel was busy, as the report
+is only read once the running cell finishes.
+"""
+
+import time
+from collections import OrderedDict
+
+# columns of a record, in order
+FIELDS = ('id', 'time', 'method', 'serialize_ms', 'bytes', 'buffers', 'rtt_ms',
+          'decode_ms', 'apply_ms', 'render_ms')
+
+# timings reported by the frontend
+FRONTEND_FIELDS = ('decode_ms', 'apply_ms', 'render_ms')
+
+
+class Telemetry(object):
+    """Records of the messages sent while profiling.
+
+    Parameters
+    ----------
+    max_records : int, optional
+        Number of records kept; older ones are dropped.
+    clock : callable, optional
+        Monotonic time source, in seconds.
+    """
+
+    def __init__(self, max_records=100000, clock=time.perf_counter):
+        self.max_records = max_records
+        self._clock = clock
+        self._records = OrderedDict()
+        self._next_id = 0
+        self._started = None
+        self._callbacks = []
+
+    def __len__(self):
+        return len(self._records)
+
+    def start(self):
+        """Mark the start of serializing the next message."""
+        self._started = self._clock()
+
+    def record(self, method, buffers, awaits_report=True):
+        """Record a message about to be sent; returns its ID.
+
+        The serialization time is measured from the last :meth:`start`.
+        Records that do not await a frontend report are complete at once.
+        """
+        now = self._clock()
+        record = dict.fromkeys(FIELDS)
+        record.update(
+            id=self._next_id, time=time.time(), method=method,
+            serialize_ms=None if self._started is None else (now - self._started) * 1e3,
+            bytes=sum(memoryview(b).nbytes for b in buffers), buffers=len(buffers))
+        record['_sent'] = now
+        self._started = None
+        self._next_id += 1
+        self._records[record['id']] = record
+        while len(self._records) > self.max_records:
+            self._records.popitem(last=False)
+        if not awaits_report:
+            self._complete(record)
+        return record['id']
+
+    def report(self, record_id, timings):
+        """Add the frontend's ``timings`` to a record and complete it."""
+        record = self._records.get(record_id)
+        if record is None or record['rtt_ms'] is not None:
+            return
+        record['rtt_ms'] = (self._clock() - record['_sent']) * 1e3
+        for name in FRONTEND_FIELDS:
+            record[name] = timings.get(name)
+        self._complete(record)
+
+    def on_record(self, callback, remove=False):
+        """(Un)register ``callback(record)``, called with every completed record."""
+        if remove:
+            self._callbacks.remove(callback)
+        else:
+            self._callbacks.append(callback)
+
+    def _complete(self, record):
+        record = self._public(record)
+        for callback in self._callbacks:
+            callback(record)
+
+    @staticmethod
+    def _public(record):
+        return {name: record[name] for name in FIELDS}
+
+    def to_records(self):
+        """The records as a list of dicts, oldest first."""
+        return [self._public(r) for r in self._records.values()]
+
+    def to_dataframe(self):
+        """The records as a :class:`pandas.DataFrame` indexed by ID."""
+        import pandas as pd
+        return pd.DataFrame(self.to_records(), columns=FIELDS).set_index('id')
+
+    def clear(self):
+        self._records.clear()
@@ -9,6 +9,8 @@ import pytest
 from ipykernel.comm import Comm
 from ipywidgets import Widget
 
+from .. import cache
+
 class MockComm(Comm):
     """A mock Comm object.
 
@@ -52,3 +54,12 @@ def mock_comm():
             delattr(Widget, attr)
         else:
             setattr(Widget, attr, value)
+
+
+@pytest.fixture(autouse=True)
+def graph_cache(tmp_path):
+    """Keep the on-disk cache of every test in its own directory."""
+    previous = cache._cache
+    cache.set_cache(cache.GraphCache(str(tmp_path / 'cache')))
+    yield cache.get_cache()
+    cache._cache = previous
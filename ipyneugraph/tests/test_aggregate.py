@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+
+from ..aggregate import Aggregation, Hierarchy, louvain
+from ..ipyneugraph import NeuGraphWidget
+from ..store import GraphStore
+
+
+def _circuit():
+    # two LPUs with two classes each; a chain inside every (lpu, class)
+    ids, lpu, cls, src, tgt = [], [], [], [], []
+    for l in ('al', 'mb'):
+        for c in ('LIF', 'HH'):
+            start = len(ids)
+            for i in range(3):
+                ids.append('%s-%s-%d' % (l, c, i))
+                lpu.append(l)
+                cls.append(c)
+            src += [start, start + 1]
+            tgt += [start + 1, start + 2]
+    src.append(0)
+    tgt.append(6)
+    return GraphStore.from_arrays(ids, src, tgt, {'lpu': lpu, 'class': cls})
+
+
+def test_attribute_hierarchy_is_nested():
+    h = Hierarchy.from_attributes(_circuit(), ['lpu', 'class'])
+    assert h.depth == 2
+    assert list(h.names[1]) == ['al', 'mb']
+    assert list(h.names[0]) == ['al/LIF', 'al/HH', 'mb/LIF', 'mb/HH']
+    # every fine group lies within one coarse group
+    pairs = set(zip(h.labels[0], h.labels[1]))
+    assert len(pairs) == len(h.names[0])
+
+
+def test_expand_and_collapse():
+    store = _circuit()
+    agg = Aggregation(store, Hierarchy.from_attributes(store, ['lpu', 'class']))
+    overview = agg.display_store()
+    assert list(overview.node_ids) == ['group:1:al', 'group:1:mb']
+    assert overview.node_attrs['count'].tolist() == [6, 6]
+    assert overview.n_edges == 1
+    assert overview.edge_attrs['count'].tolist() == [1]
+
+    removed, (ids, attrs), edges = agg.expand('group:1:al')
+    assert list(removed) == ['group:1:al']
+    assert list(ids) == ['group:0:al/LIF', 'group:0:al/HH']
+    # the al-LIF-0 -> mb-LIF-0 edge now leaves the al/LIF group
+    (sources, targets, edge_attrs), = edges
+    assert list(sources) == ['group:0:al/LIF'] and list(targets) == ['group:1:mb']
+    assert edge_attrs['count'].tolist() == [1]
+
+    removed, (ids, attrs), edges = agg.expand('group:0:al/LIF')
+    assert list(ids) == ['al-LIF-0', 'al-LIF-1', 'al-LIF-2']
+    assert attrs['level'].tolist() == [-1, -1, -1]
+    assert attrs['lpu'].tolist() == ['al'] * 3
+
+    removed, (ids, attrs), edges = agg.collapse('al-LIF-1')
+    assert sorted(removed) == ['al-LIF-0', 'al-LIF-1', 'al-LIF-2']
+    assert list(ids) == ['group:0:al/LIF']
+    assert agg.collapse('group:1:mb') is None
+
+
+def test_louvain_finds_cliques():
+    k = 8
+    src, tgt = [], []
+    for offset in range(0, 4 * k, k):
+        for i in range(k):
+            for j in range(i + 1, k):
+                src.append(offset + i)
+                tgt.append(offset + j)
+        src.append(offset)
+        tgt.append((offset + k) % (4 * k))
+    levels = louvain(4 * k, src, tgt)
+    labels = levels[0]
+    for offset in range(0, 4 * k, k):
+        assert len(set(labels[offset:offset + k])) == 1
+    assert len(set(labels)) >= 2
+
+
+def test_widget_sends_overview_and_expands(mock_comm):
+    pytest.importorskip('scipy')
+    w = NeuGraphWidget(comm=mock_comm)
+    w.graph = _circuit()
+    w.collapse(by=['lpu', 'class'])
+    assert w.graph.n_nodes == 2 and w.full_graph.n_nodes == 12
+
+    w._handle_custom_msg({'event': 'expand', 'node': 'group:1:mb'}, [])
+    assert sorted(w.graph.node_ids) == ['group:0:mb/HH', 'group:0:mb/LIF', 'group:1:al']
+    content = mock_comm.log_send[-1][1]['data']['content']
+    assert content['method'] == 'diff'
+    assert [op['op'] for op in content['ops']] == ['drop_nodes', 'add_nodes', 'add_edges']
+
+    w.expand_all()
+    assert w.graph.n_nodes == 12
+
+    w.collapse(by='louvain')
+    assert w.graph.n_nodes < 12
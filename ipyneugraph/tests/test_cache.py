@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import os
+
+import numpy as np
+import pytest
+
+from .. import cache as cache_module
+from ..cache import GraphCache, path_key, store_key, structure_key
+from ..ipyneugraph import NeuGraphWidget
+from ..layout import layout_cache
+from ..store import GraphStore
+
+nx = pytest.importorskip('networkx')
+
+
+def _lpu():
+    G = nx.MultiDiGraph()
+    G.add_node('n0', **{'class': 'LeakyIAF', 'V_th': -55.0, 'a/b': 1.0})
+    G.add_node('n1', **{'class': 'HodgkinHuxley', 'g_K': 36.0, 'a/b': 2.0})
+    G.add_edge('n0', 'n1', **{'class': 'AlphaSynapse', 'gmax': 0.1})
+    return G
+
+
+def test_store_roundtrip(graph_cache):
+    store = GraphStore.from_arrays(
+        ['a', 'b', 'c'], [0, 1], [1, 2],
+        node_attrs={'name': np.array(['x', 'y', 'z'], dtype=object), 'a/b': [1.0, 2.0, 3.0]},
+        node_tables={'LeakyIAF': ([0, 2], {'V_th': [-55.0, -50.0]})})
+    store.remove_edges([0])
+    graph_cache.put_store('k', store)
+    loaded = graph_cache.get_store('k')
+    assert list(loaded.node_ids) == ['a', 'b', 'c']
+    assert list(loaded.node_attrs['name']) == ['x', 'y', 'z']
+    np.testing.assert_array_equal(loaded.node_attrs['a/b'], [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(loaded.node_column('V_th'), [-55.0, np.nan, -50.0])
+    np.testing.assert_array_equal(loaded.edge_keys, [1])
+    assert loaded.fingerprint() == store.fingerprint()
+    # the cached arrays are used in place
+    assert isinstance(loaded.source, np.memmap)
+    assert isinstance(loaded.node_attrs['a/b'], np.memmap)
+    loaded.add_edges(['c'], ['a'])
+    np.testing.assert_array_equal(loaded.edge_keys, [1, 2])
+    assert graph_cache.get_store('missing') is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = GraphCache(str(tmp_path), max_bytes=10 ** 9)
+    for key in 'abc':
+        cache.put_layout(key, np.zeros((1000, 2)))
+    # make the access order explicit; mtimes may share a clock tick
+    for t, key in enumerate('bca'):
+        os.utime(os.path.join(cache.path, key, 'index.json'), (t, t))
+    size = cache.nbytes // 3
+    cache.evict(2 * size)
+    assert 'b' not in cache and 'c' in cache and 'a' in cache
+    cache.clear()
+    assert cache.entries() == []
+
+
+def test_path_key_follows_file(tmp_path):
+    path = tmp_path / 'lpu.gexf'
+    path.write_text('a')
+    key = path_key(path)
+    assert path_key(str(path)) == key
+    os.utime(str(path), ns=(0, 0))
+    assert path_key(path) != key
+
+
+def test_reopening_a_circuit_skips_conversion_and_layout(graph_cache, mock_comm, monkeypatch):
+    G = _lpu()
+    w = NeuGraphWidget.from_networkx(G)
+    assert graph_cache.entries() == []
+    w = NeuGraphWidget.from_networkx(G, cache_key='lpu')
+    assert store_key('lpu', 'class', structure_key(G)) in graph_cache
+    positions = np.array([[0.0, 1.0], [2.0, 3.0]], dtype=np.float32)
+    w._handle_custom_msg({'event': 'layout_done', 'shape': [2, 2]}, [positions.tobytes()])
+
+    monkeypatch.setattr(cache_module, 'networkx_to_store', None)
+    w2 = NeuGraphWidget.from_networkx(G, cache_key='lpu')
+    np.testing.assert_array_equal(w2.graph.node_column('g_K'), [np.nan, 36.0])
+    np.testing.assert_array_equal(w2.graph.node_attrs['x'], [0.0, 2.0])
+    np.testing.assert_array_equal(w2.graph.node_attrs['y'], [1.0, 3.0])
+
+
+def test_compute_layout_survives_restart(graph_cache, mock_comm, monkeypatch):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b', 'c'], [0, 1], [1, 2])
+    pos = w.compute_layout(iterations=5)
+    # a new process starts with an empty in-memory cache
+    layout_cache.clear()
+    import ipyneugraph.ipyneugraph as module
+    monkeypatch.setattr(module, 'forceatlas2', None)
+    np.testing.assert_array_equal(w.compute_layout(iterations=5), pos)
+
+
+def test_graphs_sharing_a_key_do_not_share_entries(graph_cache, mock_comm):
+    G = _lpu()
+    NeuGraphWidget.from_networkx(G, cache_key='lpu')
+    G.add_edge('n1', 'n0')
+    w = NeuGraphWidget.from_networkx(G, cache_key='lpu')
+    assert w.graph.n_edges == 2
+    assert structure_key(G) == w.graph.fingerprint()
+
+
+def test_layout_follows_edge_weights(graph_cache, mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b', 'c'], [0, 1], [1, 2], edge_attrs={'gmax': [1.0, 1.0]})
+    pos = w.compute_layout(iterations=5, weight='gmax', seed=0)
+    w.set_edge_attrs([0], {'gmax': [100.0]})
+    assert not np.array_equal(w.compute_layout(iterations=5, weight='gmax', seed=0), pos)
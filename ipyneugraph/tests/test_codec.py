@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+from ipywidgets.widgets.widget import _put_buffers
+
+from ..codec import CompressionPolicy
+from ..ipyneugraph import NeuGraphWidget
+from ..serializers import array_from_binary, array_to_binary, graph_to_json, graph_from_json
+
+
+def _policy(codecs=('delta', 'quantize', 'zlib'), **kwargs):
+    policy = CompressionPolicy(**kwargs)
+    policy.accept(codecs)
+    return policy
+
+
+def test_sorted_indices_are_delta_encoded():
+    keys = np.arange(100000, 110000, dtype=np.uint32)
+    value = _policy(mode='never').encode(array_to_binary(keys))
+    assert 'codec' not in value
+    value = _policy(codecs=['delta']).encode(array_to_binary(keys))
+    assert [s['name'] for s in value['codec']] == ['delta']
+    assert value['buffer'].nbytes == len(keys)
+    np.testing.assert_array_equal(array_from_binary(value), keys)
+
+
+def test_unsorted_indices_are_sent_as_is():
+    value = _policy(codecs=['delta']).encode(array_to_binary(np.array([3, 1, 2], dtype=np.uint32)))
+    assert 'codec' not in value
+
+
+def test_quantize_is_opt_in_and_keeps_nan():
+    x = np.linspace(-500, 500, 1001).astype(np.float32)
+    x[3] = np.nan
+    assert 'codec' not in _policy(codecs=['quantize']).encode(array_to_binary(x))
+    value = _policy(codecs=['quantize'], quantize=True).encode(array_to_binary(x))
+    assert value['buffer'].nbytes == 2 * len(x)
+    decoded = array_from_binary(value)
+    assert np.isnan(decoded[3])
+    np.testing.assert_allclose(np.delete(decoded, 3), np.delete(x, 3), atol=1000 / 65534)
+
+
+def test_small_buffers_stay_uncompressed():
+    policy = _policy(codecs=['zlib'])
+    small = policy.encode(array_to_binary(np.zeros(100)))
+    assert 'codec' not in small
+    large = policy.encode(array_to_binary(np.zeros(100000)))
+    assert large['codec'] == [{'name': 'zlib', 'nbytes': 800000}]
+    np.testing.assert_array_equal(array_from_binary(large), np.zeros(100000))
+
+
+def test_fast_links_are_not_compressed():
+    policy = _policy(codecs=['zlib'])
+    policy.observe_transfer(1e12, 1.0)
+    assert not policy.should_deflate(1 << 20)
+    policy = _policy(codecs=['zlib'])
+    policy.observe_transfer(1e6, 1.0)
+    assert policy.should_deflate(1 << 20)
+
+
+def test_graph_payload_roundtrip():
+    class Widget(object):
+        _codec = _policy(mode='always')
+
+    n = 1000
+    payload = {
+        'nodes': {'id': ['n%d' % i for i in range(n)], 'attrs': {'V': np.zeros(n)}},
+        'edges': {'source': np.arange(n - 1), 'target': np.arange(1, n)},
+    }
+    value = graph_to_json(payload, Widget())
+    assert value['edges']['source']['codec'][0]['name'] == 'delta'
+    store = graph_from_json(value, None)
+    assert list(store.node_ids) == payload['nodes']['id']
+    np.testing.assert_array_equal(store.target, np.arange(1, n))
+
+
+def test_widget_compresses_after_negotiation(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm, compression='always')
+    n = 1000
+    w.set_graph(['n%d' % i for i in range(n)], np.arange(n - 1), np.arange(1, n))
+    w.push_state({'V': np.zeros(n)})
+    w.flush_state()
+    content = mock_comm.log_send[-1][1]['data']['content']
+    assert 'codec' not in content['attrs']['V']['values']
+
+    w._handle_custom_msg({'event': 'codecs', 'codecs': ['zlib', 'unknown']}, [])
+    assert w._codec.supported == {'zlib'}
+    w.push_state({'V': np.ones(n)})
+    w.flush_state()
+    kwargs = mock_comm.log_send[-1][1]
+    content = kwargs['data']['content']
+    _put_buffers(content, content['buffer_paths'], kwargs['buffers'])
+    values = content['attrs']['V']['values']
+    assert values['codec'][0]['name'] == 'zlib'
+    np.testing.assert_array_equal(array_from_binary(values), np.ones(n))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..convert import networkx_to_arrays
+
+nx = pytest.importorskip('networkx')
+
+
+@pytest.fixture
+def lpu():
+    G = nx.MultiDiGraph()
+    G.add_node('n0', **{'class': 'LeakyIAF', 'name': 'n0', 'V_th': -55.0, 'resting_potential': -70.0})
+    G.add_node('n1', **{'class': 'HodgkinHuxley', 'name': 'n1', 'g_K': 36.0})
+    G.add_node('n2', **{'class': 'LeakyIAF', 'name': 'n2', 'V_th': -50.0, 'resting_potential': -65.0})
+    G.add_edge('n0', 'n1', **{'class': 'AlphaSynapse', 'gmax': 0.1})
+    G.add_edge('n0', 'n1', **{'class': 'AlphaSynapse', 'gmax': 0.2})
+    G.add_edge('n2', 'n0', **{'class': 'PowerGPotGPot', 'slope': 4.0})
+    return G
+
+
+def test_tables_grouped_by_class(lpu):
+    node_ids, source, target, node_tables, edge_tables = networkx_to_arrays(lpu)
+    assert list(node_ids) == ['n0', 'n1', 'n2']
+    np.testing.assert_array_equal(source, [0, 0, 2])
+    np.testing.assert_array_equal(target, [1, 1, 0])
+    rows, columns = node_tables['LeakyIAF']
+    np.testing.assert_array_equal(rows, [0, 2])
+    assert columns['V_th'].dtype == np.float64
+    np.testing.assert_array_equal(columns['V_th'], [-55.0, -50.0])
+    assert 'g_K' not in columns
+    assert set(edge_tables) == {'AlphaSynapse', 'PowerGPotGPot'}
+
+
+def test_from_networkx(lpu):
+    w = NeuGraphWidget.from_networkx(lpu)
+    store = w.graph
+    assert store.n_nodes == 3
+    assert store.n_edges == 3
+    assert list(store.node_attrs['class']) == ['LeakyIAF', 'HodgkinHuxley', 'LeakyIAF']
+    # parameters of a single model live in that model's table
+    assert 'V_th' not in store.node_attrs
+    rows, table = store.node_tables['LeakyIAF']
+    np.testing.assert_array_equal(rows, [0, 2])
+    np.testing.assert_array_equal(table['V_th'], [-55.0, -50.0])
+    v_th = store.node_column('V_th')
+    assert v_th[0] == -55.0 and np.isnan(v_th[1])
+    assert list(store.node_attrs['name']) == ['n0', 'n1', 'n2']
+    np.testing.assert_array_equal(store.edge_column('gmax')[:2], [0.1, 0.2])
+
+
+def test_from_networkx_plain_graph():
+    G = nx.path_graph(4)
+    w = NeuGraphWidget.from_networkx(G)
+    assert list(w.graph.node_ids) == ['0', '1', '2', '3']
+    assert w.graph.node_attrs == {}
+    assert w.graph.n_edges == 3
+
+
+def test_missing_values_padded_by_column_kind():
+    G = nx.MultiDiGraph()
+    G.add_node('a', **{'class': 'LeakyIAF', 'label': 'A', 'V_th': -55.0})
+    G.add_node('b', **{'class': 'LeakyIAF', 'V_th': None})
+    G.add_node('c', **{'class': 'LeakyIAF', 'label': None, 'V_th': -50.0})
+    node_ids, source, target, node_tables, edge_tables = networkx_to_arrays(G)
+    rows, columns = node_tables['LeakyIAF']
+    assert list(columns['label']) == ['A', '', '']
+    assert columns['V_th'].dtype == np.float64
+    np.testing.assert_array_equal(columns['V_th'], [-55.0, np.nan, -50.0])
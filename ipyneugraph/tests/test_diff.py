@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..serializers import strings_from_binary
+
+
+def _widget(mock_comm, n=1000):
+    w = NeuGraphWidget(comm=mock_comm)
+    ids = ['n%d' % i for i in range(n)]
+    w.set_graph(ids, np.arange(n - 1), np.arange(1, n),
+                node_attrs={'V_th': np.full(n, -55.0)})
+    del mock_comm.log_send[:]
+    return w
+
+
+def test_attribute_update_is_incremental(mock_comm):
+    w = _widget(mock_comm)
+    w.set_node_attrs(['n7'], {'V_th': [-50.0]})
+    (args, kwargs), = mock_comm.log_send
+    content = kwargs['data']['content']
+    assert content['method'] == 'diff'
+    assert [op['op'] for op in content['ops']] == ['set_node_attrs']
+    assert sum(len(bytes(b)) for b in kwargs['buffers']) < 32
+    assert w.graph.node_attrs['V_th'][7] == -50.0
+
+
+def test_scalar_attribute_is_broadcast(mock_comm):
+    w = _widget(mock_comm, n=3)
+    w.add_nodes(['c', 'd'], {'class': 'LeakyIAF'})
+    w.set_node_attrs(['n0', 'c'], {'V_th': -50.0})
+    assert len(mock_comm.log_send) == 2
+    (args, kwargs) = mock_comm.log_send[0]
+    op, = kwargs['data']['content']['ops']
+    assert op['attrs']['class']['shape'] == [2]
+    assert op['attrs']['class']['categories'] == ['LeakyIAF']
+    assert list(w.graph.node_attrs['V_th'][[0, 3]]) == [-50.0, -50.0]
+
+
+def test_failed_diff_is_not_resent(mock_comm):
+    w = _widget(mock_comm, n=3)
+    w._diff.set_node_attrs(['n0'], {'V_th': object()})
+    with pytest.raises(TypeError):
+        w.send_diff()
+    w.set_node_attrs(['n1'], {'V_th': [-50.0]})
+    (args, kwargs), = mock_comm.log_send
+    assert [op['op'] for op in kwargs['data']['content']['ops']] == ['set_node_attrs']
+
+
+def test_hold_diff_batches(mock_comm):
+    w = _widget(mock_comm, n=10)
+    with w.hold_diff():
+        w.add_nodes(['x'])
+        keys = w.add_edges(['x'], ['n0'], {'weight': [0.5]})
+        w.remove_nodes(['n9'])
+    (args, kwargs), = mock_comm.log_send
+    ops = kwargs['data']['content']['ops']
+    assert [op['op'] for op in ops] == ['add_nodes', 'add_edges', 'drop_nodes']
+    assert keys[0] == 9
+    assert w.graph.n_nodes == 10
+    assert w.graph.n_edges == 9
+
+
+def test_diff_buffer_paths(mock_comm):
+    w = _widget(mock_comm, n=3)
+    w.remove_nodes(['n1'])
+    (args, kwargs), = mock_comm.log_send
+    content = kwargs['data']['content']
+    path, = content['buffer_paths']
+    assert path == ['ops', 0, 'id', 'buffer']
+    op = dict(content['ops'][0], id=dict(content['ops'][0]['id'], buffer=kwargs['buffers'][0]))
+    assert list(strings_from_binary(op['id'])) == ['n1']
+
+
+def test_set_graph_discards_pending_diff(mock_comm):
+    w = _widget(mock_comm, n=3)
+    with w.hold_diff():
+        w.add_nodes(['x'])
+        w.set_graph(['a'], [], [])
+    assert all(kwargs['data']['method'] == 'update' for args, kwargs in mock_comm.log_send)
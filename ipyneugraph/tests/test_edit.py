@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from .test_diff import _widget
+
+
+def test_edits_applied_in_one_answering_diff(mock_comm):
+    w = _widget(mock_comm, n=4)
+    applied = []
+    w.on_edit(applied.append)
+    w._handle_custom_msg({'event': 'edits', 'seq': 1, 'epoch': w._edit_epoch, 'ops': [
+        {'op': 'move', 'id': ['n0', 'gone'], 'x': [1.0, 2.0], 'y': [3.0, 4.0]},
+        {'op': 'add_nodes', 'id': ['new', 'n1'], 'x': [5.0, 6.0], 'y': [7.0, 8.0]},
+        {'op': 'add_edges', 'id': ['~1', '~2'], 'source': ['new', 'gone'], 'target': ['n0', 'n0']},
+        {'op': 'drop_edges', 'id': ['0']},
+    ]}, [])
+    (args, kwargs), = mock_comm.log_send
+    content = kwargs['data']['content']
+    assert content['edits'] == 1
+    assert [op['op'] for op in content['ops']] == [
+        'set_node_attrs', 'add_nodes', 'add_edges', 'drop_edges']
+    assert list(w.graph.node_ids) == ['n0', 'n1', 'n2', 'n3', 'new']
+    assert w.graph.node_attrs['x'][0] == 1.0
+    key, = applied[0][2]['id']
+    assert w.graph.source[w.graph.edge_rows([key])[0]] == 4
+    assert 0 not in w.graph.edge_keys
+    # provisional keys of answered batches still resolve
+    w._handle_custom_msg({'event': 'edits', 'seq': 2, 'epoch': w._edit_epoch, 'ops': [
+        {'op': 'drop_edges', 'id': ['~1']}, {'op': 'drop_nodes', 'id': ['n3', 'n3']}]}, [])
+    assert key not in w.graph.edge_keys
+    assert list(w.graph.node_ids) == ['n0', 'n1', 'n2', 'new']
+    assert len(applied) == 2
+
+
+def test_edits_of_replaced_graph_are_dropped(mock_comm):
+    w = _widget(mock_comm, n=4)
+    epoch = w._edit_epoch
+    w.set_graph(['a', 'b'], [0], [1])
+    assert w._edit_epoch == epoch + 1
+    del mock_comm.log_send[:]
+    w._handle_custom_msg({'event': 'edits', 'seq': 3, 'epoch': epoch,
+                          'ops': [{'op': 'drop_nodes', 'id': ['a']}]}, [])
+    (args, kwargs), = mock_comm.log_send
+    assert kwargs['data']['content']['edits'] == 3
+    assert kwargs['data']['content']['ops'] == []
+    assert w.graph.n_nodes == 2
+
+
+def test_changes_of_filtered_view_reach_full_graph(mock_comm):
+    w = _widget(mock_comm, n=6)
+    w.filter(['n0', 'n1', 'n2'])
+    w._handle_custom_msg({'event': 'edits', 'seq': 1, 'epoch': w._edit_epoch, 'ops': [
+        {'op': 'move', 'id': ['n0'], 'x': [1.0], 'y': [2.0]},
+        # n5 is only hidden by the filter
+        {'op': 'add_nodes', 'id': ['new', 'n5'], 'x': [3.0, 4.0], 'y': [5.0, 6.0]},
+        {'op': 'add_edges', 'id': ['~1'], 'source': ['new'], 'target': ['n1']},
+        {'op': 'drop_nodes', 'id': ['n2']},
+    ]}, [])
+    w.set_node_attrs(['n4', 'n0'], {'V_th': -40.0})
+    hidden, shown = w.add_edges(['n4', 'n0'], ['n5', 'n1'])
+    assert list(w.graph.edge_keys[-1:]) == [shown]
+    w.remove_edges([0])
+    w.expand_all()
+    full = w.graph
+    assert list(full.node_ids) == ['n0', 'n1', 'n3', 'n4', 'n5', 'new']
+    assert full.node_attrs['x'][0] == 1.0
+    np.testing.assert_array_equal(full.node_attrs['V_th'], [-40.0, -55.0, -55.0, -40.0, -55.0, np.nan])
+    edges = set(zip(full.node_ids[full.source], full.node_ids[full.target], full.edge_keys))
+    assert edges == {('n3', 'n4', 3), ('n4', 'n5', 4), ('new', 'n1', 5), ('n4', 'n5', hidden),
+                     ('n0', 'n1', shown)}
+
+
+def test_overview_cannot_be_changed(mock_comm):
+    w = _widget(mock_comm, n=4)
+    w.editable = True
+    w.collapse(by='V_th')
+    assert not w.editable
+    with pytest.raises(RuntimeError):
+        w.remove_nodes([w.graph.node_ids[0]])
+    w._handle_custom_msg({'event': 'edits', 'seq': 1, 'epoch': w._edit_epoch,
+                          'ops': [{'op': 'drop_nodes', 'id': [w.graph.node_ids[0]]}]}, [])
+    w.expand_all()
+    assert w.graph.n_nodes == 4
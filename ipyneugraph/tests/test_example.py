@@ -11,4 +11,5 @@ from ..ipyneugraph import NeuGraphWidget
 
 def test_example_creation_blank():
     w = NeuGraphWidget()
-    assert w.value == 'Hello World'
+    assert w.graph.n_nodes == 0
+    assert w.height == '500px'
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import io
+
+import numpy as np
+import pytest
+
+from ..convert import networkx_to_store
+from ..formats import read_gexf, read_graph, read_graphml, write_gexf, write_graph
+from ..ipyneugraph import NeuGraphWidget
+from ..store import GraphStore
+
+nx = pytest.importorskip('networkx')
+
+
+@pytest.fixture
+def lpu():
+    G = nx.MultiDiGraph()
+    G.add_node('n0', **{'class': 'LeakyIAF', 'name': 'n0', 'V_th': -55.0, 'resting_potential': -70.0})
+    G.add_node('n1', **{'class': 'HodgkinHuxley', 'name': 'n1 & <n2>', 'g_K': 36.0})
+    G.add_node('n2', **{'class': 'LeakyIAF', 'name': 'n2', 'V_th': -50.0, 'resting_potential': -65.0})
+    G.add_edge('n0', 'n1', **{'class': 'AlphaSynapse', 'gmax': 0.1, 'delay': 2})
+    G.add_edge('n0', 'n1', **{'class': 'AlphaSynapse', 'gmax': 0.2, 'delay': 3})
+    G.add_edge('n2', 'n0', **{'class': 'PowerGPotGPot', 'slope': 4.0})
+    return G
+
+
+def assert_same(store, expected):
+    assert list(store.node_ids) == list(expected.node_ids)
+    np.testing.assert_array_equal(store.source, expected.source)
+    np.testing.assert_array_equal(store.target, expected.target)
+    for kind in ('node', 'edge'):
+        attrs, tables = getattr(store, kind + '_attrs'), getattr(store, kind + '_tables')
+        expected_attrs = getattr(expected, kind + '_attrs')
+        expected_tables = getattr(expected, kind + '_tables')
+        assert sorted(attrs) == sorted(expected_attrs)
+        for name in expected_attrs:
+            np.testing.assert_array_equal(attrs[name], expected_attrs[name])
+        assert sorted(tables) == sorted(expected_tables)
+        for name, (rows, columns) in expected_tables.items():
+            np.testing.assert_array_equal(tables[name][0], rows)
+            assert sorted(tables[name][1]) == sorted(columns)
+            for key, column in columns.items():
+                np.testing.assert_array_equal(tables[name][1][key], column)
+
+
+@pytest.mark.parametrize('write, read', [(nx.write_graphml, read_graphml),
+                                         (nx.write_gexf, read_gexf)])
+def test_reads_networkx_files(lpu, tmp_path, write, read):
+    path = str(tmp_path / 'lpu.xml')
+    write(lpu, path)
+    store = read(path)
+    expected = networkx_to_store(lpu)
+    # NetworkX also writes its edge keys to GEXF files
+    store.edge_attrs.pop('networkx_key', None)
+    assert_same(store, expected)
+    assert store.node_tables['LeakyIAF'][1]['V_th'].dtype == np.float64
+    assert store.edge_tables['AlphaSynapse'][1]['delay'].dtype == np.int64
+
+
+@pytest.mark.parametrize('name', ['lpu.graphml', 'lpu.gexf', 'lpu.graphml.gz', 'lpu.gexf.gz'])
+def test_round_trip(lpu, tmp_path, name):
+    store = networkx_to_store(lpu)
+    path = tmp_path / name
+    write_graph(store, path)
+    assert_same(read_graph(path), store)
+
+
+def test_gexf_positions_and_defaults():
+    gexf = b'''<?xml version="1.0" encoding="UTF-8"?>
+<gexf xmlns="http://gexf.net/1.3" xmlns:viz="http://gexf.net/1.3/viz" version="1.3">
+  <graph defaultedgetype="directed">
+    <attributes class="node">
+      <attribute id="0" title="spiking" type="boolean"><default>false</default></attribute>
+    </attributes>
+    <nodes>
+      <node id="a" label="A"><viz:position x="1.5" y="-2" z="0"/></node>
+      <node id="b"><attvalues><attvalue for="0" value="true"/></attvalues>
+        <viz:position x="0" y="3"/></node>
+    </nodes>
+    <edges><edge source="a" target="b" weight="0.5"/><edge source="b" target="c"/></edges>
+  </graph>
+</gexf>'''
+    store = read_gexf(io.BytesIO(gexf))
+    assert list(store.node_ids) == ['a', 'b', 'c']
+    np.testing.assert_array_equal(store.node_attrs['spiking'], [False, True, False])
+    np.testing.assert_array_equal(store.node_attrs['x'], [1.5, 0, np.nan])
+    assert store.node_attrs['x'].dtype == np.float32
+    assert list(store.node_attrs['label']) == ['A', '', '']
+    np.testing.assert_array_equal(store.edge_attrs['weight'], [0.5, np.nan])
+    buffer = io.StringIO()
+    write_gexf(store.subgraph(np.array([True, True, False])), buffer)
+    again = read_gexf(io.BytesIO(buffer.getvalue().encode()))
+    np.testing.assert_array_equal(again.node_attrs['y'], [-2, 3])
+
+
+def test_widget_files(lpu, tmp_path, mock_comm):
+    path = tmp_path / 'lpu.graphml'
+    nx.write_graphml(lpu, str(path))
+    w = NeuGraphWidget.from_file(path, comm=mock_comm)
+    assert w.graph.n_edges == 3
+    w.remove_nodes(['n1'])
+    w.to_file(tmp_path / 'edited.gexf')
+    assert list(read_graph(tmp_path / 'edited.gexf').node_ids) == ['n0', 'n2']
+    with pytest.raises(ValueError):
+        read_graph(tmp_path / 'lpu.json')
+
+
+def test_widget_writes_edits_of_filtered_view(lpu, tmp_path, mock_comm):
+    w = NeuGraphWidget(graph=networkx_to_store(lpu), comm=mock_comm)
+    w.filter(['n0', 'n1'])
+    w._handle_custom_msg({'event': 'edits', 'seq': 1, 'epoch': w._edit_epoch, 'ops': [
+        {'op': 'add_nodes', 'id': ['n3'], 'x': [1.0], 'y': [2.0]},
+        {'op': 'add_edges', 'id': ['~1'], 'source': ['n3'], 'target': ['n0']},
+        {'op': 'drop_nodes', 'id': ['n1']}]}, [])
+    w.to_file(tmp_path / 'edited.graphml')
+    store = read_graph(tmp_path / 'edited.graphml')
+    assert list(store.node_ids) == ['n0', 'n2', 'n3']
+    assert sorted(zip(store.node_ids[store.source], store.node_ids[store.target])) == [
+        ('n2', 'n0'), ('n3', 'n0')]
+
+
+def test_empty_graph(tmp_path):
+    write_graph(GraphStore(), tmp_path / 'empty.graphml')
+    assert read_graph(tmp_path / 'empty.graphml').n_nodes == 0
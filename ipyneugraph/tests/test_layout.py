@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..layout import forceatlas2, layout_cache, _repulsion
+
+
+def _two_cliques(k=20):
+    src, tgt = [], []
+    for offset in (0, k):
+        for i in range(k):
+            for j in range(i + 1, k):
+                src.append(offset + i)
+                tgt.append(offset + j)
+    src.append(0)
+    tgt.append(k)
+    return 2 * k, np.array(src), np.array(tgt)
+
+
+def test_barnes_hut_matches_exact_repulsion():
+    rng = np.random.RandomState(1)
+    pos = rng.normal(size=(500, 2))
+    mass = rng.randint(1, 5, size=500).astype(float)
+    approx = _repulsion(pos, mass, 1.0, leaf_size=8)
+    d = pos[:, None, :] - pos[None, :, :]
+    d2 = (d ** 2).sum(axis=2)
+    np.fill_diagonal(d2, np.inf)
+    exact = (d * (mass[:, None] * mass[None, :] / d2)[:, :, None]).sum(axis=1)
+    err = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1)
+    assert np.median(err) < 0.05
+
+
+def test_forceatlas2_separates_communities():
+    n, src, tgt = _two_cliques()
+    pos = forceatlas2(n, src, tgt, iterations=200)
+    assert pos.dtype == np.float32 and pos.shape == (n, 2)
+    assert np.isfinite(pos).all()
+    a, b = pos[:n // 2], pos[n // 2:]
+    within = np.linalg.norm(a - a.mean(axis=0), axis=1).mean()
+    between = np.linalg.norm(a.mean(axis=0) - b.mean(axis=0))
+    assert between > within
+
+
+def test_compute_layout_sends_positions_and_caches(mock_comm, monkeypatch):
+    layout_cache.clear()
+    n, src, tgt = _two_cliques(5)
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['n%d' % i for i in range(n)], src, tgt)
+    del mock_comm.log_send[:]
+    pos = w.compute_layout(iterations=10)
+    (args, kwargs), = mock_comm.log_send
+    assert kwargs['data']['content']['method'] == 'positions'
+    assert len(bytes(kwargs['buffers'][0])) == n * 2 * 4
+    np.testing.assert_array_equal(w.graph.node_attrs['x'], pos[:, 0])
+
+    import ipyneugraph.ipyneugraph as module
+    monkeypatch.setattr(module, 'forceatlas2', None)
+    # a second widget with the same circuit hits the cache
+    w2 = NeuGraphWidget()
+    w2.set_graph(['n%d' % i for i in range(n)], src, tgt)
+    np.testing.assert_array_equal(w2.compute_layout(iterations=10), pos)
+
+
+def test_compute_layout_from_initial_positions(mock_comm):
+    layout_cache.clear()
+    n = 2000
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['n%d' % i for i in range(n)], np.arange(n - 1), np.arange(1, n))
+    pos = np.zeros((n, 2))
+    pos[:, 0] = np.arange(n)
+    first = w.compute_layout(iterations=0, pos=pos)
+    np.testing.assert_array_equal(first, pos)
+    # differs only where the array's repr elides values
+    pos[n // 2] = -1.0
+    second = w.compute_layout(iterations=0, pos=pos)
+    np.testing.assert_array_equal(second[n // 2], [-1.0, -1.0])
+
+
+def test_start_layout_message(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b'], [0], [1])
+    del mock_comm.log_send[:]
+    w.start_layout(max_iterations=50, weight='weight')
+    (args, kwargs), = mock_comm.log_send
+    content = kwargs['data']['content']
+    assert content == {'method': 'start_layout', 'weight': 'weight',
+                       'settings': {'maxIterations': 50}}
+    with pytest.raises(TypeError):
+        w.start_layout(iterations=10)
+
+
+def test_worker_positions_written_back(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b'], [0], [1])
+    positions = np.array([[1, 2], [3, 4]], dtype='<f4')
+    w._handle_custom_msg({'event': 'layout_done', 'converged': True, 'shape': [2, 2]},
+                         [memoryview(positions.tobytes())])
+    np.testing.assert_array_equal(w.graph.node_attrs['x'], [1, 3])
+    np.testing.assert_array_equal(w.graph.node_attrs['y'], [2, 4])
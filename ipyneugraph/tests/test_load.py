@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from ..store import GraphStore
+from .test_diff import _widget
+
+
+def _run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def test_load_async_sends_chunks(mock_comm):
+    w = _widget(mock_comm, n=1)
+    source = GraphStore.from_arrays(
+        ['n%d' % i for i in range(5)], [0, 1, 2, 3], [1, 2, 3, 4],
+        node_attrs={'V': np.arange(5.0)})
+    progress = []
+    w.observe(lambda change: progress.append(change['new']), 'load_progress')
+    store = _run(w.load_async(source, chunk_size=2))
+    assert store is w.graph
+    assert store.fingerprint() == source.fingerprint()
+    diffs = [kwargs['data']['content'] for args, kwargs in mock_comm.log_send
+             if kwargs['data'].get('content', {}).get('method') == 'diff']
+    assert [op['op'] for d in diffs for op in d['ops']] == ['add_nodes'] * 3 + ['add_edges'] * 2
+    assert progress[-1] == 1.0
+    assert not w.loading
+
+
+def test_cancel_load_keeps_partial_graph(mock_comm):
+    w = _widget(mock_comm, n=1)
+    source = GraphStore.from_arrays(['n%d' % i for i in range(6)], [], [])
+
+    async def load():
+        task = w.load_async(source, chunk_size=2)
+        await asyncio.sleep(0)
+        w._handle_custom_msg({'event': 'cancel_load'}, [])
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    _run(load())
+    assert 0 < w.graph.n_nodes < 6
+    assert not w.loading
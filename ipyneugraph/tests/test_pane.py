@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphPane, NeuGraphWidget
+from ..store import GraphStore
+from .conftest import MockComm
+
+
+@pytest.fixture
+def chain():
+    # n0 -> n1 -> n2 -> n3 -> n4, plus n5 -> n2
+    return GraphStore.from_arrays(
+        ['n%d' % i for i in range(6)], [0, 1, 2, 3, 5], [1, 2, 3, 4, 2],
+        node_attrs={'class': ['LIF', 'HH', 'LIF', 'HH', 'LIF', 'HH'],
+                    'V_th': [-55.0, np.nan, -45.0, np.nan, -60.0, np.nan]},
+        edge_attrs={'gmax': [0.1, 0.2, 0.3, 0.4, 0.5]})
+
+
+def test_pane_filters_shared_graph(mock_comm, chain):
+    w = NeuGraphWidget(comm=mock_comm, graph=chain)
+    pane = w.view(comm=MockComm(), height='300px')
+    assert isinstance(pane, NeuGraphPane) and pane.source is w
+    assert pane.get_state('source')['source'] == 'IPY_MODEL_' + w.model_id
+    pane.filter('in_degree > 0', edges='gmax > 0.2')
+    msg = pane.comm.log_send[-1]
+    content = msg[1]['data']['content']
+    assert content['method'] == 'filter'
+    assert len(msg[1]['buffers']) == 2
+    rows, keys = [np.frombuffer(b, dtype=np.uint32) for b in msg[1]['buffers']]
+    assert rows.tolist() == [1, 2, 3, 4]
+    assert keys.tolist() == [2, 3]
+    # the graph itself is only synced to the source widget
+    assert w.graph.n_nodes == 6
+    sent = len(pane.comm.log_send)
+    pane._handle_custom_msg({'event': 'request_filter'}, [])
+    assert len(pane.comm.log_send) == sent + 1
+    w.graph = GraphStore.from_arrays(['x', 'y'], [0], [1], edge_attrs={'gmax': [1.0]})
+    rows = np.frombuffer(pane.comm.log_send[-1][1]['buffers'][0], dtype=np.uint32)
+    assert rows.tolist() == [1]
+    pane.filter()
+    assert pane.comm.log_send[-1][1]['data']['content']['nodes'] is None
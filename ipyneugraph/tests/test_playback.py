@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+
+h5py = pytest.importorskip('h5py')
+
+
+def _record(path, **dataset_kwargs):
+    # NeuroDriver layout: one group per variable with data and uids,
+    # recording only a subset of the nodes in a different order
+    data = np.arange(40, dtype=np.float64).reshape(10, 4)
+    with h5py.File(path, 'w') as f:
+        group = f.create_group('V')
+        group.create_dataset('data', data=data, **dataset_kwargs)
+        group.create_dataset('uids', data=np.array([b'd', b'b', b'a', b'x']))
+    return data
+
+
+def _widget(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b', 'c', 'd'], [0, 1], [1, 2])
+    return w
+
+
+@pytest.mark.parametrize('dataset_kwargs,mapped', [
+    ({}, True),
+    ({'chunks': (2, 4), 'compression': 'gzip'}, False),
+])
+def test_playback_streams_current_step(tmp_path, mock_comm, dataset_kwargs, mapped):
+    path = str(tmp_path / 'output.h5')
+    _record(path, **dataset_kwargs)
+    w = _widget(mock_comm)
+    player = w.playback(path, size='V', size_range=(0, 39), node_sizes=(0.0, 39.0))
+    assert isinstance(player._traces['V'].data, np.memmap) == mapped
+    assert w.style['node_size'] == {'attr': 'V', 'range': [0.0, 39.0], 'domain': [0.0, 39.0],
+                                    'scale': 'linear'}
+
+    player.seek(5)
+    V = w.graph.node_attrs['V']
+    # row 4*5 = [20, 21, 22, 23] for uids d, b, a, x; 'x' is not in the graph
+    np.testing.assert_allclose(V[[3, 1, 0]], [20, 21, 22])
+    assert np.isnan(V[2])
+    assert player.time == 'step 5 / 9'
+    player.close()
+
+
+def test_playback_window_and_colors(tmp_path, mock_comm):
+    path = str(tmp_path / 'output.h5')
+    _record(path)
+    w = _widget(mock_comm)
+    player = w.playback(path, color='V', window=3, reduce='mean')
+    assert w.style['node_color']['domain'] == [0.0, 39.0]
+    player.seek(9)
+    # mean of rows 7..9 = [32, 33, 34, 35] + [-4, -4, ...]
+    np.testing.assert_allclose(w.graph.node_attrs['V'][[3, 1, 0]], [32, 33, 34])
+
+    player.step = 100
+    assert player.step == 9
+    player.close()
+
+
+def test_playback_ticks(tmp_path, mock_comm):
+    path = str(tmp_path / 'output.h5')
+    _record(path)
+    w = _widget(mock_comm)
+    player = w.playback(path, size='V', stride=4)
+    player._tick()
+    player._tick()
+    assert player.step == 8
+    player.playing = True
+    player._tick()
+    assert player.step == 9 and not player.playing
+    player.close()
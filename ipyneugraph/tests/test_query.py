@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..query import dijkstra, hop_distance, node_mask, paths_between, select, shortest_paths
+from ..store import GraphStore
+
+
+@pytest.fixture
+def chain():
+    # n0 -> n1 -> n2 -> n3 -> n4, plus n5 -> n2
+    return GraphStore.from_arrays(
+        ['n%d' % i for i in range(6)], [0, 1, 2, 3, 5], [1, 2, 3, 4, 2],
+        node_attrs={'class': ['LIF', 'HH', 'LIF', 'HH', 'LIF', 'HH'],
+                    'V_th': [-55.0, np.nan, -45.0, np.nan, -60.0, np.nan]},
+        edge_attrs={'gmax': [0.1, 0.2, 0.3, 0.4, 0.5]})
+
+
+def test_expressions(chain):
+    mask = node_mask(chain, "class == 'LIF' and V_th < -50")
+    assert mask.tolist() == [True, False, False, False, True, False]
+    mask = node_mask(chain, "not (class in ['HH']) or id == 'n1'")
+    assert mask.tolist() == [True, True, True, False, True, False]
+    assert node_mask(chain, 'isnan(V_th)').sum() == 3
+    assert node_mask(chain, 'degree >= 3').tolist() == [False] * 2 + [True] + [False] * 3
+    with pytest.raises(ValueError):
+        node_mask(chain, 'bogus > 1')
+    with pytest.raises(ValueError):
+        node_mask(chain, "__import__('os')")
+
+
+def test_hops_and_paths(chain):
+    seed = node_mask(chain, ['n0'])
+    np.testing.assert_array_equal(hop_distance(chain, seed), [0, 1, 2, 3, 4, 3])
+    np.testing.assert_array_equal(hop_distance(chain, seed, 2, 'in'), [0, -1, -1, -1, -1, -1])
+    nodes, edges = paths_between(chain, node_mask(chain, ['n0', 'n5']),
+                                 node_mask(chain, ['n3']), max_length=3)
+    assert nodes.tolist() == [True, True, True, True, False, True]
+    assert edges.tolist() == [True, True, True, False, True]
+
+
+def test_select_combines(chain):
+    nodes, edges = select(chain, "class == 'LIF'", hops=1, direction='out', edges='gmax > 0.15')
+    assert nodes.tolist() == [True, True, True, True, True, False]
+    assert edges.tolist() == [False, True, True, True, False]
+
+
+def test_filter_syncs_subgraph(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.graph = GraphStore.from_arrays(
+        ['a', 'b', 'c'], [0, 1], [1, 2], node_attrs={'V': [1.0, 2.0, 3.0]})
+    w.filter('V > 1.5')
+    assert list(w.graph.node_ids) == ['b', 'c']
+    np.testing.assert_array_equal(w.graph.edge_keys, [1])
+    assert w.full_graph.n_nodes == 3
+    # queries always run against the full graph
+    w.filter(['a'], hops=1)
+    assert list(w.graph.node_ids) == ['a', 'b']
+    w.filter()
+    assert w.graph.n_nodes == 3
+
+
+@pytest.fixture
+def diamond():
+    # a -> b -> d and a -> c -> d, with a long direct edge a -> d
+    return GraphStore.from_arrays(
+        ['a', 'b', 'c', 'd'], [0, 1, 0, 2, 0], [1, 3, 2, 3, 3],
+        edge_attrs={'w': [1.0, 1.0, 1.0, 2.0, 5.0]})
+
+
+def test_shortest_paths(diamond):
+    a, d = node_mask(diamond, ['a']), node_mask(diamond, ['d'])
+    nodes, edges = shortest_paths(diamond, a, d)
+    assert nodes.tolist() == [True, False, False, True]
+    assert edges.tolist() == [False, False, False, False, True]
+    w = diamond.edge_column('w')
+    np.testing.assert_array_equal(dijkstra(diamond, a, w), [0, 1, 1, 2])
+    nodes, edges = shortest_paths(diamond, a, d, w)
+    assert nodes.tolist() == [True, True, False, True]
+    assert edges.tolist() == [True, True, False, False, False]
+    nodes, edges = shortest_paths(diamond, d, a, w)
+    assert not nodes.any() and not edges.any()
+
+
+def test_pick_highlights_paths(mock_comm, diamond):
+    w = NeuGraphWidget(comm=mock_comm, path_query='shortest', path_weight='w')
+    w.graph = diamond
+    w._handle_custom_msg({'event': 'pick', 'node': 'a'}, [])
+    w._handle_custom_msg({'event': 'pick', 'node': 'd'}, [])
+    content = mock_comm.log_send[-1][1]['data']['content']
+    assert content['method'] == 'highlight'
+    assert content['nodes']['shape'] == [3]
+    assert content['edges']['shape'] == [2]
+    w.highlight()
+    assert mock_comm.log_send[-1][1]['data']['content']['nodes'] is None
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..recorder import Recorder, RingBuffer
+from ..serializers import array_from_binary
+from ..store import GraphStore
+
+
+def test_ring_buffer_wraps():
+    ring = RingBuffer(4)
+    ring.append([0, 1, 2])
+    np.testing.assert_array_equal(ring.since(1), [1, 2])
+    ring.append([3, 4, 5])
+    assert len(ring) == 4
+    np.testing.assert_array_equal(ring.since(0), [2, 3, 4, 5])
+    ring.append(np.arange(6, 16))
+    np.testing.assert_array_equal(ring.since(13), [13, 14, 15])
+    np.testing.assert_array_equal(ring.since(0), [12, 13, 14, 15])
+
+
+def _decode(content):
+    return {k: array_from_binary(content[k]) for k in ('t', 'values', 'spike_t', 'spike_unit')}
+
+
+def test_recorder_sends_only_new_samples():
+    sent = []
+    clock = [0.0]
+    recorder = Recorder(sent.append, ['a', 'b'], capacity=3, interval=0.1,
+                        clock=lambda: clock[0], schedule=None)
+    recorder.record(0.0, [1, 2], spikes=[True, False])
+    recorder.record([0.01, 0.02], [[3, 4], [5, 6]], spikes=[[False, True], [True, True]])
+    assert len(sent) == 1
+    clock[0] = 0.2
+    recorder.maybe_flush()
+    delta = _decode(sent[-1])
+    np.testing.assert_array_equal(delta['t'], [0.01, 0.02])
+    np.testing.assert_array_equal(delta['values'], [[3, 4], [5, 6]])
+    np.testing.assert_array_equal(delta['spike_t'], [0.01, 0.02, 0.02])
+    np.testing.assert_array_equal(delta['spike_unit'], [1, 0, 1])
+    assert not sent[-1]['reset']
+
+    recorder.resend()
+    history = _decode(sent[-1])
+    assert sent[-1]['reset']
+    np.testing.assert_array_equal(history['t'], [0.0, 0.01, 0.02])
+    assert len(history['spike_t']) == 4
+
+
+def test_widget_record(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.graph = GraphStore.from_arrays(['a', 'b', 'c'], [], [])
+    with pytest.raises(KeyError):
+        w.record(['x'])
+    recorder = w.record(['c', 'a'], capacity=100)
+    assert mock_comm.log_send[-1][1]['data']['state']['recording']['neurons'] == ['c', 'a']
+    recorder.record(0.0, [-70.0, -65.0])
+    content = mock_comm.log_send[-1][1]['data']['content']
+    assert content['method'] == 'samples'
+    w._handle_custom_msg({'event': 'request_history'}, [])
+    assert mock_comm.log_send[-1][1]['data']['content']['reset']
+    w.stop_recording()
+    assert w.recording == {}
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..serializers import (
+    array_to_binary, array_from_binary, column_to_binary, column_from_binary,
+    strings_to_binary, strings_from_binary, graph_to_json, graph_from_json
+)
+
+
+def test_array_roundtrip():
+    ar = np.arange(12, dtype=np.float32).reshape(3, 4)
+    value = array_to_binary(ar)
+    assert value['dtype'] == 'float32'
+    assert value['shape'] == [3, 4]
+    assert isinstance(value['buffer'], memoryview)
+    np.testing.assert_array_equal(array_from_binary(value), ar)
+
+
+def test_int64_is_narrowed():
+    value = array_to_binary(np.arange(5, dtype=np.int64))
+    assert value['dtype'] == 'int32'
+    value = array_to_binary(np.array([2 ** 40], dtype=np.int64))
+    assert value['dtype'] == 'float64'
+
+
+def test_strings_roundtrip():
+    ids = ['a', 'neuron/ü', '']
+    assert list(strings_from_binary(strings_to_binary(ids))) == ids
+    assert len(strings_from_binary(strings_to_binary([]))) == 0
+
+
+def test_categorical_column():
+    value = column_to_binary(np.array(['LeakyIAF', 'Alpha', 'LeakyIAF']))
+    assert value['categories'] == ['Alpha', 'LeakyIAF']
+    assert value['dtype'] == 'uint8'
+    assert list(column_from_binary(value)) == ['LeakyIAF', 'Alpha', 'LeakyIAF']
+
+
+def test_distinct_strings_are_packed():
+    names = np.array(['neuron%d' % i for i in range(1000)], dtype=object)
+    value = column_to_binary(names)
+    assert value['dtype'] == 'str'
+    assert list(column_from_binary(value)) == list(names)
+
+
+def test_graph_roundtrip():
+    graph = {
+        'nodes': {'id': np.array(['a', 'b', 'c'], dtype=object),
+                  'attrs': {'V': np.array([0.1, 0.2, 0.3])}},
+        'edges': {'source': np.array([0, 1]), 'target': np.array([1, 2]),
+                  'attrs': {'weight': np.array([1.0, 2.0], dtype=np.float32)}},
+    }
+    out = graph_from_json(graph_to_json(graph, None), None)
+    assert list(out.node_ids) == ['a', 'b', 'c']
+    np.testing.assert_array_equal(out.edge_keys, [0, 1])
+    np.testing.assert_array_equal(out.target, [1, 2])
+    np.testing.assert_array_equal(out.edge_attrs['weight'], [1.0, 2.0])
+
+
+def test_class_tables_roundtrip():
+    graph = {
+        'nodes': {'id': np.array(['a', 'b', 'c'], dtype=object),
+                  'tables': {'LIF': (np.array([0, 2]), {'V_th': np.array([-55.0, -50.0])})}},
+        'edges': {'source': np.array([0]), 'target': np.array([1])},
+    }
+    out = graph_from_json(graph_to_json(graph, None), None)
+    np.testing.assert_array_equal(out.node_tables['LIF'][0], [0, 2])
+    np.testing.assert_array_equal(out.node_column('V_th'), [-55.0, np.nan, -50.0])
+
+
+def test_graph_sent_as_buffers(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b'], [0], [1], node_attrs={'class': ['LeakyIAF', 'Alpha']})
+    (args, kwargs), = mock_comm.log_send
+    # node ids, edge keys, source, target and class codes travel as buffers
+    assert len(kwargs['buffers']) == 5
+    assert ['graph', 'nodes', 'id', 'buffer'] in kwargs['data']['buffer_paths']
+
+
+def test_set_graph_validates():
+    w = NeuGraphWidget()
+    with pytest.raises(ValueError):
+        w.set_graph(['a'], [0], [1])
+    with pytest.raises(ValueError):
+        w.set_graph(['a', 'b'], [0], [1], edge_attrs={'weight': [1, 2]})
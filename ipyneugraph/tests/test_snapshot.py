@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+from ipywidgets.widgets.widget import _put_buffers
+
+from ..ipyneugraph import NeuGraphWidget
+from ..serializers import array_to_binary, column_to_binary, graph_from_json, strings_to_binary
+
+
+def test_snapshot_payload_is_readable():
+    # layout of the snapshots the frontend saves with the notebook
+    value = {
+        'nodes': {'id': strings_to_binary(['a', 'b']),
+                  'attrs': {'x': array_to_binary(np.array([0, 1], dtype=np.float32)),
+                            'class': column_to_binary(['LeakyIAF'] * 2)},
+                  'tables': {}},
+        'edges': {'id': array_to_binary(np.array([4], dtype=np.uint32)),
+                  'source': array_to_binary(np.array([0], dtype=np.uint32)),
+                  'target': array_to_binary(np.array([1], dtype=np.uint32)),
+                  'attrs': {}, 'tables': {}},
+        'snapshot': {'partial': True, 'n_nodes': 10, 'n_edges': 20},
+    }
+    store = graph_from_json(value, None)
+    assert list(store.node_ids) == ['a', 'b']
+    assert list(store.node_attrs['class']) == ['LeakyIAF'] * 2
+    np.testing.assert_array_equal(store.edge_keys, [4])
+
+
+def test_partial_snapshot_requests_graph(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b'], [0], [1])
+    with w.hold_diff():
+        w.add_nodes(['c'])
+        del mock_comm.log_send[:]
+        w._handle_custom_msg({'event': 'request_graph'}, [])
+    # the full graph is resent, pending changes included, and the pending
+    # diff is dropped rather than applied twice
+    (args, kwargs), = mock_comm.log_send
+    data = kwargs['data']
+    assert data['method'] == 'update'
+    _put_buffers(data['state'], data['buffer_paths'], kwargs['buffers'])
+    store = graph_from_json(data['state']['graph'], None)
+    assert list(store.node_ids) == ['a', 'b', 'c']
+    np.testing.assert_array_equal(store.edge_keys, [0])
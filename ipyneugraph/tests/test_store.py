@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..store import GraphStore
+
+
+@pytest.fixture
+def store():
+    return GraphStore.from_arrays(
+        ['a', 'b', 'c'], [0, 1, 2], [1, 2, 0],
+        node_attrs={'V': [0.1, 0.2, 0.3]},
+        edge_attrs={'weight': [1.0, 2.0, 3.0]})
+
+
+def test_from_arrays(store):
+    assert store.n_nodes == 3
+    assert store.n_edges == 3
+    assert 'b' in store
+    np.testing.assert_array_equal(store.edge_keys, [0, 1, 2])
+
+
+def test_add_nodes_pads_attributes(store):
+    store.add_nodes(['d'], {'class': ['LeakyIAF']})
+    assert np.isnan(store.node_attrs['V'][3])
+    assert list(store.node_attrs['class']) == ['', '', '', 'LeakyIAF']
+    with pytest.raises(ValueError):
+        store.add_nodes(['a'])
+
+
+def test_remove_nodes_drops_incident_edges(store):
+    removed = store.remove_nodes(['b'])
+    np.testing.assert_array_equal(removed, [0, 1])
+    assert list(store.node_ids) == ['a', 'c']
+    np.testing.assert_array_equal(store.edge_keys, [2])
+    # edge c -> a is remapped to the new rows
+    assert (store.source[0], store.target[0]) == (1, 0)
+    assert store.node_rows(['c'])[0] == 1
+
+
+def test_edges_by_key(store):
+    keys = store.add_edges(['a'], ['c'], {'weight': [4.0]})
+    np.testing.assert_array_equal(keys, [3])
+    store.remove_edges([1])
+    store.set_edge_attrs([3], {'weight': [5.0]})
+    np.testing.assert_array_equal(store.edge_attrs['weight'], [1.0, 3.0, 5.0])
+    with pytest.raises(KeyError):
+        store.edge_rows([1])
+
+
+def test_set_node_attrs_upcasts(store):
+    store.set_node_attrs(['a'], {'spiking': [1]})
+    store.set_node_attrs(['b'], {'spiking': [0.5]})
+    np.testing.assert_array_equal(store.node_attrs['spiking'], [1, 0.5, 0])
+
+
+def test_adjacency(store):
+    store.add_edges(['a'], ['c'])
+    assert list(store.successors('a')) == ['b', 'c']
+    assert list(store.predecessors('c')) == ['b', 'a']
+    assert list(store.out_edges('a')) == [0, 3]
+    np.testing.assert_array_equal(store.degree(), [3, 2, 3])
+    store.remove_nodes(['b'])
+    assert list(store.successors('a')) == ['c']
+
+
+@pytest.fixture
+def circuit():
+    return GraphStore.from_arrays(
+        ['n0', 'n1', 'n2', 'n3'], [0, 1], [1, 2],
+        node_attrs={'class': ['LIF', 'HH', 'LIF', 'HH']},
+        node_tables={'LIF': ([2, 0], {'V_th': [-50.0, -55.0]}),
+                     'HH': ([1, 3], {'g_K': [36.0, 30.0]})})
+
+
+def test_class_tables(circuit):
+    rows, table = circuit.node_tables['LIF']
+    np.testing.assert_array_equal(rows, [0, 2])
+    np.testing.assert_array_equal(table['V_th'], [-55.0, -50.0])
+    np.testing.assert_array_equal(circuit.node_column('g_K'), [np.nan, 36.0, np.nan, 30.0])
+    attrs = circuit.gather_node_attrs([2, 3])
+    assert attrs['class'].tolist() == ['LIF', 'HH']
+    np.testing.assert_array_equal(attrs['V_th'], [-50.0, np.nan])
+
+    circuit.set_node_attrs(['n2'], {'V_th': [-45.0], 'class': ['LIF2']})
+    assert circuit.node_tables['LIF'][1]['V_th'][1] == -45.0
+    assert circuit.node_attrs['class'][2] == 'LIF2'
+    with pytest.raises(ValueError):
+        circuit.set_node_attrs(['n1'], {'V_th': [-45.0]})
+
+    circuit.remove_nodes(['n0', 'n1'])
+    rows, table = circuit.node_tables['LIF']
+    np.testing.assert_array_equal(rows, [0])
+    np.testing.assert_array_equal(circuit.node_column('g_K'), [np.nan, 30.0])
+
+
+def test_class_tables_roundtrip(circuit):
+    copy = GraphStore.from_payload(circuit.to_payload())
+    np.testing.assert_array_equal(copy.node_column('V_th'), circuit.node_column('V_th'))
+    assert set(copy.node_tables) == {'LIF', 'HH'}
+
+
+def test_extend_from_builds_copy_in_chunks():
+    full = GraphStore.from_arrays(
+        ['a', 'b', 'c', 'd'], [0, 1, 2], [1, 2, 3],
+        node_attrs={'V': [0.1, 0.2, 0.3, 0.4]},
+        node_tables={'LeakyIAF': ([1, 3], {'R': [1.0, 2.0]})},
+        edge_attrs={'weight': [1.0, 2.0, 3.0]})
+    full.remove_edges([0])
+    part = GraphStore()
+    part.extend_from(full, 2, 0)
+    assert list(part.node_ids) == ['a', 'b']
+    np.testing.assert_array_equal(part.node_tables['LeakyIAF'][0], [1])
+    with pytest.raises(ValueError):
+        part.extend_from(full, 2, 1)
+    part.extend_from(full, 4, 2)
+    np.testing.assert_array_equal(part.edge_keys, [1, 2])
+    np.testing.assert_array_equal(part.node_tables['LeakyIAF'][1]['R'], [1.0, 2.0])
+    assert part.fingerprint() == full.fingerprint()
+    assert part.add_edges(['a'], ['d'])[0] == 3
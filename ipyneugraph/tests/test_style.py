@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import pytest
+from traitlets import TraitError
+
+from ..ipyneugraph import NeuGraphWidget
+from ..style import COLORMAPS, DEFAULT_SIZE_RANGE, validate_style
+
+
+def test_defaults_are_filled_in():
+    style = validate_style({'node_color': 'V', 'edge_width': {'attr': 'gmax', 'scale': 'log'}})
+    assert style['node_color'] == {'attr': 'V', 'scale': 'linear',
+                                   'colormap': COLORMAPS['viridis']}
+    assert style['edge_width'] == {'attr': 'gmax', 'scale': 'log',
+                                   'range': DEFAULT_SIZE_RANGE['edge_width']}
+
+
+def test_domain_range_and_custom_colormap():
+    style = validate_style({
+        'node_color': {'attr': 'V', 'colormap': ['#000000', '#ffffff'], 'domain': (-70, -40)},
+        'node_size': {'attr': 'spike', 'range': (2, 8)},
+    })
+    assert style['node_color']['domain'] == [-70.0, -40.0]
+    assert style['node_color']['colormap'] == ['#000000', '#ffffff']
+    assert style['node_size']['range'] == [2.0, 8.0]
+
+
+@pytest.mark.parametrize('style', [
+    {'node_shape': 'V'},
+    {'node_color': {'scale': 'linear'}},
+    {'node_color': {'attr': 'V', 'scale': 'exp'}},
+    {'node_color': {'attr': 'V', 'colormap': 'jet'}},
+    {'node_color': {'attr': 'V', 'colormap': ['red', 'blue']}},
+    {'node_size': {'attr': 'V', 'range': 3}},
+    {'edge_color': {'attr': 'w', 'domain': ['a', 'b']}},
+])
+def test_invalid_specs_are_rejected(style):
+    with pytest.raises(TraitError):
+        validate_style(style)
+
+
+def test_set_style_merges_and_removes_channels(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_style(node_color='V', node_size={'attr': 'spike'})
+    w.set_style(node_color={'attr': 'V', 'colormap': 'magma'}, node_size=None)
+    assert list(w.style) == ['node_color']
+    assert w.style['node_color']['colormap'] == COLORMAPS['magma']
+    with pytest.raises(TraitError):
+        w.set_style(edge_width={'attr': 'w', 'scale': 'cubic'})
+    assert list(w.style) == ['node_color']
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+
+from ..ipyneugraph import NeuGraphWidget
+from ..store import GraphStore
+from ..sync import ChunkedTransfer, FrameThrottle
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _throttle(columns, **kwargs):
+    frames = []
+    clock = FakeClock()
+    throttle = FrameThrottle(lambda *frame: frames.append(frame), lambda: columns,
+                             interval=0.1, clock=clock, schedule=None, **kwargs)
+    return throttle, frames, clock
+
+
+def test_writes_within_interval_are_coalesced():
+    columns = {'V': np.zeros(100)}
+    throttle, frames, clock = _throttle(columns)
+    for step in range(10):
+        columns['V'][:] = step
+        throttle.mark('V', None, 100)
+        throttle.maybe_flush()
+    assert len(frames) == 1
+    assert throttle.pending
+    clock.now = 0.1
+    throttle.maybe_flush()
+    assert len(frames) == 2
+    seq, rows, values = frames[-1]
+    assert seq == 1 and rows['V'] is None
+    np.testing.assert_array_equal(values['V'], 9)
+    assert throttle.writes_coalesced == 8
+
+
+def test_partial_rows_and_full_columns():
+    columns = {'V': np.arange(100.0)}
+    throttle, frames, clock = _throttle(columns)
+    throttle.mark('V', [3, 7], 100)
+    throttle.mark('V', [5], 100)
+    throttle.flush()
+    _, rows, values = frames[-1]
+    np.testing.assert_array_equal(rows['V'], [3, 5, 7])
+    np.testing.assert_array_equal(values['V'], [3.0, 5.0, 7.0])
+
+    throttle.mark('V', np.arange(50), 100)
+    throttle.flush()
+    _, rows, values = frames[-1]
+    assert rows['V'] is None and len(values['V']) == 100
+
+
+def test_in_flight_cap_and_ack():
+    columns = {'V': np.zeros(10)}
+    throttle, frames, clock = _throttle(columns, max_in_flight=2, ack_timeout=10.0)
+    for step in range(3):
+        clock.now = step
+        throttle.mark('V', None, 10)
+        throttle.maybe_flush()
+    assert len(frames) == 2 and throttle.in_flight == 2
+    throttle.ack(0)
+    assert len(frames) == 3 and throttle.in_flight == 2
+
+
+def test_unacknowledged_frames_expire():
+    columns = {'V': np.zeros(10)}
+    throttle, frames, clock = _throttle(columns, max_in_flight=1, ack_timeout=1.0)
+    throttle.mark('V', None, 10)
+    throttle.maybe_flush()
+    clock.now = 0.5
+    throttle.mark('V', None, 10)
+    assert not throttle.maybe_flush()
+    clock.now = 1.5
+    assert throttle.maybe_flush()
+    assert len(frames) == 2
+
+
+def test_push_state_sends_frame(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b', 'c'], [0, 1], [1, 2])
+    w.max_fps = 1e-3
+    w.push_state({'V': [1.0, 2.0, 3.0]})
+    w.push_state({'V': [-1.0]}, node_ids=['b'])
+    w.push_state({'V': [-2.0]}, node_ids=['c'])
+    frames = [kw for _, kw in mock_comm.log_send
+              if kw['data'].get('content', {}).get('method') == 'frame']
+    assert len(frames) == 1
+    np.testing.assert_array_equal(w.graph.node_attrs['V'], [1.0, -1.0, -2.0])
+
+    w.flush_state()
+    content = mock_comm.log_send[-1][1]['data']['content']
+    assert content['method'] == 'frame' and content['seq'] == 1
+    assert content['attrs']['V']['rows'] is None
+
+    w._handle_custom_msg({'event': 'frame_ack', 'seq': 1}, [])
+    assert w._frames.in_flight == 0
+
+
+def test_chunked_transfer_caps_in_flight():
+    sent = []
+    transfer = ChunkedTransfer(lambda content, buffers: sent.append((content, buffers)),
+                               chunk_bytes=4, max_in_flight=2)
+    tid = transfer.start({'state': {}}, [b'abcdef', b'', b'gh', b'ijklm'])
+    header = sent[0][0]
+    assert header['method'] == 'chunked'
+    assert header['sizes'] == [6, 0, 2, 5]
+    assert header['chunks'] == 4
+    assert [c['seq'] for c, _ in sent[1:]] == [0, 1]
+    transfer.ack(tid, 0)
+    transfer.ack(tid - 1, 1)
+    assert len(sent) == 4
+    transfer.ack(tid, 2)
+    assert transfer.active
+    transfer.ack(tid, 3)
+    assert not transfer.active
+    buffers = [bytearray(n) for n in header['sizes']]
+    for content, slices in sent[1:]:
+        for (i, offset), piece in zip(content['parts'], slices):
+            buffers[i][offset:offset + len(piece)] = piece
+    assert [bytes(b) for b in buffers] == [b'abcdef', b'', b'gh', b'ijklm']
+
+
+def test_large_graph_is_sent_in_chunks(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm, chunk_bytes=1024, max_chunks_in_flight=3)
+    del mock_comm.log_send[:]
+    n = 1000
+    w.graph = GraphStore.from_arrays(['n%d' % i for i in range(n)], np.arange(n - 1),
+                                     np.arange(1, n))
+    contents = [kwargs['data'].get('content', {}) for args, kwargs in mock_comm.log_send]
+    assert all(kwargs['data']['method'] == 'custom' for args, kwargs in mock_comm.log_send)
+    header = contents[0]
+    assert header['method'] == 'chunked'
+    assert 'graph' in header['state']
+    assert len(contents) == 1 + 3
+    w._handle_custom_msg({'event': 'chunk_ack', 'transfer': header['transfer'], 'seq': 2}, [])
+    assert len(mock_comm.log_send) == 1 + 6
+
+    # a small graph supersedes the running transfer
+    w.graph = GraphStore.from_arrays(['a'], [], [])
+    methods = [kwargs['data']['content']['method'] for args, kwargs in mock_comm.log_send[7:]]
+    assert methods == ['chunked', 'chunk']
+    w._handle_custom_msg({'event': 'chunk_ack', 'transfer': header['transfer'] + 1, 'seq': 0}, [])
+    w.graph = GraphStore.from_arrays(['b'], [], [])
+    assert mock_comm.log_send[-1][1]['data']['method'] == 'update'
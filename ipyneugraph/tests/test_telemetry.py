@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..store import GraphStore
+from ..telemetry import FIELDS, Telemetry
+
+
+def _widget(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm, profiling=True)
+    del mock_comm.log_send[:]
+    return w
+
+
+def test_records_are_bounded():
+    telemetry = Telemetry(max_records=2)
+    for _ in range(3):
+        telemetry.record('diff', [b'abc'])
+    assert [r['id'] for r in telemetry.to_records()] == [1, 2]
+    assert telemetry.to_records()[0]['bytes'] == 3
+
+
+def test_update_is_followed_by_profile_message(mock_comm):
+    w = _widget(mock_comm)
+    w.graph = GraphStore.from_arrays(['a', 'b'], [0], [1])
+    (_, update), (_, profile) = mock_comm.log_send
+    assert update['data']['method'] == 'update'
+    content = profile['data']['content']
+    assert content['method'] == 'profile'
+    record, = w.telemetry.to_records()
+    assert record['method'] == 'update'
+    assert record['buffers'] == len(update['buffers'])
+    assert record['serialize_ms'] >= 0
+    assert record['rtt_ms'] is None
+
+    completed = []
+    w.telemetry.on_record(completed.append)
+    w._handle_custom_msg({'event': 'telemetry', 'id': content['profile_id'],
+                          'decode_ms': 1.0, 'apply_ms': 2.0, 'render_ms': 3.0}, [])
+    record, = completed
+    assert record['rtt_ms'] >= 0
+    assert record['render_ms'] == 3.0
+
+
+def test_custom_messages_carry_profile_id(mock_comm):
+    w = _widget(mock_comm)
+    w.add_nodes(['x'])
+    (_, diff), = mock_comm.log_send
+    content = diff['data']['content']
+    assert content['method'] == 'diff'
+    assert w.telemetry.to_records()[-1]['id'] == content['profile_id']
+
+
+def test_not_recorded_unless_profiling(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.add_nodes(['x'])
+    assert len(w.telemetry) == 0
+    assert 'profile_id' not in mock_comm.log_send[-1][1]['data']['content']
+
+
+def test_to_dataframe(mock_comm):
+    pytest.importorskip('pandas')
+    w = _widget(mock_comm)
+    w.chunk_bytes = 16
+    w.graph = GraphStore.from_arrays(['n%d' % i for i in range(10)], np.arange(9),
+                                     np.arange(1, 10))
+    df = w.telemetry.to_dataframe()
+    assert list(df.columns) == list(FIELDS[1:])
+    assert df['method'].iloc[0] == 'chunked'
+    assert (df['method'] == 'chunk').sum() == w._chunks.chunks_sent
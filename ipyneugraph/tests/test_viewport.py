@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+import numpy as np
+import pytest
+
+from ..ipyneugraph import NeuGraphWidget
+from ..store import GraphStore
+from ..viewport import TileIndex, morton
+
+
+def _grid_graph(k=40):
+    i, j = np.meshgrid(np.arange(k), np.arange(k), indexing='ij')
+    ids = ['%d-%d' % (a, b) for a, b in zip(i.ravel(), j.ravel())]
+    rows = np.arange(k * k).reshape(k, k)
+    src = np.concatenate([rows[:-1].ravel(), rows[:, :-1].ravel()])
+    tgt = np.concatenate([rows[1:].ravel(), rows[:, 1:].ravel()])
+    attrs = {'x': i.ravel().astype(np.float32), 'y': j.ravel().astype(np.float32)}
+    return GraphStore.from_arrays(ids, src, tgt, attrs)
+
+
+def test_morton_tiles_are_contiguous():
+    assert morton(np.array([0, 0, 1, 1]), np.array([0, 1, 0, 1])).tolist() == [0, 1, 2, 3]
+    assert morton(np.array([3]), np.array([5])).tolist() == [0b011011]
+
+
+def test_tiles_respect_capacity_and_cover_everything():
+    rng = np.random.RandomState(0)
+    x, y = rng.normal(size=(2, 5000))
+    index = TileIndex(x, y, rng.rand(5000), capacity=100)
+    assert len(index.tile(0, 0, 0)) == 100
+    for level in range(index.levels + 1):
+        g = 1 << level
+        sizes = [len(index.tile(level, i, j)) for i in range(g) for j in range(g)]
+        assert max(sizes) <= 100 or level == index.levels
+    # the finest level shows every node exactly once
+    g = 1 << index.levels
+    rows = np.concatenate([index.tile(index.levels, i, j) for i in range(g) for j in range(g)])
+    assert sorted(rows.tolist()) == list(range(5000))
+
+
+def test_query_returns_nodes_in_viewport():
+    rng = np.random.RandomState(1)
+    x, y = rng.uniform(0, 10, size=(2, 2000))
+    index = TileIndex(x, y, capacity=50)
+    rows = index.query(2, 2, 3, 3, level=index.levels)
+    inside = np.flatnonzero((x >= 2) & (x <= 3) & (y >= 2) & (y <= 3))
+    assert set(inside) <= set(rows)
+
+
+def test_widget_lazy_loading(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.graph = _grid_graph()
+    w.lazy_load(tile_capacity=64)
+    assert w.lazy_loading
+    assert w.graph.n_nodes == 64 and w.full_graph.n_nodes == 1600
+
+    w._handle_custom_msg({'event': 'viewport', 'x0': 10, 'y0': 10, 'x1': 14, 'y1': 14}, [])
+    content = mock_comm.log_send[-1][1]['data']['content']
+    assert content['method'] == 'diff'
+    assert [op['op'] for op in content['ops']] == ['add_nodes', 'add_edges']
+    assert {'12-12', '10-14'} <= set(w.graph.node_ids)
+    # edges only between loaded nodes
+    assert w.graph.n_edges > 0
+    n = w.graph.n_nodes
+    w._handle_custom_msg({'event': 'viewport', 'x0': 11, 'y0': 11, 'x1': 13, 'y1': 13}, [])
+    assert w.graph.n_nodes >= n
+
+    w.expand_all()
+    assert w.graph.n_nodes == 1600 and not w.lazy_loading
+
+
+def test_lazy_loading_requires_positions(mock_comm):
+    w = NeuGraphWidget(comm=mock_comm)
+    w.set_graph(['a', 'b'], [0], [1])
+    with pytest.raises(ValueError):
+        w.lazy_load()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Tingkai liu.
+# Distributed under the terms of the Modified BSD License.
+
+"""
+Viewport-driven lazy loading over a tiled spatial index.
+
+The layout's bounding square is cut into a quadtree of tiles, as in web
+maps: level ``z`` has ``2**z x 2**z`` tiles. Each tile holds at most
+``capacity`` nodes at its own level, picking the highest-degree nodes of
+its area, so a zoomed-out view shows the hubs of the whole graph and
+zooming in reveals the rest. Nodes are sorted by the Morton code of their
+finest tile, which makes every tile of every level a contiguous slice of
+that order.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_LEVEL = 16
+
+
+def _spread(v):
+    """Interleave the bits of ``v`` with zeros (16 -> 32 bits)."""
+    v = v.astype(np.int64) & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def morton(i, j):
+    """Z-order code of tile coordinates ``(i, j)``."""
+    return (_spread(i) << 1) | _spread(j)
+
+
+class TileIndex(object):
+    """Quadtree of tiles over node positions.
+
+    Parameters
+    ----------
+    x, y : array_like of float
+        Node positions.
+    importance : array_like of float, optional
+        Nodes kept first when a tile is over capacity, e.g. degrees.
+    capacity : int, optional
+        Maximum number of nodes a tile shows at its own level.
+    cache_size : int, optional
+        Number of tiles whose node rows are kept in memory.
+    """
+
+    def __init__(self, x, y, importance=None, capacity=1000, cache_size=256):
+        pos = np.stack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)], axis=1)
+        n = len(pos)
+        if not np.isfinite(pos).all():
+            raise ValueError('node positions must be finite')
+        importance = np.zeros(n) if importance is None \
+            else np.asarray(importance, dtype=np.float64).copy()
+        if n:
+            # keep the extreme nodes at every level so the frontend's
+            # camera extent covers the whole layout from the start
+            importance[[pos[:, 0].argmin(), pos[:, 0].argmax(),
+                        pos[:, 1].argmin(), pos[:, 1].argmax()]] = np.inf
+        self.capacity = capacity
+        self.origin = pos.min(axis=0) if n else np.zeros(2)
+        self.extent = max(float((pos.max(axis=0) - self.origin).max()), 1e-9) * (1 + 1e-9) \
+            if n else 1.0
+        unit = (pos - self.origin) / self.extent
+
+        self.levels = 0
+        while self.levels < MAX_LEVEL:
+            g = 1 << self.levels
+            cell = np.minimum((unit * g).astype(np.int64), g - 1)
+            counts = np.bincount(cell[:, 0] * g + cell[:, 1])
+            if not len(counts) or counts.max() <= capacity:
+                break
+            self.levels += 1
+        g = 1 << self.levels
+        cell = np.minimum((unit * g).astype(np.int64), g - 1)
+        code = morton(cell[:, 0], cell[:, 1])
+        self.order = np.lexsort((-importance, code))
+        self.codes = code[self.order]
+
+        # level from which each node is shown: the first level at which it
+        # ranks among the top `capacity` nodes of its tile
+        min_level = np.full(n, self.levels, dtype=np.int64)
+        for level in range(self.levels - 1, -1, -1):
+            tile = code >> (2 * (self.levels - level))
+            order = np.lexsort((-importance, tile))
+            starts = np.flatnonzero(np.r_[True, tile[order][1:] != tile[order][:-1]])
+            rank = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+            selected = order[rank < capacity]
+            min_level[selected] = level
+        self.min_level = min_level
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def level_for(self, width):
+        """Level whose tiles are about half the size of a viewport of
+        ``width`` graph units."""
+        if width <= 0:
+            return self.levels
+        return int(np.clip(np.ceil(np.log2(self.extent / width)) + 1, 0, self.levels))
+
+    def tiles(self, level, x0, y0, x1, y1):
+        """Tiles of ``level`` overlapping a rectangle, as ``(i, j)``."""
+        g = 1 << level
+        lo = np.floor((np.array([x0, y0]) - self.origin) / self.extent * g).astype(np.int64)
+        hi = np.floor((np.array([x1, y1]) - self.origin) / self.extent * g).astype(np.int64)
+        lo = np.clip(lo, 0, g - 1)
+        hi = np.clip(hi, 0, g - 1)
+        return [(i, j) for i in range(lo[0], hi[0] + 1) for j in range(lo[1], hi[1] + 1)]
+
+    def tile(self, level, i, j):
+        """Rows of the nodes shown in tile ``(level, i, j)``."""
+        key = (level, i, j)
+        rows = self._cache.get(key)
+        if rows is not None:
+            self._cache.move_to_end(key)
+            return rows
+        shift = 2 * (self.levels - level)
+        prefix = int(morton(np.array([i]), np.array([j]))[0])
+        start, stop = np.searchsorted(self.codes, [prefix << shift, (prefix + 1) << shift])
+        rows = self.order[start:stop]
+        rows = rows[self.min_level[rows] <= level]
+        self._cache[key] = rows
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rows
+
+    def query(self, x0, y0, x1, y1, level=None):
+        """Rows of the nodes shown in a viewport rectangle.
+        """
+        if level is None:
+            level = self.level_for(max(x1 - x0, y1 - y0))
+        tiles = self.tiles(level, x0, y0, x1, y1)
+        if not tiles:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.tile(level, i, j) for i, j in tiles])
+
+
+class ViewportLoader(object):
+    """Tracks which nodes of ``store`` the frontend has received.
+
+    Parameters
+    ----------
+    store : GraphStore
+        Full graph, with ``x``/``y`` node attributes.
+    capacity : int, optional
+        Maximum number of nodes a tile shows at its own level.
+    """
+
+    def __init__(self, store, capacity=1000):
+        if 'x' not in store.node_attrs or 'y' not in store.node_attrs:
+            raise ValueError('lazy loading requires x/y node positions; '
+                             'call compute_layout() first')
+        self.store = store
+        degree = np.bincount(store.source, minlength=store.n_nodes) \
+            + np.bincount(store.target, minlength=store.n_nodes)
+        self.index = TileIndex(store.node_attrs['x'], store.node_attrs['y'], degree, capacity)
+        self.loaded = np.zeros(store.n_nodes, dtype=bool)
+
+    def load(self, x0, y0, x1, y1, margin=0.25):
+        """Nodes and edges a viewport needs that were not loaded yet.
+
+        The rectangle is enlarged by ``margin`` of its size on every side
+        so that small pans are already covered.
+
+        Returns
+        -------
+        rows : ndarray of int
+            Full-graph rows of the new nodes.
+        edges : ndarray of int
+            Full-graph rows of the edges between loaded nodes that have at
+            least one new endpoint.
+        """
+        dx, dy = (x1 - x0) * margin, (y1 - y0) * margin
+        level = self.index.level_for(max(x1 - x0, y1 - y0))
+        rows = self.index.query(x0 - dx, y0 - dy, x1 + dx, y1 + dy, level)
+        rows = np.unique(rows[~self.loaded[rows]])
+        return rows, self._mark(rows)
+
+    def load_overview(self):
+        """Nodes and edges of the coarsest level."""
+        rows = np.sort(self.index.tile(0, 0, 0))
+        return rows, self._mark(rows)
+
+    def nodes(self, rows):
+        """IDs and attributes of the nodes at ``rows``."""
+        store = self.store
+        return store.node_ids[rows], store.gather_node_attrs(rows)
+
+    def edges(self, rows):
+        """Endpoint IDs and attributes of the edges at ``rows``."""
+        store = self.store
+        return (store.node_ids[store.source[rows]], store.node_ids[store.target[rows]],
+                store.gather_edge_attrs(rows))
+
+    def _mark(self, rows):
+        new = np.zeros(self.store.n_nodes, dtype=bool)
+        new[rows] = True
+        self.loaded |= new
+        source, target = self.store.source, self.store.target
+        return np.flatnonzero(self.loaded[source] & self.loaded[target]
+                              & (new[source] | new[target]))
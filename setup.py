@@ -87,12 +87,16 @@ setup_args = dict(
     include_package_data = True,
     install_requires = [
         'ipywidgets>=7.0.0',
+        'numpy',
     ],
     extras_require = {
         'test': [
             'pytest>=3.6',
             'pytest-cov',
             'nbval',
+            'networkx',
+            'h5py',
+            'scipy',
         ],
         'examples': [
             # Any requirements for the examples to run
@@ -0,0 +1,124 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Decoding of compressed buffers (see ipyneugraph/codec.py).
+ *
+ * Decoding runs before the synchronous deserializers in serializers.ts: it
+ * replaces every encoded buffer by the plain little-endian bytes of its
+ * `dtype`. Inflating uses the browser's native DecompressionStream, which
+ * runs off the main JavaScript thread.
+ */
+
+const QUANTIZE_LEVELS = 65534;
+const QUANTIZE_NAN = 65535;
+
+const ARRAY_TYPES: {[dtype: string]: any} = {
+  int8: Int8Array,
+  uint8: Uint8Array,
+  int16: Int16Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array,
+};
+
+export
+interface ICodecStep {
+  name: string;
+  dtype?: string;
+  first?: number;
+  range?: [number, number];
+  nbytes?: number;
+}
+
+/**
+ * The codecs this browser can decode, announced to the kernel.
+ */
+export
+function supportedCodecs(): string[] {
+  const codecs = ['delta', 'quantize'];
+  if (typeof (self as any).DecompressionStream !== 'undefined') {
+    codecs.push('zlib');
+  }
+  return codecs;
+}
+
+function inflate(bytes: Uint8Array): Promise<Uint8Array> {
+  const stream = new Blob([bytes]).stream().pipeThrough(
+    new (self as any).DecompressionStream('deflate'));
+  return new Response(stream).arrayBuffer().then(buffer => new Uint8Array(buffer));
+}
+
+function toBytes(array: any): Uint8Array {
+  return new Uint8Array(array.buffer, array.byteOffset, array.byteLength);
+}
+
+function view(bytes: Uint8Array, dtype: string): any {
+  const ctor = ARRAY_TYPES[dtype];
+  // copy when unaligned, as the typed array constructor requires alignment
+  const aligned = bytes.byteOffset % ctor.BYTES_PER_ELEMENT === 0 ? bytes : bytes.slice();
+  return new ctor(aligned.buffer, aligned.byteOffset, aligned.byteLength / ctor.BYTES_PER_ELEMENT);
+}
+
+/**
+ * Undo the synchronous (delta and quantize) steps.
+ */
+function unpack(bytes: Uint8Array, step: ICodecStep, dtype: string): Uint8Array {
+  const input = view(bytes, step.dtype!);
+  const out = new (ARRAY_TYPES[dtype] || Float64Array)(input.length);
+  if (step.name === 'delta') {
+    let acc = step.first!;
+    for (let i = 0; i < input.length; ++i) {
+      acc += input[i];
+      out[i] = acc;
+    }
+  } else if (step.name === 'quantize') {
+    const [lo, hi] = step.range!;
+    const scale = (hi - lo) / QUANTIZE_LEVELS;
+    for (let i = 0; i < input.length; ++i) {
+      out[i] = input[i] === QUANTIZE_NAN ? NaN : lo + input[i] * scale;
+    }
+  } else {
+    throw new Error(`Unknown codec: ${step.name}`);
+  }
+  return toBytes(out);
+}
+
+function decodeArray(value: any): Promise<void> {
+  const steps: ICodecStep[] = value.codec;
+  delete value.codec;
+  const buffer: DataView = value.buffer;
+  let result = Promise.resolve(new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength));
+  for (let i = steps.length - 1; i >= 0; --i) {
+    const step = steps[i];
+    result = result.then(bytes => step.name === 'zlib' ? inflate(bytes) : unpack(bytes, step, value.dtype));
+  }
+  return result.then(bytes => {
+    value.buffer = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  });
+}
+
+/**
+ * Decode, in place, every encoded array nested in a message or state
+ * value whose buffers have already been put back.
+ */
+export
+function decodeBuffers<T>(value: T): Promise<T> {
+  const pending: Promise<void>[] = [];
+  const visit = (v: any) => {
+    if (v === null || typeof v !== 'object' || ArrayBuffer.isView(v)) {
+      return;
+    }
+    if (Array.isArray(v.codec) && v.buffer !== undefined) {
+      pending.push(decodeArray(v));
+      return;
+    }
+    for (const key of Object.keys(v)) {
+      visit(v[key]);
+    }
+  };
+  visit(value);
+  return Promise.all(pending).then(() => value);
+}
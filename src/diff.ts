@@ -0,0 +1,96 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Application of incremental diffs sent by `ipyneugraph/diff.py`.
+ */
+
+import Graph from 'graphology';
+
+import {
+  Column, ICategorical, IColumnJSON, arrayFromJSON, columnFromJSON,
+  columnValue, stringsFromJSON
+} from './serializers';
+
+export
+interface IDiffOp {
+  op: string;
+  id: IColumnJSON;
+  source?: IColumnJSON;
+  target?: IColumnJSON;
+  attrs?: {[name: string]: IColumnJSON};
+}
+
+function decodeAttrs(attrs: {[name: string]: IColumnJSON} | undefined) {
+  const result: {[name: string]: Column | ICategorical} = {};
+  for (const name of Object.keys(attrs || {})) {
+    result[name] = columnFromJSON(attrs![name])!;
+  }
+  return result;
+}
+
+function rowAttrs(columns: {[name: string]: Column | ICategorical}, names: string[], i: number) {
+  const attrs: {[name: string]: any} = {};
+  for (const name of names) {
+    attrs[name] = columnValue(columns[name], i);
+  }
+  return attrs;
+}
+
+/**
+ * Apply a batch of diff operations to `graph` in place, in order.
+ */
+export
+function applyDiff(graph: Graph, ops: IDiffOp[]): void {
+  for (const op of ops) {
+    const attrs = decodeAttrs(op.attrs);
+    const names = Object.keys(attrs);
+    switch (op.op) {
+      case 'add_nodes': {
+        const ids = stringsFromJSON(op.id);
+        for (let i = 0; i < ids.length; ++i) {
+          graph.addNode(ids[i], rowAttrs(attrs, names, i));
+        }
+        break;
+      }
+      case 'drop_nodes': {
+        for (const id of stringsFromJSON(op.id)) {
+          graph.dropNode(id);
+        }
+        break;
+      }
+      case 'set_node_attrs': {
+        const ids = stringsFromJSON(op.id);
+        for (let i = 0; i < ids.length; ++i) {
+          graph.mergeNodeAttributes(ids[i], rowAttrs(attrs, names, i));
+        }
+        break;
+      }
+      case 'add_edges': {
+        const keys = arrayFromJSON(op.id)!;
+        const sources = stringsFromJSON(op.source!);
+        const targets = stringsFromJSON(op.target!);
+        for (let i = 0; i < keys.length; ++i) {
+          graph.addEdgeWithKey(String(keys[i]), sources[i], targets[i], rowAttrs(attrs, names, i));
+        }
+        break;
+      }
+      case 'drop_edges': {
+        const keys = arrayFromJSON(op.id)!;
+        for (let i = 0; i < keys.length; ++i) {
+          graph.dropEdge(String(keys[i]));
+        }
+        break;
+      }
+      case 'set_edge_attrs': {
+        const keys = arrayFromJSON(op.id)!;
+        for (let i = 0; i < keys.length; ++i) {
+          graph.mergeEdgeAttributes(String(keys[i]), rowAttrs(attrs, names, i));
+        }
+        break;
+      }
+      default:
+        throw new Error(`Unknown diff operation: ${op.op}`);
+    }
+  }
+}
@@ -0,0 +1,309 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Optimistic graph editing (see NeuGraphWidget.editable).
+ *
+ * Edits apply to the graphology graph at once and are logged; the log is
+ * sent to the kernel in batches, which it validates against its store and
+ * applies in bulk. The kernel answers with a diff carrying the edits it
+ * accepted and the batch they answer. Until then, added nodes and edges
+ * are provisional and deleted ones only hidden, so the graph's structure
+ * (and the node order rows refer to) only changes through the kernel's
+ * ordered messages: on the answer, the provisional changes are undone and
+ * the diff applies the kernel's version of them.
+ */
+
+import Graph from 'graphology';
+
+/**
+ * A run of edits of one kind; `x` and `y` go with `move` and `add_nodes`,
+ * `source` and `target` with `add_edges`, whose `id` are provisional keys.
+ */
+export
+interface IEditOp {
+  op: 'move' | 'add_nodes' | 'drop_nodes' | 'add_edges' | 'drop_edges';
+  id: string[];
+  x?: number[];
+  y?: number[];
+  source?: string[];
+  target?: string[];
+}
+
+/**
+ * Ordered edits, consecutive edits of one kind sharing an op and repeated
+ * moves of a node kept once.
+ */
+export
+class EditLog {
+  get length(): number {
+    return this.ops.length;
+  }
+
+  move(node: string, x: number, y: number) {
+    const op = this.last('move');
+    const i = this.moved.get(node);
+    if (i !== undefined) {
+      op.x![i] = x;
+      op.y![i] = y;
+      return;
+    }
+    this.moved.set(node, op.id.length);
+    op.id.push(node);
+    op.x!.push(x);
+    op.y!.push(y);
+  }
+
+  addNode(node: string, x: number, y: number) {
+    const op = this.last('add_nodes');
+    op.id.push(node);
+    op.x!.push(x);
+    op.y!.push(y);
+  }
+
+  dropNode(node: string) {
+    this.last('drop_nodes').id.push(node);
+  }
+
+  addEdge(key: string, source: string, target: string) {
+    const op = this.last('add_edges');
+    op.id.push(key);
+    op.source!.push(source);
+    op.target!.push(target);
+  }
+
+  dropEdge(key: string) {
+    this.last('drop_edges').id.push(key);
+  }
+
+  /**
+   * The logged edits, leaving the log empty.
+   */
+  take(): IEditOp[] {
+    const ops = this.ops;
+    this.ops = [];
+    this.moved.clear();
+    return ops;
+  }
+
+  private last(kind: IEditOp['op']): IEditOp {
+    const last = this.ops[this.ops.length - 1];
+    if (last !== undefined && last.op === kind) {
+      return last;
+    }
+    const op: IEditOp = {op: kind, id: []};
+    if (kind === 'move' || kind === 'add_nodes') {
+      op.x = [];
+      op.y = [];
+    } else if (kind === 'add_edges') {
+      op.source = [];
+      op.target = [];
+    }
+    this.moved.clear();
+    this.ops.push(op);
+    return op;
+  }
+
+  private ops: IEditOp[] = [];
+  // row of each node in the last op, if a move
+  private moved = new Map<string, number>();
+}
+
+/**
+ * Provisional changes of one batch of edits.
+ */
+interface IBatch {
+  seq: number;
+  nodes: string[];
+  edges: {key: string, source: string, target: string}[];
+  dropped: {node: boolean, key: string}[];
+}
+
+function newBatch(seq: number): IBatch {
+  return {seq, nodes: [], edges: [], dropped: []};
+}
+
+/**
+ * Applies edits to a graph optimistically and sends them in batches.
+ */
+export
+class GraphEditor {
+  /**
+   * @param send - Called with a batch's sequence number and edits.
+   * @param delay - Milliseconds edits are collected for before sending.
+   */
+  constructor(graph: Graph, send: (seq: number, ops: IEditOp[]) => void, delay = 100) {
+    this.graph = graph;
+    this.send = send;
+    this.delay = delay;
+    this.current = newBatch(1);
+  }
+
+  /**
+   * Whether there are edits the kernel has not answered yet.
+   */
+  get pending(): boolean {
+    return this.log.length > 0 || this.sent.length > 0;
+  }
+
+  static provisional(attrs: any): boolean {
+    return attrs._provisional === true;
+  }
+
+  move(node: string, x: number, y: number) {
+    this.graph.mergeNodeAttributes(node, {x, y});
+    this.log.move(node, x, y);
+    this.schedule();
+  }
+
+  /**
+   * Add a node at (x, y) and return its ID, unique to this editor.
+   */
+  addNode(x: number, y: number): string {
+    let node: string;
+    do {
+      node = `${this.prefix}${++this.counter}`;
+    } while (this.graph.hasNode(node));
+    this.graph.addNode(node, {x, y, _provisional: true});
+    this.current.nodes.push(node);
+    this.log.addNode(node, x, y);
+    this.schedule();
+    return node;
+  }
+
+  /**
+   * Hide a node and its edges until the kernel has removed them.
+   */
+  dropNode(node: string) {
+    if (!this.graph.hasNode(node)) {
+      return;
+    }
+    this.mark(true, node);
+    this.graph.forEachEdge(node, (edge: string) => this.mark(false, edge));
+    this.log.dropNode(node);
+    this.schedule();
+  }
+
+  addEdge(source: string, target: string): string {
+    const key = `~${++this.counter}`;
+    this.graph.addEdgeWithKey(key, source, target, {_provisional: true});
+    this.current.edges.push({key, source, target});
+    this.log.addEdge(key, source, target);
+    this.schedule();
+    return key;
+  }
+
+  dropEdge(key: string) {
+    if (!this.graph.hasEdge(key)) {
+      return;
+    }
+    this.mark(false, key);
+    this.log.dropEdge(key);
+    this.schedule();
+  }
+
+  /**
+   * Send the logged edits now.
+   */
+  flush() {
+    if (this.timer !== null) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    if (this.log.length === 0) {
+      return;
+    }
+    const batch = this.current;
+    this.sent.push(batch);
+    this.current = newBatch(batch.seq + 1);
+    this.send(batch.seq, this.log.take());
+  }
+
+  /**
+   * Undo the provisional changes of the batches up to `seq`, before the
+   * kernel's diff answering them is applied.
+   */
+  acknowledge(seq: number) {
+    while (this.sent.length > 0 && this.sent[0].seq <= seq) {
+      this.revert(this.sent.shift()!);
+    }
+  }
+
+  /**
+   * Add back the provisional edges of unanswered batches removed with a
+   * provisional node, once the kernel's version of the node exists.
+   */
+  restore() {
+    for (const batch of this.sent.concat([this.current])) {
+      for (const {key, source, target} of batch.edges) {
+        if (!this.graph.hasEdge(key) && this.graph.hasNode(source) && this.graph.hasNode(target)) {
+          this.graph.addEdgeWithKey(key, source, target, {_provisional: true});
+        }
+      }
+    }
+  }
+
+  /**
+   * Forget all edits, e.g. when the kernel replaced the whole graph.
+   */
+  reset() {
+    if (this.timer !== null) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    this.log.take();
+    this.sent = [];
+    this.current = newBatch(this.current.seq);
+  }
+
+  private mark(node: boolean, key: string) {
+    if (node) {
+      this.graph.setNodeAttribute(key, '_dropped', true);
+    } else {
+      this.graph.setEdgeAttribute(key, '_dropped', true);
+    }
+    this.current.dropped.push({node, key});
+  }
+
+  private revert(batch: IBatch) {
+    const graph = this.graph;
+    for (const {key} of batch.edges) {
+      if (graph.hasEdge(key)) {
+        graph.dropEdge(key);
+      }
+    }
+    for (const node of batch.nodes) {
+      if (graph.hasNode(node)) {
+        graph.dropNode(node);
+      }
+    }
+    // what the kernel did remove, its diff removes
+    for (const {node, key} of batch.dropped) {
+      if (node && graph.hasNode(key)) {
+        graph.removeNodeAttribute(key, '_dropped');
+      } else if (!node && graph.hasEdge(key)) {
+        graph.removeEdgeAttribute(key, '_dropped');
+      }
+    }
+  }
+
+  private schedule() {
+    if (this.timer === null) {
+      this.timer = window.setTimeout(() => {
+        this.timer = null;
+        this.flush();
+      }, this.delay);
+    }
+  }
+
+  graph: Graph;
+  delay: number;
+  private send: (seq: number, ops: IEditOp[]) => void;
+  private log = new EditLog();
+  private current: IBatch;
+  private sent: IBatch[] = [];
+  private timer: number | null = null;
+  private counter = 0;
+  // new node IDs are unlikely to clash with another frontend's
+  private prefix = 'node-' + Math.random().toString(36).slice(2, 8) + '-';
+}
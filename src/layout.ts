@@ -0,0 +1,133 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Main-thread side of the Web Worker layout.
+ */
+
+import Graph from 'graphology';
+
+import {
+  DEFAULT_LAYOUT_SETTINGS, ILayoutSettings, layoutWorker
+} from './layout.worker';
+
+/**
+ * Start a worker running `layoutWorker` from an inlined Blob URL.
+ */
+export
+function createLayoutWorker(): Worker {
+  const source = `(${layoutWorker.toString()})();`;
+  const url = URL.createObjectURL(new Blob([source], {type: 'application/javascript'}));
+  const worker = new Worker(url);
+  URL.revokeObjectURL(url);
+  return worker;
+}
+
+export
+interface ILayoutProgress {
+  iteration: number;
+  done: boolean;
+  converged: boolean;
+}
+
+/**
+ * Runs ForceAtlas2 on a graphology graph in a Web Worker and writes the
+ * progressive results back into the graph's node attributes.
+ *
+ * Nodes are laid out in insertion order. Positions travel both ways as
+ * transferred Float32Arrays, so the main thread only ever copies them
+ * into the node attributes.
+ */
+export
+class LayoutSupervisor {
+  constructor(graph: Graph, onUpdate: (progress: ILayoutProgress) => void) {
+    this.graph = graph;
+    this.onUpdate = onUpdate;
+  }
+
+  get running(): boolean {
+    return this.worker !== null;
+  }
+
+  start(settings: Partial<ILayoutSettings> = {}, weightAttribute: string | null = null) {
+    this.stop();
+    const graph = this.graph;
+    const n = graph.order;
+    const positions = new Float32Array(2 * n);
+    const mass = new Float32Array(n);
+    const index: {[node: string]: number} = {};
+    const golden = Math.PI * (3 - Math.sqrt(5));
+    let i = 0;
+    graph.forEachNode((node: string, attrs: any) => {
+      index[node] = i;
+      if (typeof attrs.x === 'number' && typeof attrs.y === 'number') {
+        positions[2 * i] = attrs.x;
+        positions[2 * i + 1] = attrs.y;
+      } else {
+        const r = Math.sqrt(i + 0.5);
+        positions[2 * i] = r * Math.cos(i * golden);
+        positions[2 * i + 1] = r * Math.sin(i * golden);
+      }
+      mass[i] = 1;
+      ++i;
+    });
+    const edges = new Uint32Array(2 * graph.size);
+    const weights = weightAttribute === null ? null : new Float32Array(graph.size);
+    let e = 0;
+    graph.forEachEdge((edge: string, attrs: any, source: string, target: string) => {
+      edges[2 * e] = index[source];
+      edges[2 * e + 1] = index[target];
+      mass[index[source]] += 1;
+      mass[index[target]] += 1;
+      if (weights !== null) {
+        weights[e] = Number(attrs[weightAttribute!]) || 0;
+      }
+      ++e;
+    });
+
+    this.worker = createLayoutWorker();
+    this.worker.onmessage = (event: MessageEvent) => this.receive(event.data);
+    const transfer: ArrayBuffer[] = [positions.buffer, mass.buffer, edges.buffer];
+    if (weights !== null) {
+      transfer.push(weights.buffer);
+    }
+    this.worker.postMessage({
+      type: 'start', positions, mass, edges, weights,
+      settings: {...DEFAULT_LAYOUT_SETTINGS, ...settings},
+    }, transfer);
+  }
+
+  /**
+   * Stop the layout, keeping the positions reached so far.
+   */
+  stop() {
+    if (this.worker !== null) {
+      this.worker.terminate();
+      this.worker = null;
+    }
+  }
+
+  protected receive(data: any) {
+    if (data.type !== 'positions') {
+      return;
+    }
+    const positions: Float32Array = data.positions;
+    let i = 0;
+    // update attributes in place: one refresh instead of one event per node
+    this.graph.forEachNode((node: string, attrs: any) => {
+      attrs.x = positions[2 * i];
+      attrs.y = positions[2 * i + 1];
+      ++i;
+    });
+    this.lastPositions = positions;
+    if (data.done) {
+      this.stop();
+    }
+    this.onUpdate({iteration: data.iteration, done: data.done, converged: data.converged});
+  }
+
+  graph: Graph;
+  worker: Worker | null = null;
+  lastPositions: Float32Array | null = null;
+  protected onUpdate: (progress: ILayoutProgress) => void;
+}
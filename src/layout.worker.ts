@@ -0,0 +1,307 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * ForceAtlas2 layout running inside a Web Worker.
+ *
+ * `layoutWorker` is serialized with `Function.prototype.toString` and started
+ * from a Blob URL (see `createLayoutWorker` in `layout.ts`), so it ships in
+ * every bundle webpack produces without a separate worker chunk whose URL
+ * would depend on the notebook's base URL. It must therefore not reference
+ * anything outside its own body.
+ *
+ * Protocol (all arrays are transferred, not copied):
+ *
+ *   main -> worker  {type: 'start', positions: Float32Array(2n),
+ *                    mass: Float32Array(n), edges: Uint32Array(2e),
+ *                    weights: Float32Array(e) | null, settings}
+ *   worker -> main  {type: 'positions', positions, iteration, done, converged}
+ *
+ * The supervisor stops a layout by terminating the worker.
+ */
+
+export
+interface ILayoutSettings {
+  /**
+   * Repulsion strength.
+   */
+  scaling: number;
+  /**
+   * Attraction of every node towards the origin.
+   */
+  gravity: number;
+  /**
+   * Barnes-Hut opening criterion; larger is faster and coarser.
+   */
+  theta: number;
+  /**
+   * Tolerance of the adaptive speed to oscillation.
+   */
+  jitterTolerance: number;
+  /**
+   * Iterations run between two position updates sent to the main thread.
+   */
+  iterationsPerUpdate: number;
+  /**
+   * Upper bound on the number of iterations.
+   */
+  maxIterations: number;
+  /**
+   * Stop once the mean node displacement of an iteration drops below this.
+   */
+  convergenceThreshold: number;
+}
+
+export
+const DEFAULT_LAYOUT_SETTINGS: ILayoutSettings = {
+  scaling: 2.0,
+  gravity: 1.0,
+  theta: 1.2,
+  jitterTolerance: 1.0,
+  iterationsPerUpdate: 10,
+  maxIterations: 1000,
+  convergenceThreshold: 0.01,
+};
+
+export
+function layoutWorker() {
+  const ctx: any = self;
+  const MAX_DEPTH = 24;
+
+  let pos: Float32Array;
+  let mass: Float32Array;
+  let edges: Uint32Array;
+  let weights: Float32Array | null;
+  let settings: any;
+  let n = 0;
+  let running = false;
+  let iteration = 0;
+  let speed = 1;
+  let speedEfficiency = 1;
+  let force: Float64Array;
+  let previous: Float64Array;
+
+  // quadtree pool; a cell's body is -1 when empty, -2 when subdivided,
+  // -3 when it aggregates several bodies at MAX_DEPTH, else a node index
+  let capacity = 0;
+  let qx: Float64Array, qy: Float64Array, qsize: Float64Array;
+  let qmass: Float64Array, qcx: Float64Array, qcy: Float64Array;
+  let qbody: Int32Array, qchild: Int32Array;
+  let cells = 0;
+
+  function allocate(size: number) {
+    capacity = size;
+    qx = new Float64Array(size); qy = new Float64Array(size); qsize = new Float64Array(size);
+    qmass = new Float64Array(size); qcx = new Float64Array(size); qcy = new Float64Array(size);
+    qbody = new Int32Array(size); qchild = new Int32Array(4 * size);
+  }
+
+  function newCell(x: number, y: number, size: number): number {
+    if (cells === capacity) {
+      const old = [qx, qy, qsize, qmass, qcx, qcy, qbody, qchild];
+      allocate(capacity * 2);
+      qx.set(old[0] as Float64Array); qy.set(old[1] as Float64Array);
+      qsize.set(old[2] as Float64Array); qmass.set(old[3] as Float64Array);
+      qcx.set(old[4] as Float64Array); qcy.set(old[5] as Float64Array);
+      qbody.set(old[6] as Int32Array); qchild.set(old[7] as Int32Array);
+    }
+    const c = cells++;
+    qx[c] = x; qy[c] = y; qsize[c] = size;
+    qmass[c] = 0; qcx[c] = 0; qcy[c] = 0; qbody[c] = -1;
+    qchild[4 * c] = qchild[4 * c + 1] = qchild[4 * c + 2] = qchild[4 * c + 3] = -1;
+    return c;
+  }
+
+  function accumulate(c: number, i: number) {
+    const m = qmass[c] + mass[i];
+    qcx[c] = (qcx[c] * qmass[c] + pos[2 * i] * mass[i]) / m;
+    qcy[c] = (qcy[c] * qmass[c] + pos[2 * i + 1] * mass[i]) / m;
+    qmass[c] = m;
+  }
+
+  function childFor(c: number, i: number): number {
+    const half = qsize[c] / 2;
+    const right = pos[2 * i] >= qx[c] + half ? 1 : 0;
+    const top = pos[2 * i + 1] >= qy[c] + half ? 1 : 0;
+    const slot = 4 * c + 2 * right + top;
+    if (qchild[slot] === -1) {
+      qchild[slot] = newCell(qx[c] + right * half, qy[c] + top * half, half);
+    }
+    return qchild[slot];
+  }
+
+  function build() {
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+    for (let i = 0; i < n; ++i) {
+      minX = Math.min(minX, pos[2 * i]); maxX = Math.max(maxX, pos[2 * i]);
+      minY = Math.min(minY, pos[2 * i + 1]); maxY = Math.max(maxY, pos[2 * i + 1]);
+    }
+    cells = 0;
+    newCell(minX, minY, Math.max(maxX - minX, maxY - minY, 1e-9) * 1.0001);
+    for (let i = 0; i < n; ++i) {
+      let c = 0;
+      for (let depth = 0; ; ++depth) {
+        const body = qbody[c];
+        if (body === -1) {
+          qbody[c] = i;
+          accumulate(c, i);
+          break;
+        }
+        if (body >= 0) {
+          if (depth >= MAX_DEPTH) {
+            qbody[c] = -3;
+            accumulate(c, i);
+            break;
+          }
+          // push the resident body down one level
+          const child = childFor(c, body);
+          qbody[child] = body;
+          accumulate(child, body);
+          qbody[c] = -2;
+        } else if (body === -3) {
+          accumulate(c, i);
+          break;
+        }
+        accumulate(c, i);
+        c = childFor(c, i);
+      }
+    }
+  }
+
+  const stack: number[] = [];
+
+  function repulsion() {
+    const k = settings.scaling;
+    const theta2 = settings.theta * settings.theta;
+    for (let i = 0; i < n; ++i) {
+      const x = pos[2 * i], y = pos[2 * i + 1];
+      let fx = 0, fy = 0;
+      stack.length = 0;
+      stack.push(0);
+      while (stack.length) {
+        const c = stack.pop()!;
+        const body = qbody[c];
+        if (body === -1 || body === i) {
+          continue;
+        }
+        const dx = x - qcx[c], dy = y - qcy[c];
+        const d2 = dx * dx + dy * dy;
+        if (body === -2 && qsize[c] * qsize[c] >= theta2 * d2) {
+          for (let s = 0; s < 4; ++s) {
+            if (qchild[4 * c + s] !== -1) {
+              stack.push(qchild[4 * c + s]);
+            }
+          }
+          continue;
+        }
+        if (d2 > 0) {
+          const f = k * mass[i] * qmass[c] / d2;
+          fx += dx * f;
+          fy += dy * f;
+        }
+      }
+      force[2 * i] = fx;
+      force[2 * i + 1] = fy;
+    }
+  }
+
+  function step(): number {
+    build();
+    repulsion();
+    for (let e = 0; e < edges.length / 2; ++e) {
+      const s = edges[2 * e], t = edges[2 * e + 1];
+      const w = weights ? weights[e] : 1;
+      const dx = (pos[2 * t] - pos[2 * s]) * w, dy = (pos[2 * t + 1] - pos[2 * s + 1]) * w;
+      force[2 * s] += dx; force[2 * s + 1] += dy;
+      force[2 * t] -= dx; force[2 * t + 1] -= dy;
+    }
+    let totalSwing = 0, totalTraction = 0;
+    for (let i = 0; i < n; ++i) {
+      const x = pos[2 * i], y = pos[2 * i + 1];
+      const d = Math.sqrt(x * x + y * y) || 1;
+      force[2 * i] -= x * settings.gravity * mass[i] / d;
+      force[2 * i + 1] -= y * settings.gravity * mass[i] / d;
+      const sx = force[2 * i] - previous[2 * i], sy = force[2 * i + 1] - previous[2 * i + 1];
+      const tx = force[2 * i] + previous[2 * i], ty = force[2 * i + 1] + previous[2 * i + 1];
+      totalSwing += mass[i] * Math.sqrt(sx * sx + sy * sy);
+      totalTraction += mass[i] * Math.sqrt(tx * tx + ty * ty) / 2;
+    }
+
+    // adaptive global speed, as in the reference implementation
+    const estimatedJitter = 0.05 * Math.sqrt(n);
+    let jitter = settings.jitterTolerance * Math.max(
+      Math.sqrt(estimatedJitter), Math.min(10, estimatedJitter * totalTraction / (n * n)));
+    if (totalSwing / Math.max(totalTraction, 1e-12) > 2) {
+      if (speedEfficiency > 0.05) {
+        speedEfficiency *= 0.5;
+      }
+      jitter = Math.max(jitter, settings.jitterTolerance);
+    }
+    const targetSpeed = jitter * speedEfficiency * totalTraction / Math.max(totalSwing, 1e-12);
+    if (totalSwing > jitter * totalTraction) {
+      if (speedEfficiency > 0.05) {
+        speedEfficiency *= 0.7;
+      }
+    } else if (speed < 1000) {
+      speedEfficiency *= 1.3;
+    }
+    speed = speed + Math.min(targetSpeed - speed, 0.5 * speed);
+
+    let displacement = 0;
+    for (let i = 0; i < n; ++i) {
+      const fx = force[2 * i], fy = force[2 * i + 1];
+      const sx = fx - previous[2 * i], sy = fy - previous[2 * i + 1];
+      const swing = mass[i] * Math.sqrt(sx * sx + sy * sy);
+      const magnitude = Math.sqrt(fx * fx + fy * fy) || 1;
+      const nodeSpeed = Math.min(speed / (1 + Math.sqrt(speed * swing)), 10 / magnitude);
+      pos[2 * i] += fx * nodeSpeed;
+      pos[2 * i + 1] += fy * nodeSpeed;
+      displacement += magnitude * nodeSpeed;
+      previous[2 * i] = fx;
+      previous[2 * i + 1] = fy;
+    }
+    return n ? displacement / n : 0;
+  }
+
+  function loop() {
+    if (!running) {
+      return;
+    }
+    let converged = false;
+    for (let k = 0; k < settings.iterationsPerUpdate && iteration < settings.maxIterations; ++k) {
+      ++iteration;
+      if (step() < settings.convergenceThreshold) {
+        converged = true;
+        break;
+      }
+    }
+    const done = converged || iteration >= settings.maxIterations;
+    const positions = pos.slice();
+    ctx.postMessage({type: 'positions', positions, iteration, done, converged}, [positions.buffer]);
+    if (done) {
+      running = false;
+    } else {
+      setTimeout(loop, 0);
+    }
+  }
+
+  ctx.onmessage = (event: MessageEvent) => {
+    const data = event.data;
+    if (data.type === 'start') {
+      pos = data.positions;
+      mass = data.mass;
+      edges = data.edges;
+      weights = data.weights;
+      settings = data.settings;
+      n = mass.length;
+      force = new Float64Array(2 * n);
+      previous = new Float64Array(2 * n);
+      allocate(Math.max(2 * n, 16));
+      iteration = 0;
+      speed = 1;
+      speedEfficiency = 1;
+      running = true;
+      loop();
+    }
+  };
+}
@@ -0,0 +1,177 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Level-of-detail policy for the sigma renderer.
+ *
+ * Culling decisions are only re-evaluated when the camera crosses a zoom
+ * threshold, so panning does not reprocess the graph: sigma's reducers
+ * run once per crossing rather than once per frame.
+ */
+
+import Graph from 'graphology';
+
+import {
+  StyleMapper
+} from './style';
+
+export
+interface ILODOptions {
+  /**
+   * Camera ratio above which (i.e. zoomed out further than) edges are hidden.
+   */
+  edgeRatio: number;
+  /**
+   * Graphs with fewer edges than this are always drawn in full.
+   */
+  minEdges: number;
+  /**
+   * Rendered node size under which labels are not drawn.
+   */
+  labelSize: number;
+}
+
+export
+const DEFAULT_NODE_COLOR = '#5f7fbf';
+
+export
+const DEFAULT_EDGE_COLOR = '#cccccc';
+
+export
+const HIGHLIGHT_COLOR = '#d62728';
+
+export
+const DIMMED_COLOR = '#e8e8e8';
+
+/**
+ * Node and edge keys to highlight; everything else is dimmed.
+ */
+export
+interface IHighlight {
+  nodes: Set<string>;
+  edges: Set<string>;
+}
+
+export
+class LevelOfDetail {
+  constructor(graph: Graph, options: ILODOptions, style: StyleMapper | null = null) {
+    this.graph = graph;
+    this.options = options;
+    this.style = style;
+    this.nodeReducer = this.nodeReducer.bind(this);
+    this.edgeReducer = this.edgeReducer.bind(this);
+  }
+
+  /**
+   * Sigma settings implementing this policy.
+   */
+  settings(): any {
+    const large = this.graph.size >= this.options.minEdges;
+    return {
+      nodeReducer: this.nodeReducer,
+      edgeReducer: this.edgeReducer,
+      labelRenderedSizeThreshold: this.options.labelSize,
+      hideEdgesOnMove: large,
+      hideLabelsOnMove: large,
+    };
+  }
+
+  /**
+   * Update the policy for a new camera ratio.
+   *
+   * Returns whether the culled set changed, i.e. whether the renderer must
+   * reprocess the graph.
+   */
+  update(ratio: number): boolean {
+    const hide = this.graph.size >= this.options.minEdges && ratio > this.options.edgeRatio;
+    if (hide === this.edgesHidden) {
+      return false;
+    }
+    this.edgesHidden = hide;
+    return true;
+  }
+
+  nodeReducer(node: string, data: any): any {
+    const result = {
+      ...data,
+      label: data.label || data.name || node,
+      size: data.size || 2,
+      color: data.color || DEFAULT_NODE_COLOR,
+    };
+    if (this.style) {
+      this.style.applyNode(node, result);
+    }
+    if (data._dropped || this.filter !== null && !this.filter.nodes.has(node)) {
+      result.hidden = true;
+    }
+    if (this.selected !== null && this.selected.has(node)) {
+      result.highlighted = true;
+    }
+    if (this.highlight !== null) {
+      if (this.highlight.nodes.has(node)) {
+        result.highlighted = true;
+      } else {
+        result.color = DIMMED_COLOR;
+        result.label = '';
+      }
+    }
+    return result;
+  }
+
+  edgeReducer(edge: string, data: any): any {
+    const result = {
+      ...data,
+      hidden: this.edgesHidden || data.hidden || data._dropped ||
+        (this.filter !== null && !this.filter.edges.has(edge)),
+      size: data.size || 0.5,
+      color: data.color || DEFAULT_EDGE_COLOR,
+    };
+    if (this.style && !result.hidden) {
+      this.style.applyEdge(edge, result);
+    }
+    if (this.highlight !== null) {
+      if (this.highlight.edges.has(edge)) {
+        // highlighted paths stay visible when edges are culled
+        result.hidden = Boolean(data._dropped) ||
+          this.filter !== null && !this.filter.edges.has(edge);
+        result.color = HIGHLIGHT_COLOR;
+        result.size = Math.max(result.size, 2);
+      } else {
+        result.color = DIMMED_COLOR;
+      }
+    }
+    return result;
+  }
+
+  graph: Graph;
+  options: ILODOptions;
+  style: StyleMapper | null;
+  edgesHidden = false;
+  highlight: IHighlight | null = null;
+  /**
+   * Nodes and edges shown, if not all (see NeuGraphPane.filter).
+   */
+  filter: IHighlight | null = null;
+  /**
+   * Nodes selected for editing.
+   */
+  selected: Set<string> | null = null;
+}
+
+/**
+ * Give nodes without coordinates a position on a phyllotaxis spiral, which
+ * spreads any number of nodes evenly until a real layout is available.
+ */
+export
+function ensurePositions(graph: Graph): void {
+  const golden = Math.PI * (3 - Math.sqrt(5));
+  let i = 0;
+  graph.forEachNode((node: string, attrs: any) => {
+    // the store pads the positions of nodes added after a layout with NaN
+    if (!Number.isFinite(attrs.x) || !Number.isFinite(attrs.y)) {
+      const r = Math.sqrt(i + 0.5);
+      graph.mergeNodeAttributes(node, {x: r * Math.cos(i * golden), y: r * Math.sin(i * golden)});
+    }
+    ++i;
+  });
+}
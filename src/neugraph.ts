@@ -2,7 +2,7 @@
 // Distributed under the terms of the Modified BSD License.
 
 import {
-  DOMWidgetModel, DOMWidgetView, ISerializers
+  DOMWidgetModel, DOMWidgetView, ISerializers, put_buffers, unpack_models
 } from '@jupyter-widgets/base';
 
 import {
@@ -13,6 +13,48 @@ import _ from 'lodash';
 
 import Graph from 'graphology';
 
+import WebGLRenderer from 'sigma/renderers/webgl';
+
+import {
+  IHighlight, LevelOfDetail, ensurePositions
+} from './lod';
+
+import {
+  StyleMapper
+} from './style';
+
+import {
+  decodeBuffers, supportedCodecs
+} from './codec';
+
+import {
+  serializeSnapshot
+} from './snapshot';
+
+import {
+  IGraphPayload, TypedArray, arrayFromJSON, columnFromJSON, columnValue, deserialize_graph
+} from './serializers';
+
+import {
+  applyDiff
+} from './diff';
+
+import {
+  ChunkAssembler, IChunk, IChunkedHeader
+} from './transfer';
+
+import {
+  Recording, drawRaster, drawTraces
+} from './panel';
+
+import {
+  ILayoutProgress, LayoutSupervisor
+} from './layout';
+
+import {
+  GraphEditor
+} from './edit';
+
 export
 class NeuGraphModel extends DOMWidgetModel {
   defaults() {
@@ -23,15 +65,380 @@ class NeuGraphModel extends DOMWidgetModel {
       _view_name: NeuGraphModel.view_name,
       _view_module: NeuGraphModel.view_module,
       _view_module_version: NeuGraphModel.view_module_version,
-      value : 'Hello World'
+      graph: null,
+      height: '500px',
+      lod_edge_ratio: 2.0,
+      lod_min_edges: 20000,
+      lod_label_size: 8.0,
+      auto_layout: true,
+      layout_running: false,
+      lazy_loading: false,
+      style: {},
+      snapshot_max_bytes: 8 * 1024 * 1024,
+      loading: false,
+      load_progress: 0.0,
+      recording: {},
+      panel_window: 1.0,
+      path_query: 'off',
+      editable: false
     };
   }
 
+  initialize(attributes: any, options: any) {
+    super.initialize(attributes, options);
+    this.graph = new Graph({type: 'directed', multi: true});
+    this.layout = new LayoutSupervisor(this.graph, this.layout_progress.bind(this));
+    this.editEpoch = null;
+    this.editor = new GraphEditor(this.graph, (seq, ops) => {
+      this.send({event: 'edits', seq, epoch: this.editEpoch, ops}, {});
+    });
+    this.graph_changed();
+    this.on('change:graph', this.graph_changed, this);
+    this.on('msg:custom', this.handle_custom_message, this);
+    this.on('graph:reset graph:diff', () => { this._nodeKeys = null; });
+    this.on('graph:reset', () => {
+      this.highlight = null;
+      this.editor.reset();
+    });
+    // let the kernel compress what this browser can decode
+    this.send({event: 'codecs', codecs: supportedCodecs()}, {});
+    this.recording_changed();
+    this.on('change:recording', this.recording_changed, this);
+  }
+
+  /**
+   * Start over with empty ring buffers, filled with the kernel's history.
+   */
+  recording_changed() {
+    const config = this.get('recording');
+    this.recording = config && config.neurons ? new Recording(config) : null;
+    if (this.recording !== null && this.comm_live) {
+      this.send({event: 'request_history'}, {});
+    }
+    this.trigger('recording:samples');
+  }
+
+  /**
+   * Decode custom messages from the kernel, then apply them in order of
+   * arrival, after any pending state update.
+   */
+  handle_custom_message(content: any, buffers: (ArrayBuffer | DataView)[]) {
+    if (content.method === 'chunked' || content.method === 'chunk') {
+      this.receive_chunk(content, buffers);
+      return;
+    }
+    const received = performance.now();
+    if (content.buffer_paths) {
+      put_buffers(content, content.buffer_paths, buffers as any);
+    }
+    this.state_change = this.state_change
+      .then(() => decodeBuffers(content))
+      .then(decoded => {
+        const start = performance.now();
+        this.apply_message(decoded);
+        if (content.profile_id !== undefined) {
+          this.report_timings(content.profile_id, received, start, performance.now());
+        }
+      });
+  }
+
+  /**
+   * Report how long a message took to decode (including waiting for
+   * earlier messages, e.g. the state update a `profile` message follows),
+   * to apply, and until the next frame was drawn.
+   */
+  report_timings(id: number, received: number, decoded: number, applied: number) {
+    requestAnimationFrame(() => {
+      this.send({
+        event: 'telemetry', id,
+        decode_ms: decoded - received,
+        apply_ms: applied - decoded,
+        render_ms: performance.now() - applied,
+      }, {});
+    });
+  }
+
+  /**
+   * Reassemble a state update sent in chunks.
+   *
+   * Chunks are acknowledged as they arrive, so the kernel sends more, while
+   * the update itself is queued like any other: later messages wait until
+   * it is applied.
+   */
+  receive_chunk(content: any, buffers: (ArrayBuffer | DataView)[]) {
+    if (content.method === 'chunked') {
+      if (this._transfer !== null) {
+        // superseded by the new transfer
+        this._transfer.done(null);
+      }
+      let done: (state: any) => void;
+      const assembled = new Promise<any>(resolve => { done = resolve; });
+      this._transfer = {assembler: new ChunkAssembler(content as IChunkedHeader), done: done!};
+      this.state_change = this.state_change
+        .then(() => assembled)
+        .then(state => state === null ? null :
+          (this.constructor as any)._deserialize_state(state, this.widget_manager)
+            .then((deserialized: any) => this.set_state(deserialized)));
+    } else if (this._transfer !== null && this._transfer.assembler.transfer === content.transfer) {
+      this._transfer.assembler.add(content as IChunk, buffers);
+      this.send({event: 'chunk_ack', transfer: content.transfer, seq: content.seq}, {});
+    }
+    if (this._transfer !== null && this._transfer.assembler.complete) {
+      this._transfer.done(this._transfer.assembler.state());
+      this._transfer = null;
+    }
+  }
+
+  /**
+   * Dispatch a decoded custom message.
+   */
+  apply_message(content: any) {
+    switch (content.method) {
+      case 'diff':
+        if (content.edits !== undefined) {
+          // the kernel's version of our edits replaces the provisional one
+          this.editor.acknowledge(content.edits);
+        }
+        applyDiff(this.graph, content.ops);
+        this.editor.restore();
+        this.trigger('graph:diff', this.graph, content.ops);
+        break;
+      case 'positions':
+        this.layout.stop();
+        this.set_positions(arrayFromJSON(content.positions) as Float32Array);
+        break;
+      case 'frame':
+        this.apply_frame(content.attrs);
+        this.send({event: 'frame_ack', seq: content.seq}, {});
+        break;
+      case 'start_layout':
+        this.start_layout(content.settings, content.weight);
+        break;
+      case 'stop_layout':
+        this.stop_layout();
+        break;
+      case 'highlight':
+        this.set_highlight(arrayFromJSON(content.nodes), arrayFromJSON(content.edges));
+        break;
+      case 'samples':
+        if (this.recording !== null) {
+          if (content.reset) {
+            this.recording.clear();
+          }
+          this.recording.append(arrayFromJSON(content.t)!, arrayFromJSON(content.values)!,
+                                arrayFromJSON(content.spike_t)!, arrayFromJSON(content.spike_unit)!);
+          this.trigger('recording:samples');
+        }
+        break;
+      case 'profile':
+        // only reports timings
+        break;
+    }
+  }
+
+  /**
+   * Highlight nodes, given by store row, and edges, given by key; `null`
+   * clears the highlight.
+   */
+  set_highlight(rows: TypedArray | null, keys: TypedArray | null) {
+    this.highlight = this.key_sets(rows, keys);
+    this.trigger('graph:highlight', this.highlight);
+  }
+
+  /**
+   * Node and edge key sets of store rows and edge keys, or `null` if
+   * either is.
+   */
+  key_sets(rows: TypedArray | null, keys: TypedArray | null): IHighlight | null {
+    if (rows === null || keys === null) {
+      return null;
+    }
+    const nodeKeys = this.node_keys();
+    const nodes = new Set<string>();
+    for (let i = 0; i < rows.length; ++i) {
+      nodes.add(nodeKeys[rows[i]]);
+    }
+    const edges = new Set<string>();
+    for (let i = 0; i < keys.length; ++i) {
+      edges.add(String(keys[i]));
+    }
+    return {nodes, edges};
+  }
+
+  /**
+   * Node keys in insertion order, i.e. indexed by kernel store row.
+   * Provisionally added nodes are not in the kernel's store yet.
+   */
+  node_keys(): string[] {
+    if (this._nodeKeys === null) {
+      this._nodeKeys = this.graph.filterNodes(
+        (node: string, attrs: any) => !GraphEditor.provisional(attrs));
+    }
+    return this._nodeKeys!;
+  }
+
+  /**
+   * Apply a state frame: per attribute, either a full column in row order
+   * or values for a subset of rows. Attributes are written in place and
+   * listeners are notified once through `graph:frame`.
+   */
+  apply_frame(attrs: {[name: string]: any}) {
+    for (const name of Object.keys(attrs)) {
+      const values = columnFromJSON(attrs[name].values)!;
+      const rows = arrayFromJSON(attrs[name].rows);
+      if (rows === null) {
+        let i = 0;
+        this.graph.forEachNode((node: string, nodeAttrs: any) => {
+          if (!GraphEditor.provisional(nodeAttrs)) {
+            nodeAttrs[name] = columnValue(values, i++);
+          }
+        });
+      } else {
+        const keys = this.node_keys();
+        for (let i = 0; i < rows.length; ++i) {
+          this.graph.getNodeAttributes(keys[rows[i]])[name] = columnValue(values, i);
+        }
+      }
+    }
+    this.trigger('graph:frame', this.graph, Object.keys(attrs));
+  }
+
+  /**
+   * Run ForceAtlas2 in a Web Worker, updating positions progressively.
+   */
+  start_layout(settings: any = {}, weight: string | null = null) {
+    this.layout.start(settings, weight);
+    this.set('layout_running', true);
+    this.save_changes();
+  }
+
+  stop_layout() {
+    if (!this.layout.running) {
+      return;
+    }
+    this.layout.stop();
+    this.layout_finished(false);
+  }
+
+  protected layout_progress(progress: ILayoutProgress) {
+    this.trigger('graph:positions', this.graph);
+    if (progress.done) {
+      this.layout_finished(progress.converged);
+    }
+  }
+
+  /**
+   * Report the final positions back to the kernel's store.
+   */
+  protected layout_finished(converged: boolean) {
+    this.set('layout_running', false);
+    this.save_changes();
+    const positions = this.layout.lastPositions;
+    // positions of provisional nodes have no kernel rows
+    if (positions !== null && positions.length === 2 * this.graph.order && !this.editor.pending) {
+      this.send({event: 'layout_done', converged, shape: [this.graph.order, 2]},
+                {}, [positions.buffer]);
+    }
+  }
+
+  /**
+   * Write interleaved (x, y) positions to the nodes, in insertion order,
+   * which matches the kernel store's row order.
+   *
+   * Attributes are updated in place without emitting one graph event per
+   * node; listeners are notified once through `graph:positions`.
+   */
+  set_positions(positions: Float32Array) {
+    let i = 0;
+    this.graph.forEachNode((node: string, attrs: any) => {
+      if (!GraphEditor.provisional(attrs)) {
+        attrs.x = positions[2 * i];
+        attrs.y = positions[2 * i + 1];
+        ++i;
+      }
+    });
+    this.trigger('graph:positions', this.graph);
+  }
+
+  /**
+   * Rebuild the graphology graph from the synced columnar payload.
+   */
+  graph_changed() {
+    const payload: IGraphPayload | null = this.get('graph');
+    this.layout.stop();
+    this.graph.clear();
+    if (payload === null) {
+      return;
+    }
+    this.editEpoch = payload.epoch === undefined ? null : payload.epoch;
+    const ids = payload.nodes.id;
+    const nodeAttrs = payload.nodes.attrs;
+    const nodeNames = Object.keys(nodeAttrs);
+    for (let i = 0; i < ids.length; ++i) {
+      const attrs: {[name: string]: any} = {};
+      for (const name of nodeNames) {
+        attrs[name] = columnValue(nodeAttrs[name], i);
+      }
+      this.graph.addNode(ids[i], attrs);
+    }
+    const {id, source, target} = payload.edges;
+    const edgeAttrs = payload.edges.attrs;
+    const edgeNames = Object.keys(edgeAttrs);
+    for (let i = 0; i < source.length; ++i) {
+      const attrs: {[name: string]: any} = {};
+      for (const name of edgeNames) {
+        attrs[name] = columnValue(edgeAttrs[name], i);
+      }
+      this.graph.addEdgeWithKey(String(id[i]), ids[source[i]], ids[target[i]], attrs);
+    }
+    // class-specific attributes only exist on their class's rows
+    for (const cls of Object.keys(payload.nodes.tables)) {
+      const table = payload.nodes.tables[cls];
+      for (const name of Object.keys(table.attrs)) {
+        for (let i = 0; i < table.rows.length; ++i) {
+          this.graph.getNodeAttributes(ids[table.rows[i]])[name] = columnValue(table.attrs[name], i);
+        }
+      }
+    }
+    for (const cls of Object.keys(payload.edges.tables)) {
+      const table = payload.edges.tables[cls];
+      for (const name of Object.keys(table.attrs)) {
+        for (let i = 0; i < table.rows.length; ++i) {
+          this.graph.getEdgeAttributes(String(id[table.rows[i]]))[name] = columnValue(table.attrs[name], i);
+        }
+      }
+    }
+    this.trigger('graph:reset', this.graph);
+    if (payload.snapshot && payload.snapshot.partial && this.comm_live) {
+      // a saved snapshot was cut to the size cap; the kernel has the rest
+      this.send({event: 'request_graph'}, {});
+    }
+    const positioned = 'x' in nodeAttrs && 'y' in nodeAttrs;
+    if (this.get('auto_layout') && !positioned && this.graph.order > 0) {
+      this.start_layout();
+    }
+  }
+
   static serializers: ISerializers = {
       ...DOMWidgetModel.serializers,
-      // Add any extra serializers here
+      graph: {
+        deserialize: (value: any) => decodeBuffers(value).then(deserialize_graph),
+        // only used to save widget state: store what is displayed, compactly
+        serialize: (value: any, model: NeuGraphModel) => serializeSnapshot(
+          model.graph, model.get('style'), model.get('snapshot_max_bytes')),
+      },
     }
 
+  graph: Graph;
+  layout: LayoutSupervisor;
+  editor: GraphEditor;
+  // of the kernel's graph, null for a saved snapshot
+  editEpoch: number | null;
+  private _nodeKeys: string[] | null = null;
+  recording: Recording | null = null;
+  highlight: IHighlight | null = null;
+  private _transfer: {assembler: ChunkAssembler, done: (state: any) => void} | null = null;
+
   static model_name = 'NeuGraphModel';
   static model_module = MODULE_NAME;
   static model_module_version = MODULE_VERSION;
@@ -43,12 +450,471 @@ class NeuGraphModel extends DOMWidgetModel {
 
 export
 class NeuGraphView extends DOMWidgetView {
+  /**
+   * The model holding the graph: this view's own model here, the shared
+   * widget's for a NeuGraphPaneView.
+   */
+  source_model(): NeuGraphModel {
+    return this.model as NeuGraphModel;
+  }
+
+  render() {
+    const source = this.source = this.source_model();
+    this.el.classList.add('neugraph-widget');
+    // focusable, for the editing keys
+    this.el.tabIndex = 0;
+    this.el.addEventListener('keydown', this.key_pressed.bind(this));
+    this.height_changed();
+    this.listenTo(this.model, 'change:height', this.height_changed);
+    this.listenTo(source, 'change:lod_edge_ratio change:lod_min_edges change:lod_label_size',
+                  this.create_renderer);
+    this.listenTo(source, 'graph:reset graph:diff', this.graph_changed);
+    this.listenTo(source, 'graph:positions', this.positions_changed);
+    this.listenTo(source, 'graph:frame', this.frame_changed);
+    this.listenTo(source, 'graph:highlight', this.highlight_changed);
+    this.listenTo(source, 'change:style', this.style_changed);
+    this.report_viewport = _.debounce(this.report_viewport.bind(this), 150);
+    this.listenTo(source, 'change:lazy_loading', this.report_viewport);
+    this.listenTo(source, 'change:loading change:load_progress', this.loading_changed);
+    this.loading_changed();
+    this.listenTo(source, 'recording:samples change:panel_window', this.draw_panel);
+    this.draw_panel();
+    // sigma needs the container to have a size, so wait until attached
+    this.displayed.then(() => this.create_renderer());
+  }
+
+  height_changed() {
+    this.el.style.height = this.model.get('height');
+    if (this.renderer) {
+      this.renderer.resize();
+      this.renderer.refresh();
+    }
+  }
+
+  create_renderer() {
+    const model = this.source;
+    this.destroy_renderer();
+    ensurePositions(model.graph);
+    this.style = new StyleMapper(model.graph);
+    this.style.setSpec(model.get('style'));
+    this.lod = new LevelOfDetail(model.graph, {
+      edgeRatio: model.get('lod_edge_ratio'),
+      minEdges: model.get('lod_min_edges'),
+      labelSize: model.get('lod_label_size'),
+    }, this.style);
+    this.lod.highlight = model.highlight;
+    this.lod.filter = this.filter;
+    this.lod.selected = this.selected;
+    this.large = model.graph.size >= model.get('lod_min_edges');
+    this.renderer = new WebGLRenderer(model.graph, this.el, this.lod.settings());
+    const camera = this.renderer.getCamera();
+    this.lod.update(camera.getState().ratio);
+    camera.on('updated', (state: any) => {
+      if (this.lod!.update(state.ratio)) {
+        this.renderer.refresh();
+      }
+      this.report_viewport();
+    });
+    this.report_viewport();
+    // collapsed groups (see NeuGraphWidget.collapse) expand on click
+    this.renderer.on('clickNode', (event: any) => {
+      const level = model.graph.getNodeAttribute(event.node, 'level');
+      if (model.get('editable')) {
+        this.select(event.node);
+      } else if (typeof level === 'number' && level >= 0) {
+        model.send({event: 'expand', node: event.node}, {});
+      } else if (model.get('path_query') !== 'off') {
+        // the kernel highlights the paths between two picked nodes
+        model.send({event: 'pick', node: event.node}, {});
+      }
+    });
+    this.renderer.on('clickStage', () => this.select(null));
+    this.renderer.on('downNode', (event: any) => {
+      if (model.get('editable')) {
+        this.dragged = event.node;
+        camera.disable();
+      }
+    });
+    const captor = this.renderer.getMouseCaptor();
+    captor.on('mousemove', (event: any) => {
+      this.pointer = {x: event.x, y: event.y};
+      if (this.dragged !== null) {
+        const {x, y} = this.renderer.viewportToGraph(this.pointer);
+        model.editor.move(this.dragged, x, y);
+      }
+    });
+    captor.on('mouseup', () => {
+      if (this.dragged !== null) {
+        this.dragged = null;
+        camera.enable();
+        model.editor.flush();
+      }
+    });
+  }
+
+  /**
+   * Toggle a node in the selection edited by the keyboard, or clear the
+   * selection for `null`.
+   */
+  select(node: string | null) {
+    if (node === null) {
+      this.selected.clear();
+    } else if (!this.selected.delete(node)) {
+      this.selected.add(node);
+    }
+    if (this.renderer) {
+      this.renderer.refresh();
+    }
+  }
+
+  /**
+   * Editing keys, while the graph is editable: `n` adds a node at the
+   * pointer, `e` connects the first selected node to the others, Delete
+   * removes the selected nodes, or with Shift only the edges between them.
+   */
+  key_pressed(event: KeyboardEvent) {
+    const model = this.source;
+    if (!model.get('editable') || !this.renderer) {
+      return;
+    }
+    const editor = model.editor;
+    // in selection order
+    const selected = Array.from(this.selected).filter(node => model.graph.hasNode(node));
+    switch (event.key) {
+      case 'n': {
+        const {x, y} = this.renderer.viewportToGraph(this.pointer);
+        this.select(editor.addNode(x, y));
+        break;
+      }
+      case 'e':
+        for (const target of selected.slice(1)) {
+          editor.addEdge(selected[0], target);
+        }
+        break;
+      case 'Delete':
+      case 'Backspace':
+        if (event.shiftKey) {
+          for (const source of selected) {
+            for (const target of selected) {
+              model.graph.forEachOutEdge(source, target, (edge: string) => editor.dropEdge(edge));
+            }
+          }
+        } else {
+          for (const node of selected) {
+            editor.dropNode(node);
+          }
+          this.select(null);
+        }
+        break;
+      case 'Escape':
+        this.select(null);
+        break;
+      default:
+        return;
+    }
+    event.preventDefault();
+    event.stopPropagation();
+  }
+
+  highlight_changed() {
+    if (this.renderer) {
+      this.lod!.highlight = this.source.highlight;
+      this.renderer.refresh();
+    }
+  }
+
+  destroy_renderer() {
+    if (this.renderer) {
+      this.renderer.kill();
+      this.renderer = null;
+    }
+  }
+
+  /**
+   * Place new nodes and re-evaluate whether the graph is large enough for
+   * level-of-detail culling. sigma itself listens to the graph's events.
+   */
+  graph_changed() {
+    if (!this.renderer) {
+      return;
+    }
+    const model = this.source;
+    ensurePositions(model.graph);
+    const large = model.graph.size >= model.get('lod_min_edges');
+    if (large !== this.large) {
+      this.create_renderer();
+      return;
+    }
+    this.lod!.highlight = model.highlight;
+    this.style!.invalidate();
+    const restyled = this.style!.update();
+    if (this.lod!.update(this.renderer.getCamera().getState().ratio) || restyled) {
+      this.renderer.refresh();
+    }
+  }
+
+  /**
+   * Re-evaluate every style channel for a new spec.
+   */
+  style_changed() {
+    if (this.renderer) {
+      this.style!.setSpec(this.source.get('style'));
+      this.renderer.refresh();
+    }
+  }
+
+  /**
+   * Re-evaluate only the style channels reading the attributes of a state
+   * frame before redrawing.
+   */
+  frame_changed(graph: any, names: string[]) {
+    if (this.renderer) {
+      this.style!.update(names);
+      this.renderer.refresh();
+    }
+  }
+
+  /**
+   * Send the visible rectangle, in graph coordinates, to the kernel when
+   * it serves the graph lazily (see NeuGraphWidget.lazy_load).
+   */
+  report_viewport() {
+    if (!this.renderer || !this.source.get('lazy_loading')) {
+      return;
+    }
+    const {width, height} = this.renderer.getDimensions();
+    const a = this.renderer.viewportToGraph({x: 0, y: 0});
+    const b = this.renderer.viewportToGraph({x: width, y: height});
+    this.source.send({
+      event: 'viewport',
+      x0: Math.min(a.x, b.x), y0: Math.min(a.y, b.y),
+      x1: Math.max(a.x, b.x), y1: Math.max(a.y, b.y),
+    }, {});
+  }
+
+  /**
+   * Show a progress bar with a cancel button while load_async runs.
+   */
+  loading_changed() {
+    if (!this.source.get('loading')) {
+      if (this.progress) {
+        this.el.removeChild(this.progress);
+        this.progress = null;
+      }
+      return;
+    }
+    if (!this.progress) {
+      this.progress = document.createElement('div');
+      this.progress.className = 'neugraph-progress';
+      this.progress.style.cssText =
+        'position:absolute;top:8px;left:8px;right:8px;z-index:1;display:flex;align-items:center';
+      const bar = document.createElement('progress');
+      bar.max = 1;
+      bar.style.flex = '1';
+      const cancel = document.createElement('button');
+      cancel.textContent = 'Cancel';
+      cancel.onclick = () => this.source.send({event: 'cancel_load'}, {});
+      this.progress.appendChild(bar);
+      this.progress.appendChild(cancel);
+      this.el.style.position = 'relative';
+      this.el.appendChild(this.progress);
+    }
+    (this.progress.firstChild as HTMLProgressElement).value = this.source.get('load_progress');
+  }
+
+  positions_changed() {
+    if (this.renderer) {
+      this.renderer.refresh();
+    }
+  }
+
+  processPhosphorMessage(msg: any) {
+    super.processPhosphorMessage(msg);
+    if ((msg.type === 'resize' || msg.type === 'after-show') && this.renderer) {
+      this.renderer.resize();
+      this.renderer.refresh();
+    }
+  }
+
+  /**
+   * Draw the spike raster and traces, at most once per animation frame,
+   * in a panel on the right shown while recording.
+   */
+  draw_panel() {
+    const recording = this.source.recording;
+    if (recording === null) {
+      if (this.panel) {
+        this.el.removeChild(this.panel);
+        this.panel = null;
+      }
+      return;
+    }
+    if (!this.panel) {
+      this.panel = document.createElement('div');
+      this.panel.className = 'neugraph-panel';
+      this.panel.style.cssText =
+        'position:absolute;top:0;right:0;bottom:0;width:35%;z-index:1;' +
+        'display:flex;flex-direction:column;background:rgba(255,255,255,0.9);' +
+        'border-left:1px solid #ddd';
+      for (let i = 0; i < 2; ++i) {
+        const canvas = document.createElement('canvas');
+        canvas.style.cssText = 'flex:1;width:100%;min-height:0';
+        this.panel.appendChild(canvas);
+      }
+      this.el.style.position = 'relative';
+      this.el.appendChild(this.panel);
+    }
+    if (this.panelFrame !== null) {
+      return;
+    }
+    this.panelFrame = requestAnimationFrame(() => {
+      this.panelFrame = null;
+      const current = this.source.recording;
+      if (current === null || !this.panel) {
+        return;
+      }
+      const window = this.source.get('panel_window');
+      const t1 = current.latest();
+      const [raster, traces] = Array.prototype.slice.call(this.panel.childNodes);
+      drawRaster(raster, current, t1, window);
+      drawTraces(traces, current, t1, window);
+    });
+  }
+
+  remove() {
+    if (this.panelFrame !== null) {
+      cancelAnimationFrame(this.panelFrame);
+    }
+    this.destroy_renderer();
+    return super.remove();
+  }
+
+  source: NeuGraphModel;
+  /**
+   * Nodes and edges shown by this view, or all if null.
+   */
+  filter: IHighlight | null = null;
+  renderer: any = null;
+  selected = new Set<string>();
+  dragged: string | null = null;
+  pointer = {x: 0, y: 0};
+  lod: LevelOfDetail | null = null;
+  style: StyleMapper | null = null;
+  progress: HTMLDivElement | null = null;
+  panel: HTMLDivElement | null = null;
+  panelFrame: number | null = null;
+  large = false;
+}
+
+
+/**
+ * Another view of a NeuGraphWidget's graph (see NeuGraphPane). The graph
+ * stays on the shared model; a pane only holds its camera and the subset
+ * of nodes and edges it shows.
+ */
+export
+class NeuGraphPaneModel extends DOMWidgetModel {
+  defaults() {
+    return {...super.defaults(),
+      _model_name: NeuGraphPaneModel.model_name,
+      _model_module: NeuGraphPaneModel.model_module,
+      _model_module_version: NeuGraphPaneModel.model_module_version,
+      _view_name: NeuGraphPaneModel.view_name,
+      _view_module: NeuGraphPaneModel.view_module,
+      _view_module_version: NeuGraphPaneModel.view_module_version,
+      source: null,
+      height: '400px',
+      camera: {},
+    };
+  }
+
+  initialize(attributes: any, options: any) {
+    super.initialize(attributes, options);
+    this.on('msg:custom', this.handle_custom_message, this);
+    if (this.comm_live) {
+      // the filter is not part of the state, e.g. after a page reload
+      this.send({event: 'request_filter'}, {});
+    }
+  }
+
+  handle_custom_message(content: any, buffers: DataView[]) {
+    if (content.method !== 'filter') {
+      return;
+    }
+    put_buffers(content, content.buffer_paths || [], buffers);
+    const source = this.get('source') as NeuGraphModel;
+    // rows index the source's graph once its pending updates are applied
+    source.state_change = source.state_change.then(() => {
+      this.filter = source.key_sets(arrayFromJSON(content.nodes), arrayFromJSON(content.edges));
+      this.trigger('pane:filter', this.filter);
+    });
+  }
+
+  filter: IHighlight | null = null;
+
+  static serializers: ISerializers = {
+      ...DOMWidgetModel.serializers,
+      source: {deserialize: unpack_models},
+    };
+
+  static model_name = 'NeuGraphPaneModel';
+  static model_module = MODULE_NAME;
+  static model_module_version = MODULE_VERSION;
+  static view_name = 'NeuGraphPaneView';
+  static view_module = MODULE_NAME;
+  static view_module_version = MODULE_VERSION;
+}
+
+
+export
+class NeuGraphPaneView extends NeuGraphView {
+  source_model(): NeuGraphModel {
+    return this.model.get('source');
+  }
+
   render() {
-    this.value_changed();
-    this.model.on('change:value', this.value_changed, this);
+    this.filter = (this.model as NeuGraphPaneModel).filter;
+    this.save_camera = _.debounce(this.save_camera.bind(this), 150);
+    this.listenTo(this.model, 'pane:filter', this.filter_changed);
+    this.listenTo(this.model, 'change:camera', this.camera_changed);
+    super.render();
   }
 
-  value_changed() {
-    this.el.textContent = this.model.get('value');
+  create_renderer() {
+    super.create_renderer();
+    this.camera_changed();
+    this.renderer.getCamera().on('updated', this.save_camera);
+  }
+
+  filter_changed() {
+    this.filter = (this.model as NeuGraphPaneModel).filter;
+    if (this.renderer) {
+      this.lod!.filter = this.filter;
+      this.renderer.refresh();
+    }
+  }
+
+  /**
+   * Move the camera to the synced state, e.g. as set from the kernel or
+   * by another display of this pane.
+   */
+  camera_changed() {
+    const state = this.model.get('camera');
+    if (this.renderer && state && typeof state.ratio === 'number') {
+      this.renderer.getCamera().setState(state);
+    }
+  }
+
+  save_camera() {
+    if (!this.renderer) {
+      return;
+    }
+    const {x, y, ratio, angle} = this.renderer.getCamera().getState();
+    const state = {x, y, ratio, angle};
+    if (_.isEqual(state, this.model.get('camera'))) {
+      return;
+    }
+    this.model.set('camera', state);
+    this.touch();
   }
 }
@@ -0,0 +1,206 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Spike raster and trace panel (see ipyneugraph/recorder.py).
+ *
+ * The kernel sends only the samples and spikes recorded since its previous
+ * message. They are appended to ring buffers of the same capacity as the
+ * kernel's, and the panel draws the latest time window from them on two
+ * canvases, at most once per animation frame.
+ */
+
+import {
+  TypedArray
+} from './serializers';
+
+export
+interface IRecordingConfig {
+  neurons: string[];
+  capacity: number;
+  spike_capacity: number;
+  label: string;
+}
+
+/**
+ * The latest `capacity` rows of `width` values appended to a stream.
+ */
+export
+class Ring {
+  constructor(capacity: number, width: number = 1, ctor: any = Float64Array) {
+    this.capacity = capacity;
+    this.width = width;
+    this.data = new ctor(capacity * width);
+  }
+
+  get length(): number {
+    return Math.min(this.count, this.capacity);
+  }
+
+  /**
+   * Offset in `data` of the `i`-th oldest row kept.
+   */
+  offset(i: number): number {
+    return ((this.count - this.length + i) % this.capacity) * this.width;
+  }
+
+  push(rows: TypedArray) {
+    const n = rows.length / this.width;
+    const skip = Math.max(0, n - this.capacity);
+    for (let r = skip; r < n; ++r) {
+      const at = ((this.count + r) % this.capacity) * this.width;
+      this.data.set(rows.subarray(r * this.width, (r + 1) * this.width), at);
+    }
+    this.count += n;
+  }
+
+  clear() {
+    this.count = 0;
+  }
+
+  capacity: number;
+  width: number;
+  data: any;
+  count = 0;
+}
+
+/**
+ * Frontend copy of a Recorder's ring buffers.
+ */
+export
+class Recording {
+  constructor(config: IRecordingConfig) {
+    this.config = config;
+    const n = config.neurons.length;
+    this.times = new Ring(config.capacity);
+    this.values = new Ring(config.capacity, n, Float32Array);
+    this.spikeTimes = new Ring(config.spike_capacity);
+    this.spikeUnits = new Ring(config.spike_capacity, 1, Uint32Array);
+  }
+
+  append(t: TypedArray, values: TypedArray, spikeTimes: TypedArray, spikeUnits: TypedArray) {
+    this.times.push(t);
+    this.values.push(values);
+    this.spikeTimes.push(spikeTimes);
+    this.spikeUnits.push(spikeUnits);
+  }
+
+  clear() {
+    for (const ring of [this.times, this.values, this.spikeTimes, this.spikeUnits]) {
+      ring.clear();
+    }
+  }
+
+  /**
+   * Time of the latest sample or spike.
+   */
+  latest(): number {
+    let t = -Infinity;
+    if (this.times.length > 0) {
+      t = this.times.data[this.times.offset(this.times.length - 1)];
+    }
+    if (this.spikeTimes.length > 0) {
+      t = Math.max(t, this.spikeTimes.data[this.spikeTimes.offset(this.spikeTimes.length - 1)]);
+    }
+    return t;
+  }
+
+  config: IRecordingConfig;
+  times: Ring;
+  values: Ring;
+  spikeTimes: Ring;
+  spikeUnits: Ring;
+}
+
+const TRACE_COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+                      '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf'];
+
+function resize(canvas: HTMLCanvasElement): CanvasRenderingContext2D {
+  const ratio = window.devicePixelRatio || 1;
+  const width = Math.round(canvas.clientWidth * ratio);
+  const height = Math.round(canvas.clientHeight * ratio);
+  if (canvas.width !== width || canvas.height !== height) {
+    canvas.width = width;
+    canvas.height = height;
+  }
+  const ctx = canvas.getContext('2d')!;
+  ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+  ctx.clearRect(0, 0, canvas.clientWidth, canvas.clientHeight);
+  return ctx;
+}
+
+/**
+ * Draw the spikes in `[t1 - window, t1]`, one row per neuron.
+ */
+export
+function drawRaster(canvas: HTMLCanvasElement, recording: Recording, t1: number, window: number) {
+  const ctx = resize(canvas);
+  const width = canvas.clientWidth;
+  const height = canvas.clientHeight;
+  const rows = Math.max(recording.config.neurons.length, 1);
+  const rowHeight = height / rows;
+  const t0 = t1 - window;
+  const times = recording.spikeTimes;
+  const units = recording.spikeUnits;
+  ctx.fillStyle = '#000000';
+  // newest first, stopping at the window's start
+  for (let i = times.length - 1; i >= 0; --i) {
+    const t = times.data[times.offset(i)];
+    if (t < t0) {
+      break;
+    }
+    const x = (t - t0) / window * width;
+    ctx.fillRect(x, units.data[units.offset(i)] * rowHeight, 1, Math.max(rowHeight - 1, 1));
+  }
+}
+
+/**
+ * Draw the traced values in `[t1 - window, t1]`, one line per neuron, on a
+ * shared axis fitted to the values shown.
+ */
+export
+function drawTraces(canvas: HTMLCanvasElement, recording: Recording, t1: number, window: number) {
+  const ctx = resize(canvas);
+  const width = canvas.clientWidth;
+  const height = canvas.clientHeight;
+  const t0 = t1 - window;
+  const times = recording.times;
+  const values = recording.values;
+  const n = values.width;
+  let first = times.length;
+  while (first > 0 && times.data[times.offset(first - 1)] >= t0) {
+    --first;
+  }
+  let lo = Infinity;
+  let hi = -Infinity;
+  for (let i = first; i < times.length; ++i) {
+    const at = values.offset(i);
+    for (let k = 0; k < n; ++k) {
+      const v = values.data[at + k];
+      if (v < lo) { lo = v; }
+      if (v > hi) { hi = v; }
+    }
+  }
+  if (!(hi >= lo)) {
+    return;
+  }
+  const span = hi - lo || 1;
+  ctx.lineWidth = 1;
+  for (let k = 0; k < n; ++k) {
+    ctx.strokeStyle = TRACE_COLORS[k % TRACE_COLORS.length];
+    ctx.beginPath();
+    for (let i = first; i < times.length; ++i) {
+      const x = (times.data[times.offset(i)] - t0) / window * width;
+      const y = height - (values.data[values.offset(i) + k] - lo) / span * (height - 2) - 1;
+      if (i === first) {
+        ctx.moveTo(x, y);
+      } else {
+        ctx.lineTo(x, y);
+      }
+    }
+    ctx.stroke();
+  }
+  ctx.fillStyle = '#555555';
+  ctx.font = '10px sans-serif';
+  ctx.fillText(`${recording.config.label}: ${lo.toPrecision(3)} to ${hi.toPrecision(3)}`, 4, 12);
+}
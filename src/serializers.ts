@@ -0,0 +1,191 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Deserializers for the binary graph payloads produced by
+ * `ipyneugraph/serializers.py`.
+ */
+
+export
+type TypedArray = Int8Array | Uint8Array | Int16Array | Uint16Array |
+  Int32Array | Uint32Array | Float32Array | Float64Array;
+
+/**
+ * A column as it arrives over the comm: the buffer has already been put
+ * back into the state by the widget manager.
+ */
+export
+interface IColumnJSON {
+  dtype: string;
+  shape: number[];
+  buffer: DataView;
+  categories?: string[];
+}
+
+/**
+ * A deserialized column: a typed array view on the received buffer, an
+ * array of strings, or integer codes together with their categories.
+ */
+export
+type Column = TypedArray | string[];
+
+export
+interface ICategorical {
+  codes: TypedArray;
+  categories: string[];
+}
+
+export
+interface IGraphPayload {
+  nodes: {
+    id: string[];
+    attrs: {[name: string]: Column | ICategorical};
+    tables: {[cls: string]: IAttributeTable};
+  };
+  edges: {
+    id: Uint32Array;
+    source: Uint32Array;
+    target: Uint32Array;
+    attrs: {[name: string]: Column | ICategorical};
+    tables: {[cls: string]: IAttributeTable};
+  };
+  /**
+   * Set when the payload is a snapshot saved with the notebook rather
+   * than the kernel's graph (see snapshot.ts).
+   */
+  snapshot?: {partial: boolean, n_nodes: number, n_edges: number};
+  /**
+   * The kernel's edit epoch, sent back with edits (see edit.ts).
+   */
+  epoch?: number;
+}
+
+/**
+ * Class-specific attributes of a subset of the rows.
+ */
+export
+interface IAttributeTable {
+  rows: Uint32Array;
+  attrs: {[name: string]: Column | ICategorical};
+}
+
+const ARRAY_TYPES: {[dtype: string]: any} = {
+  bool: Uint8Array,
+  int8: Int8Array,
+  uint8: Uint8Array,
+  int16: Int16Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array,
+};
+
+export
+const STRING_SEPARATOR = '\0';
+
+/**
+ * View the buffer of a serialized array as a TypedArray, without copying
+ * when the buffer is suitably aligned.
+ */
+export
+function arrayFromJSON(value: IColumnJSON | null): TypedArray | null {
+  if (value === null || value === undefined) {
+    return null;
+  }
+  const ctor = ARRAY_TYPES[value.dtype];
+  if (ctor === undefined) {
+    throw new Error(`Unsupported dtype: ${value.dtype}`);
+  }
+  const view = value.buffer;
+  const length = view.byteLength / ctor.BYTES_PER_ELEMENT;
+  if (view.byteOffset % ctor.BYTES_PER_ELEMENT === 0) {
+    return new ctor(view.buffer, view.byteOffset, length);
+  }
+  // Unaligned: copy into a fresh buffer
+  const copy = view.buffer.slice(view.byteOffset, view.byteOffset + view.byteLength);
+  return new ctor(copy);
+}
+
+export
+function stringsFromJSON(value: IColumnJSON): string[] {
+  if (value.shape[0] === 0) {
+    return [];
+  }
+  const view = value.buffer;
+  const bytes = new Uint8Array(view.buffer, view.byteOffset, view.byteLength);
+  return new TextDecoder('utf-8').decode(bytes).split(STRING_SEPARATOR);
+}
+
+export
+function columnFromJSON(value: IColumnJSON | null): Column | ICategorical | null {
+  if (value === null || value === undefined) {
+    return null;
+  }
+  if (value.dtype === 'str') {
+    return stringsFromJSON(value);
+  }
+  const array = arrayFromJSON(value)!;
+  if (value.categories !== undefined) {
+    return {codes: array, categories: value.categories};
+  }
+  return array;
+}
+
+export
+function isCategorical(column: any): column is ICategorical {
+  return column !== null && column.codes !== undefined && column.categories !== undefined;
+}
+
+/**
+ * Read element `i` of a column, resolving categorical codes to strings.
+ */
+export
+function columnValue(column: Column | ICategorical, i: number): any {
+  if (isCategorical(column)) {
+    return column.categories[column.codes[i]];
+  }
+  return column[i];
+}
+
+function columnsFromJSON(columns: {[name: string]: IColumnJSON} | undefined) {
+  const result: {[name: string]: Column | ICategorical} = {};
+  for (const name of Object.keys(columns || {})) {
+    result[name] = columnFromJSON(columns![name])!;
+  }
+  return result;
+}
+
+function tablesFromJSON(tables: {[cls: string]: any} | undefined) {
+  const result: {[cls: string]: IAttributeTable} = {};
+  for (const cls of Object.keys(tables || {})) {
+    result[cls] = {
+      rows: arrayFromJSON(tables![cls].rows) as Uint32Array,
+      attrs: columnsFromJSON(tables![cls].attrs),
+    };
+  }
+  return result;
+}
+
+export
+function deserialize_graph(value: any): IGraphPayload | null {
+  if (value === null || value === undefined) {
+    return null;
+  }
+  return {
+    nodes: {
+      id: stringsFromJSON(value.nodes.id),
+      attrs: columnsFromJSON(value.nodes.attrs),
+      tables: tablesFromJSON(value.nodes.tables),
+    },
+    edges: {
+      id: arrayFromJSON(value.edges.id) as Uint32Array,
+      source: arrayFromJSON(value.edges.source) as Uint32Array,
+      target: arrayFromJSON(value.edges.target) as Uint32Array,
+      attrs: columnsFromJSON(value.edges.attrs),
+      tables: tablesFromJSON(value.edges.tables),
+    },
+    snapshot: value.snapshot,
+    epoch: value.epoch,
+  };
+}
@@ -0,0 +1,196 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Snapshots of the rendered graph for saved widget state.
+ *
+ * When a notebook saves its widget state, the `graph` attribute is
+ * serialized from the graph currently displayed, i.e. the visible subgraph
+ * after aggregation and lazy loading, with only the attributes needed to
+ * draw it: positions, size, color, labels and the attributes the style
+ * reads. The snapshot uses the columnar layout of the kernel's payload
+ * (see serializers.ts), so reopening the notebook renders it through the
+ * same deserializer, without a kernel.
+ *
+ * Snapshots larger than the size cap keep only the highest-degree nodes
+ * and are marked partial; the full graph is then fetched from the kernel
+ * when one is connected.
+ */
+
+import Graph from 'graphology';
+
+import {
+  IStyleSpec
+} from './style';
+
+/**
+ * Node and edge attributes always kept in snapshots, if present.
+ */
+export
+const SNAPSHOT_NODE_ATTRS = ['x', 'y', 'size', 'color', 'label', 'level', 'count'];
+
+export
+const SNAPSHOT_EDGE_ATTRS = ['size', 'color', 'count'];
+
+export
+interface ISnapshotInfo {
+  partial: boolean;
+  n_nodes: number;
+  n_edges: number;
+}
+
+function asView(array: ArrayBufferView): DataView {
+  return new DataView(array.buffer, array.byteOffset, array.byteLength);
+}
+
+function numericJSON(values: Float32Array): any {
+  return {dtype: 'float32', shape: [values.length], buffer: asView(values)};
+}
+
+function stringsJSON(values: string[]): any {
+  const bytes = new TextEncoder().encode(values.join('\0'));
+  return {dtype: 'str', shape: [values.length], buffer: asView(bytes)};
+}
+
+function categoricalJSON(values: string[]): any {
+  const codes = new Map<string, number>();
+  const categories: string[] = [];
+  for (const v of values) {
+    if (!codes.has(v)) {
+      codes.set(v, categories.length);
+      categories.push(v);
+    }
+  }
+  if (categories.length > 65535 || categories.length > values.length / 2) {
+    return stringsJSON(values);
+  }
+  const ctor = categories.length <= 255 ? Uint8Array : Uint16Array;
+  const array = new ctor(values.length);
+  for (let i = 0; i < values.length; ++i) {
+    array[i] = codes.get(values[i])!;
+  }
+  return {
+    dtype: categories.length <= 255 ? 'uint8' : 'uint16',
+    shape: [values.length],
+    buffer: asView(array),
+    categories,
+  };
+}
+
+/**
+ * Encode one attribute: float32 when every present value is a number,
+ * strings (as categoricals when repeated) otherwise.
+ */
+function columnJSON(values: any[]): any | null {
+  let present = false;
+  let numeric = true;
+  for (const v of values) {
+    if (v !== undefined && v !== null) {
+      present = true;
+      numeric = numeric && typeof v === 'number';
+    }
+  }
+  if (!present) {
+    return null;
+  }
+  if (numeric) {
+    return numericJSON(Float32Array.from(values, v => typeof v === 'number' ? v : NaN));
+  }
+  return categoricalJSON(values.map(v => v === undefined || v === null ? '' : String(v)));
+}
+
+function columnsJSON(records: any[], names: string[]) {
+  const result: {[name: string]: any} = {};
+  for (const name of names) {
+    const column = columnJSON(records.map(r => r[name]));
+    if (column !== null) {
+      result[name] = column;
+    }
+  }
+  return result;
+}
+
+function byteLength(value: any): number {
+  if (value === null || typeof value !== 'object') {
+    return 0;
+  }
+  if (value instanceof DataView) {
+    return value.byteLength;
+  }
+  return Object.keys(value).reduce((total, key) => total + byteLength(value[key]), 0);
+}
+
+function encode(graph: Graph, nodes: string[], nodeNames: string[], edgeNames: string[],
+                info: ISnapshotInfo): any {
+  const rows = new Map<string, number>();
+  nodes.forEach((node, i) => { rows.set(node, i); });
+  const keys: number[] = [];
+  const source: number[] = [];
+  const target: number[] = [];
+  const edgeRecords: any[] = [];
+  graph.forEachEdge((edge: string, attrs: any, u: string, v: string) => {
+    // kernel edges have numeric keys; others, e.g. edits not yet confirmed
+    // by the kernel, are left out rather than given keys that may clash
+    if (rows.has(u) && rows.has(v) && /^\d+$/.test(edge)) {
+      keys.push(parseInt(edge, 10));
+      source.push(rows.get(u)!);
+      target.push(rows.get(v)!);
+      edgeRecords.push(attrs);
+    }
+  });
+  const uint32 = (values: number[]) => {
+    const array = Uint32Array.from(values);
+    return {dtype: 'uint32', shape: [array.length], buffer: asView(array)};
+  };
+  return {
+    nodes: {
+      id: stringsJSON(nodes),
+      attrs: columnsJSON(nodes.map(n => graph.getNodeAttributes(n)), nodeNames),
+      tables: {},
+    },
+    edges: {
+      id: uint32(keys),
+      source: uint32(source),
+      target: uint32(target),
+      attrs: columnsJSON(edgeRecords, edgeNames),
+      tables: {},
+    },
+    snapshot: info,
+  };
+}
+
+/**
+ * Serialize the displayed graph within `maxBytes` of binary buffers.
+ */
+export
+function serializeSnapshot(graph: Graph, style: IStyleSpec, maxBytes: number): any {
+  const nodeNames = SNAPSHOT_NODE_ATTRS.slice();
+  const edgeNames = SNAPSHOT_EDGE_ATTRS.slice();
+  for (const channel of Object.keys(style || {})) {
+    const names = channel.startsWith('node') ? nodeNames : edgeNames;
+    const attr = (style as any)[channel].attr;
+    if (names.indexOf(attr) < 0) {
+      names.push(attr);
+    }
+  }
+  const info = {partial: false, n_nodes: graph.order, n_edges: graph.size};
+  let nodes = graph.nodes();
+  let value = encode(graph, nodes, nodeNames, edgeNames, info);
+  let size = byteLength(value);
+  if (size <= maxBytes) {
+    return value;
+  }
+  // keep the hubs, which carry the overall shape of the graph, in their
+  // original order
+  const all = nodes;
+  const ranked = all.slice().sort((a, b) => graph.degree(b) - graph.degree(a));
+  info.partial = true;
+  while (size > maxBytes && nodes.length > 0) {
+    const keep = Math.floor(nodes.length * Math.min(0.9, 0.9 * maxBytes / size));
+    const kept = new Set(ranked.slice(0, keep));
+    nodes = all.filter(node => kept.has(node));
+    value = encode(graph, nodes, nodeNames, edgeNames, info);
+    size = byteLength(value);
+  }
+  return value;
+}
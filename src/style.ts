@@ -0,0 +1,265 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Attribute-driven styling (see ipyneugraph/style.py for the spec).
+ *
+ * Channels are evaluated in bulk: one pass over an attribute fills a typed
+ * array of sizes or of palette indices, in node (or edge) insertion order.
+ * sigma's reducers then only look values up. Colors are quantized to a
+ * fixed palette of 256 strings, so sigma's color parser hits its cache
+ * instead of parsing a new string per node per frame.
+ */
+
+import Graph from 'graphology';
+
+export
+interface IChannelSpec {
+  attr: string;
+  scale: 'linear' | 'log' | 'sqrt';
+  domain?: [number, number] | null;
+  colormap?: string[];
+  range?: [number, number];
+}
+
+export
+interface IStyleSpec {
+  node_color?: IChannelSpec;
+  node_size?: IChannelSpec;
+  edge_color?: IChannelSpec;
+  edge_width?: IChannelSpec;
+}
+
+export
+const PALETTE_SIZE = 256;
+
+function parseHex(color: string): number[] {
+  return [1, 3, 5].map(i => parseInt(color.slice(i, i + 2), 16));
+}
+
+function toHex(rgb: number[]): string {
+  return '#' + rgb.map(c => {
+    const s = Math.round(c).toString(16);
+    return s.length === 1 ? '0' + s : s;
+  }).join('');
+}
+
+/**
+ * `levels` colors linearly interpolated between the colormap stops.
+ */
+export
+function palette(stops: string[], levels: number = PALETTE_SIZE): string[] {
+  const rgb = stops.map(parseHex);
+  const colors: string[] = [];
+  for (let i = 0; i < levels; ++i) {
+    const at = i / (levels - 1) * (stops.length - 1);
+    const k = Math.min(Math.floor(at), stops.length - 2);
+    const t = at - k;
+    colors.push(toHex([0, 1, 2].map(c => rgb[k][c] * (1 - t) + rgb[k + 1][c] * t)));
+  }
+  return colors;
+}
+
+function transform(scale: string): (v: number) => number {
+  if (scale === 'log') {
+    return (v: number) => v > 0 ? Math.log(v) : NaN;
+  }
+  if (scale === 'sqrt') {
+    return (v: number) => v >= 0 ? Math.sqrt(v) : NaN;
+  }
+  return (v: number) => v;
+}
+
+/**
+ * Normalize numeric values to [0, 1] under the channel's scale and domain.
+ * Missing and out-of-scale values become NaN.
+ */
+export
+function normalize(values: Float64Array, spec: IChannelSpec): Float64Array {
+  const f = transform(spec.scale);
+  let lo: number, hi: number;
+  if (spec.domain) {
+    lo = f(spec.domain[0]);
+    hi = f(spec.domain[1]);
+  } else {
+    lo = Infinity;
+    hi = -Infinity;
+    for (let i = 0; i < values.length; ++i) {
+      const v = f(values[i]);
+      if (v < lo) { lo = v; }
+      if (v > hi) { hi = v; }
+    }
+  }
+  const span = hi - lo || 1;
+  const out = new Float64Array(values.length);
+  for (let i = 0; i < values.length; ++i) {
+    out[i] = Math.min(1, Math.max(0, (f(values[i]) - lo) / span));
+  }
+  return out;
+}
+
+/**
+ * A channel evaluated over every node or edge: palette indices for colors
+ * (255 entries plus "missing") or sizes.
+ */
+export
+interface IChannel {
+  colors: Uint8Array | null;
+  palette: string[];
+  sizes: Float32Array | null;
+}
+
+const MISSING = 255;
+
+/**
+ * Evaluate a channel over attribute values collected in insertion order.
+ */
+export
+function evaluateChannel(values: any[], spec: IChannelSpec, color: boolean): IChannel {
+  const n = values.length;
+  const numeric = values.every(v => v === undefined || v === null || typeof v === 'number');
+  if (color && !numeric) {
+    // categorical: one colormap stop per category, in order of appearance
+    const stops = spec.colormap!;
+    const codes = new Map<any, number>();
+    let next = 0;
+    const colors = new Uint8Array(n);
+    for (let i = 0; i < n; ++i) {
+      const v = values[i];
+      if (v === undefined || v === null || v === '') {
+        colors[i] = MISSING;
+        continue;
+      }
+      if (!codes.has(v)) {
+        codes.set(v, next++ % Math.min(stops.length, MISSING));
+      }
+      colors[i] = codes.get(v)!;
+    }
+    return {colors, palette: stops, sizes: null};
+  }
+  const raw = new Float64Array(n);
+  for (let i = 0; i < n; ++i) {
+    const v = values[i];
+    raw[i] = typeof v === 'number' ? v : NaN;
+  }
+  const unit = normalize(raw, spec);
+  if (color) {
+    const colors = new Uint8Array(n);
+    for (let i = 0; i < n; ++i) {
+      colors[i] = isNaN(unit[i]) ? MISSING : Math.round(unit[i] * (MISSING - 1));
+    }
+    return {colors, palette: palette(spec.colormap!, MISSING), sizes: null};
+  }
+  const [lo, hi] = spec.range!;
+  const sizes = new Float32Array(n);
+  for (let i = 0; i < n; ++i) {
+    sizes[i] = isNaN(unit[i]) ? NaN : lo + unit[i] * (hi - lo);
+  }
+  return {colors: null, palette: [], sizes};
+}
+
+/**
+ * Keeps the evaluated channels of a style spec for a graph and applies
+ * them in sigma's reducers.
+ */
+export
+class StyleMapper {
+  constructor(graph: Graph) {
+    this.graph = graph;
+  }
+
+  /**
+   * Replace the spec and re-evaluate every channel.
+   */
+  setSpec(spec: IStyleSpec) {
+    this.spec = spec || {};
+    this.update();
+  }
+
+  /**
+   * Forget the node/edge order, e.g. after nodes were added or removed.
+   */
+  invalidate() {
+    this.nodeIndex = null;
+    this.edgeIndex = null;
+  }
+
+  /**
+   * Re-evaluate the channels reading any of `attrs`, or all channels.
+   *
+   * Returns whether anything was re-evaluated.
+   */
+  update(attrs: string[] | null = null): boolean {
+    const spec = this.spec;
+    let changed = false;
+    for (const channel of ['node_color', 'node_size', 'edge_color', 'edge_width']) {
+      const s: IChannelSpec | undefined = (spec as any)[channel];
+      if (!s) {
+        delete this.channels[channel];
+        continue;
+      }
+      if (attrs !== null && attrs.indexOf(s.attr) < 0) {
+        continue;
+      }
+      const values: any[] = [];
+      if (channel.startsWith('node')) {
+        this.graph.forEachNode((node: string, a: any) => { values.push(a[s.attr]); });
+      } else {
+        this.graph.forEachEdge((edge: string, a: any) => { values.push(a[s.attr]); });
+      }
+      this.channels[channel] = evaluateChannel(values, s, channel.endsWith('color'));
+      changed = true;
+    }
+    return changed;
+  }
+
+  get active(): boolean {
+    return Object.keys(this.channels).length > 0;
+  }
+
+  applyNode(node: string, data: any) {
+    const color = this.channels['node_color'];
+    const size = this.channels['node_size'];
+    if (!color && !size) {
+      return;
+    }
+    if (this.nodeIndex === null) {
+      this.nodeIndex = new Map();
+      let i = 0;
+      this.graph.forEachNode((key: string) => { this.nodeIndex!.set(key, i++); });
+    }
+    const i = this.nodeIndex.get(node)!;
+    if (color && color.colors![i] !== MISSING) {
+      data.color = color.palette[color.colors![i]];
+    }
+    if (size && !isNaN(size.sizes![i])) {
+      data.size = size.sizes![i];
+    }
+  }
+
+  applyEdge(edge: string, data: any) {
+    const color = this.channels['edge_color'];
+    const width = this.channels['edge_width'];
+    if (!color && !width) {
+      return;
+    }
+    if (this.edgeIndex === null) {
+      this.edgeIndex = new Map();
+      let i = 0;
+      this.graph.forEachEdge((key: string) => { this.edgeIndex!.set(key, i++); });
+    }
+    const i = this.edgeIndex.get(edge)!;
+    if (color && color.colors![i] !== MISSING) {
+      data.color = color.palette[color.colors![i]];
+    }
+    if (width && !isNaN(width.sizes![i])) {
+      data.size = width.sizes![i];
+    }
+  }
+
+  graph: Graph;
+  spec: IStyleSpec = {};
+  channels: {[channel: string]: IChannel} = {};
+  protected nodeIndex: Map<string, number> | null = null;
+  protected edgeIndex: Map<string, number> | null = null;
+}
@@ -0,0 +1,76 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+/**
+ * Reassembly of large state updates sent in chunks (see ChunkedTransfer in
+ * ipyneugraph/sync.py).
+ *
+ * A `chunked` header carries the JSON state, its buffer paths and the size
+ * of every buffer. Each following `chunk` message carries slices of those
+ * buffers, as `[buffer index, offset]` parts, which are copied into place.
+ */
+
+import {
+  put_buffers
+} from '@jupyter-widgets/base';
+
+export
+interface IChunkedHeader {
+  transfer: number;
+  state: any;
+  buffer_paths: (string | number)[][];
+  sizes: number[];
+  chunks: number;
+}
+
+export
+interface IChunk {
+  transfer: number;
+  seq: number;
+  parts: [number, number][];
+}
+
+function toBytes(buffer: ArrayBuffer | DataView): Uint8Array {
+  return buffer instanceof DataView
+    ? new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength)
+    : new Uint8Array(buffer);
+}
+
+export
+class ChunkAssembler {
+  constructor(header: IChunkedHeader) {
+    this.header = header;
+    this.transfer = header.transfer;
+    this.buffers = header.sizes.map(size => new Uint8Array(size));
+    this.remaining = header.chunks;
+  }
+
+  /**
+   * Copy the slices of a chunk into place.
+   */
+  add(chunk: IChunk, buffers: (ArrayBuffer | DataView)[]) {
+    chunk.parts.forEach(([index, offset], i) => {
+      this.buffers[index].set(toBytes(buffers[i]), offset);
+    });
+    this.remaining -= 1;
+  }
+
+  get complete(): boolean {
+    return this.remaining <= 0;
+  }
+
+  /**
+   * The state with its buffers put back, once complete.
+   */
+  state(): any {
+    const state = this.header.state;
+    put_buffers(state, this.header.buffer_paths,
+                this.buffers.map(bytes => new DataView(bytes.buffer)));
+    return state;
+  }
+
+  header: IChunkedHeader;
+  transfer: number;
+  buffers: Uint8Array[];
+  remaining: number;
+}
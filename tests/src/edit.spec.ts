@@ -0,0 +1,79 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+import expect = require('expect.js');
+
+import Graph from 'graphology';
+
+import {
+  EditLog, GraphEditor, IEditOp
+} from '../../src/edit';
+
+
+describe('EditLog', () => {
+
+  it('should coalesce runs of edits and repeated moves', () => {
+    const log = new EditLog();
+    log.move('a', 0, 0);
+    log.move('b', 1, 1);
+    log.move('a', 2, 3);
+    log.dropNode('c');
+    log.dropNode('d');
+    log.move('a', 4, 5);
+    const ops = log.take();
+    expect(ops.map(op => op.op)).to.eql(['move', 'drop_nodes', 'move']);
+    expect(ops[0]).to.eql({op: 'move', id: ['a', 'b'], x: [2, 1], y: [3, 1]});
+    expect(ops[1].id).to.eql(['c', 'd']);
+    expect(log.length).to.be(0);
+  });
+
+});
+
+
+describe('GraphEditor', () => {
+
+  function makeGraph() {
+    const graph = new Graph({type: 'directed', multi: true});
+    graph.addNode('a', {x: 0, y: 0});
+    graph.addNode('b', {x: 1, y: 0});
+    graph.addEdgeWithKey('0', 'a', 'b');
+    return graph;
+  }
+
+  it('should apply edits at once and send them in a batch', () => {
+    const graph = makeGraph();
+    const sent: [number, IEditOp[]][] = [];
+    const editor = new GraphEditor(graph, (seq, ops) => { sent.push([seq, ops]); });
+    editor.move('a', 2, 3);
+    const node = editor.addNode(4, 5);
+    const edge = editor.addEdge(node, 'a');
+    editor.dropNode('b');
+    expect(graph.getNodeAttribute('a', 'x')).to.be(2);
+    expect(graph.hasEdge(edge)).to.be(true);
+    expect(graph.getEdgeAttribute('0', '_dropped')).to.be(true);
+    expect(editor.pending).to.be(true);
+    editor.flush();
+    expect(sent.length).to.be(1);
+    expect(sent[0][1].map(op => op.op)).to.eql(['move', 'add_nodes', 'add_edges', 'drop_nodes']);
+  });
+
+  it('should undo provisional changes of answered batches', () => {
+    const graph = makeGraph();
+    const editor = new GraphEditor(graph, () => undefined);
+    const node = editor.addNode(4, 5);
+    editor.dropEdge('0');
+    editor.flush();
+    const edge = editor.addEdge(node, 'b');
+    editor.acknowledge(1);
+    // the kernel's diff would add the node back
+    expect(graph.hasNode(node)).to.be(false);
+    expect(graph.getEdgeAttribute('0', '_dropped')).to.be(undefined);
+    graph.addNode(node, {x: 4, y: 5});
+    editor.restore();
+    expect(graph.hasEdge(edge)).to.be(true);
+    editor.flush();
+    editor.acknowledge(2);
+    expect(editor.pending).to.be(false);
+  });
+
+});
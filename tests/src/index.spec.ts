@@ -23,14 +23,14 @@ describe('NeuGraph', () => {
     it('should be createable', () => {
       let model = createTestModel(NeuGraphModel);
       expect(model).to.be.an(NeuGraphModel);
-      expect(model.get('value')).to.be('Hello World');
+      expect(model.get('height')).to.be('500px');
     });
 
-    it('should be createable with a value', () => {
-      let state = { value: 'Foo Bar!' }
+    it('should be createable with a height', () => {
+      let state = { height: '300px' }
       let model = createTestModel(NeuGraphModel, state);
       expect(model).to.be.an(NeuGraphModel);
-      expect(model.get('value')).to.be('Foo Bar!');
+      expect(model.get('height')).to.be('300px');
     });
 
   });
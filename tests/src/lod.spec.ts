@@ -0,0 +1,50 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+import expect = require('expect.js');
+
+import Graph from 'graphology';
+
+import {
+  LevelOfDetail, ensurePositions
+} from '../../src/lod';
+
+
+describe('LevelOfDetail', () => {
+
+  function makeGraph(n: number) {
+    const graph = new Graph({type: 'directed', multi: true});
+    for (let i = 0; i < n; ++i) {
+      graph.addNode(String(i));
+    }
+    for (let i = 1; i < n; ++i) {
+      graph.addEdge(String(i - 1), String(i));
+    }
+    return graph;
+  }
+
+  it('should hide edges of large graphs when zoomed out', () => {
+    const lod = new LevelOfDetail(makeGraph(10), {edgeRatio: 2, minEdges: 5, labelSize: 8});
+    expect(lod.update(1)).to.be(false);
+    expect(lod.update(4)).to.be(true);
+    expect(lod.edgeReducer('0', {}).hidden).to.be(true);
+    expect(lod.update(5)).to.be(false);
+  });
+
+  it('should always draw small graphs in full', () => {
+    const lod = new LevelOfDetail(makeGraph(3), {edgeRatio: 2, minEdges: 5, labelSize: 8});
+    expect(lod.update(100)).to.be(false);
+    expect(lod.settings().hideEdgesOnMove).to.be(false);
+  });
+
+  it('should position nodes without coordinates', () => {
+    const graph = makeGraph(3);
+    graph.mergeNodeAttributes('1', {x: 10, y: 20});
+    graph.mergeNodeAttributes('2', {x: NaN, y: NaN});
+    ensurePositions(graph);
+    expect(graph.getNodeAttribute('0', 'x')).to.be.a('number');
+    expect(graph.getNodeAttribute('1', 'x')).to.be(10);
+    expect(isFinite(graph.getNodeAttribute('2', 'y'))).to.be(true);
+  });
+
+});
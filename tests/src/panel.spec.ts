@@ -0,0 +1,35 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+import expect = require('expect.js');
+
+import {
+  Recording, Ring
+} from '../../src/panel';
+
+
+describe('Ring', () => {
+
+  it('should keep the latest rows', () => {
+    const ring = new Ring(3, 2, Float32Array);
+    ring.push(new Float32Array([0, 0, 1, 1]));
+    ring.push(new Float32Array([2, 2, 3, 3, 4, 4]));
+    expect(ring.length).to.be(3);
+    expect(ring.data[ring.offset(0)]).to.be(2);
+    expect(ring.data[ring.offset(2) + 1]).to.be(4);
+  });
+
+});
+
+describe('Recording', () => {
+
+  it('should track the latest time', () => {
+    const recording = new Recording({neurons: ['a'], capacity: 4, spike_capacity: 4, label: 'V'});
+    recording.append(new Float64Array([0.1, 0.2]), new Float32Array([-70, -60]),
+                     new Float64Array([0.3]), new Uint32Array([0]));
+    expect(recording.latest()).to.be(0.3);
+    recording.clear();
+    expect(recording.latest()).to.be(-Infinity);
+  });
+
+});
@@ -0,0 +1,57 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+import expect = require('expect.js');
+
+import Graph from 'graphology';
+
+import {
+  serializeSnapshot
+} from '../../src/snapshot';
+
+import {
+  columnValue, deserialize_graph
+} from '../../src/serializers';
+
+
+describe('serializeSnapshot', () => {
+
+  function makeGraph(n: number) {
+    const graph = new Graph({type: 'directed', multi: true});
+    for (let i = 0; i < n; ++i) {
+      graph.addNode('n' + i, {x: i, y: -i, kind: i % 2 ? 'a' : 'b', V: i / 2, extra: 'dropped'});
+    }
+    for (let i = 1; i < n; ++i) {
+      graph.addEdgeWithKey(String(10 + i), 'n0', 'n' + i);
+    }
+    return graph;
+  }
+
+  it('should round trip the displayed graph', () => {
+    const style = {node_color: {attr: 'kind', scale: 'linear' as 'linear', colormap: ['#000000', '#ffffff']}};
+    const payload = deserialize_graph(serializeSnapshot(makeGraph(4), style, 1 << 20))!;
+    expect(payload.snapshot!.partial).to.be(false);
+    expect(payload.nodes.id).to.eql(['n0', 'n1', 'n2', 'n3']);
+    expect(columnValue(payload.nodes.attrs.x, 2)).to.be(2);
+    expect(columnValue(payload.nodes.attrs.kind, 1)).to.be('a');
+    expect(payload.nodes.attrs.V).to.be(undefined);
+    expect(payload.nodes.attrs.extra).to.be(undefined);
+    expect(Array.from(payload.edges.id)).to.eql([11, 12, 13]);
+    expect(Array.from(payload.edges.target)).to.eql([1, 2, 3]);
+  });
+
+  it('should leave out edges without a kernel key', () => {
+    const graph = makeGraph(3);
+    graph.addEdgeWithKey('~3', 'n1', 'n2');
+    const payload = deserialize_graph(serializeSnapshot(graph, {}, 1 << 20))!;
+    expect(Array.from(payload.edges.id)).to.eql([11, 12]);
+  });
+
+  it('should keep the hubs of graphs over the size cap', () => {
+    const payload = deserialize_graph(serializeSnapshot(makeGraph(1000), {}, 4000))!;
+    expect(payload.snapshot).to.eql({partial: true, n_nodes: 1000, n_edges: 999});
+    expect(payload.nodes.id.length).to.be.below(1000);
+    expect(payload.nodes.id[0]).to.be('n0');
+  });
+
+});
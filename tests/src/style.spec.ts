@@ -0,0 +1,61 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+import expect = require('expect.js');
+
+import Graph from 'graphology';
+
+import {
+  StyleMapper, palette
+} from '../../src/style';
+
+
+describe('StyleMapper', () => {
+
+  function makeGraph() {
+    const graph = new Graph({type: 'directed', multi: true});
+    graph.addNode('a', {V: -70, kind: 'x'});
+    graph.addNode('b', {V: -55, kind: 'y'});
+    graph.addNode('c', {V: -40, kind: 'x'});
+    graph.addNode('d', {});
+    return graph;
+  }
+
+  it('should interpolate palettes between stops', () => {
+    expect(palette(['#000000', '#ffffff'], 3)).to.eql(['#000000', '#808080', '#ffffff']);
+  });
+
+  it('should map numeric attributes over the domain', () => {
+    const style = new StyleMapper(makeGraph());
+    style.setSpec({node_size: {attr: 'V', scale: 'linear', domain: [-70, -40], range: [2, 8]}});
+    const sizes = ['a', 'b', 'c'].map(n => {
+      const data = {size: 1};
+      style.applyNode(n, data);
+      return data.size;
+    });
+    expect(sizes).to.eql([2, 5, 8]);
+    const missing = {size: 1};
+    style.applyNode('d', missing);
+    expect(missing.size).to.be(1);
+  });
+
+  it('should color string attributes by category', () => {
+    const stops = ['#111111', '#222222'];
+    const style = new StyleMapper(makeGraph());
+    style.setSpec({node_color: {attr: 'kind', scale: 'linear', colormap: stops}});
+    const colors = ['a', 'b', 'c'].map(n => {
+      const data: any = {};
+      style.applyNode(n, data);
+      return data.color;
+    });
+    expect(colors).to.eql(['#111111', '#222222', '#111111']);
+  });
+
+  it('should only re-evaluate channels of changed attributes', () => {
+    const style = new StyleMapper(makeGraph());
+    style.setSpec({node_size: {attr: 'V', scale: 'linear', range: [2, 8]}});
+    expect(style.update(['spike'])).to.be(false);
+    expect(style.update(['V'])).to.be(true);
+  });
+
+});
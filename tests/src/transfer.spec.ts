@@ -0,0 +1,32 @@
+// Copyright (c) Tingkai liu
+// Distributed under the terms of the Modified BSD License.
+
+import expect = require('expect.js');
+
+import {
+  ChunkAssembler
+} from '../../src/transfer';
+
+
+describe('ChunkAssembler', () => {
+
+  it('should put chunk slices back into the state', () => {
+    const assembler = new ChunkAssembler({
+      transfer: 1,
+      state: {graph: {a: {}, b: {}}},
+      buffer_paths: [['graph', 'a', 'buffer'], ['graph', 'b', 'buffer']],
+      sizes: [3, 2],
+      chunks: 2,
+    });
+    const bytes = (values: number[]) => new Uint8Array(values).buffer;
+    assembler.add({transfer: 1, seq: 0, parts: [[0, 0]]}, [bytes([1, 2])]);
+    expect(assembler.complete).to.be(false);
+    assembler.add({transfer: 1, seq: 1, parts: [[0, 2], [1, 0]]}, [bytes([3]), bytes([4, 5])]);
+    expect(assembler.complete).to.be(true);
+    const state = assembler.state();
+    const a: DataView = state.graph.a.buffer;
+    expect(Array.from(new Uint8Array(a.buffer))).to.eql([1, 2, 3]);
+    expect(new Uint8Array(state.graph.b.buffer.buffer)[1]).to.be(5);
+  });
+
+});